@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Bench Cards
+===========
+
+Times dealing hands with the shared `poker.Card` instances against building
+a new card object for every dealt card, and counts the memory allocated per
+dealt hand.
+"""
+import sys
+import os
+# Adds the path of poker_game to the benchmark.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import timeit
+import tracemalloc
+from math import floor
+from poker_game import poker
+from poker_game import streams
+
+SharedCard = poker.Card
+
+
+class BuiltCard(object):
+    """
+    A card built on every deal, the way `poker.Card` used to work.
+    """
+
+    def __init__(self, id_):
+        self.id = id_
+        self.value = self.id % SharedCard.CARD_RANGE
+        suit_num = int(floor(self.id / SharedCard.CARD_RANGE))
+        self.suit = SharedCard.SUITS[suit_num]
+        self.suit_name = SharedCard.SUIT_NAMES[self.suit]
+        self.name = SharedCard.VALUE_NAMES[self.value]
+        self.full_name = "{card.name} of {card.suit_name}".format(card=self)
+        self.color = (SharedCard.RED if self.suit in SharedCard.REDS
+                      else SharedCard.BLACK)
+
+
+class BuiltDeck(object):
+    """
+    Stands in for `poker.Card.DECK`, which `poker.PokerEngine` deals from,
+    building a new card on every lookup.
+    """
+
+    def __getitem__(self, id_):
+        return BuiltCard(id_)
+
+
+BuiltCard.DECK = BuiltDeck()
+
+
+def deal(engine, num_hands, num_players):
+    hands = []
+    for _ in range(num_hands):
+        hands.append((engine.deal_hands(num_players), engine.deal_community()))
+    return hands
+
+
+def measure(card_class, num_hands, num_players):
+    """
+    Returns the seconds and bytes allocated per dealt hand.
+    """
+    poker.Card = card_class
+    try:
+        # Both card classes are timed on the same deals.
+        engine = poker.PokerEngine(streams.make_stream(0))
+        seconds = min(timeit.repeat(
+            lambda: deal(engine, num_hands, num_players),
+            number=1, repeat=3))
+
+        # Keep every hand alive so the cards are counted.
+        tracemalloc.start()
+        dealt = deal(engine, num_hands, num_players)
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del dealt
+    finally:
+        poker.Card = SharedCard
+
+    return seconds / num_hands, allocated / num_hands
+
+
+def main(num_hands=20000, num_players=6):
+    built = measure(BuiltCard, num_hands, num_players)
+    shared = measure(SharedCard, num_hands, num_players)
+
+    print("{} players per hand".format(num_players))
+    print("built cards:  {:.2f} us/hand, {:.0f} bytes/hand".format(
+        built[0] * 1e6, built[1]))
+    print("shared cards: {:.2f} us/hand, {:.0f} bytes/hand".format(
+        shared[0] * 1e6, shared[1]))
+
+
+if __name__ == '__main__':
+    main()
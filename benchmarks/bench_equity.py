@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+Bench Equity
+============
+
+Times exact equity of a heads-up all-in on the flop and on the turn.
+"""
+import sys
+import os
+# Adds the path of poker_game to the benchmark.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import timeit
+from poker_game import codec
+from poker_game import equity
+
+SPOTS = [
+    ("flop", ['As', 'Ad'], ['Ks', 'Kd'], ['2s', '7d', '9d']),
+    ("flop", ['Ah', 'Kh'], ['7c', '7d'], ['2h', '7h', 'Td']),
+    ("turn", ['Ah', 'Kh'], ['7c', '7d'], ['2h', '7h', 'Td', '3s']),
+]
+
+
+def to_ids(cards):
+    return [codec.to_id(card) for card in cards]
+
+
+def main():
+    for street, first, second, board in SPOTS:
+        spot = [to_ids(first), to_ids(second)]
+        board = to_ids(board)
+        seconds = min(timeit.repeat(
+            lambda: equity.exact(spot, board), number=10, repeat=3)) / 10
+        print("{} {} vs {} on {}: {:.2f} ms".format(
+            street, ''.join(first), ''.join(second), ''.join(
+                codec.ID_STRINGS[card] for card in board), seconds * 1e3))
+
+
+if __name__ == '__main__':
+    main()
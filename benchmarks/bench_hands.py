@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Bench Hands
+===========
+
+Times ranking seven card hands with `hands.evaluate` against walking the
+original chain of find_* functions from the best category down, and with
+`hands.evaluate_batch` when NumPy is installed. The find_* functions are
+read with git from poker_game/hands.py as it was before `hands.evaluate`, or
+at the revision given with `--baseline`.
+"""
+import sys
+import os
+# Adds the path of poker_game to the benchmark.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import random
+import subprocess
+import timeit
+import types
+from poker_game import codec
+from poker_game import hands
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+FIND_NAMES = [
+    'find_straight_flush',
+    'find_four_of_a_kind',
+    'find_full_house',
+    'find_flush',
+    'find_straight',
+    'find_three_of_a_kind',
+    'find_pairs'
+]
+
+
+def git(*args):
+    return subprocess.check_output(('git',) + args, cwd=REPO_ROOT)
+
+
+def load_baseline(revision=None):
+    """
+    Loads poker_game/hands.py as it was at a revision, by default the one
+    before `hands.evaluate` was added.
+
+    Returns:
+        module: The old hands module.
+    """
+    if revision is None:
+        added = git('log', '--reverse', '--format=%H', '-S', 'def evaluate(',
+                    '--', 'poker_game/hands.py').split()
+        if not added:
+            raise SystemExit("No revision of hands.py adds evaluate.")
+        revision = added[0].decode('ascii') + '^'
+    source = git('show', '{}:poker_game/hands.py'.format(revision))
+    baseline = types.ModuleType('baseline_hands')
+    exec(compile(source, 'baseline_hands.py', 'exec'), baseline.__dict__)
+    return baseline
+
+
+def rank_with_chain(find_chain, deals):
+    for cards in deals:
+        for find in find_chain:
+            if find(cards[:2], cards[2:]) is not None:
+                break
+
+
+def rank_with_evaluate(deals):
+    for cards in deals:
+        hands.evaluate(cards[:2], cards[2:])
+
+
+def main(num_deals=10000, seed=0, revision=None):
+    baseline = load_baseline(revision)
+    find_chain = [getattr(baseline, name) for name in FIND_NAMES]
+    rng = random.Random(seed)
+    deals = [rng.sample(range(52), 7) for _ in range(num_deals)]
+    string_deals = [[codec.ID_STRINGS[card] for card in cards]
+                    for cards in deals]
+
+    chain = min(timeit.repeat(
+        lambda: rank_with_chain(find_chain, string_deals), number=1,
+        repeat=3))
+    evaluate = min(timeit.repeat(
+        lambda: rank_with_evaluate(deals), number=1, repeat=3))
+
+    print("find_* chain: {:.2f} us/hand".format(chain / num_deals * 1e6))
+    print("evaluate:     {:.2f} us/hand".format(evaluate / num_deals * 1e6))
+    print("speedup:      {:.1f}x".format(chain / evaluate))
+
+    if np is not None:
+        cards = np.array(deals)
+        batch = min(timeit.repeat(
+            lambda: hands.evaluate_batch(cards[:, :2], cards[:, 2:]),
+            number=1, repeat=3))
+        print("batch:        {:.2f} us/hand".format(batch / num_deals * 1e6))
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Times hand ranking.")
+    parser.add_argument(
+        '--baseline',
+        help="Git revision of the find_* functions, by default the last "
+             "before hands.evaluate.",
+        default=None)
+    main(revision=parser.parse_args().baseline)
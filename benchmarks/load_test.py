@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+"""
+Load Test
+=========
+
+Seats thousands of simulated players at tables and has each poll its table
+and act when it is their turn, then reports the hands played, the request
+latency and how late the event loop ran.
+
+By default the players call the ASGI app in this process, its tables played
+by `--shards` worker processes, which measures the tables and the app
+without a network. With `--url` they talk HTTP to a
+running server instead, e.g.
+
+    uvicorn poker_game.server:app --port 4040 &
+    python benchmarks/load_test.py --url http://127.0.0.1:4040 -n 2000
+"""
+import sys
+import os
+# Adds the path of poker_game to the benchmark.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+from poker_game import server
+from poker_game import shards
+from poker_game import simulator
+
+
+class AppClient(object):
+    """
+    Calls an ASGI app in this process.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method, path, body=None):
+        messages = [{
+            'type': 'http.request',
+            'body': b'' if body is None else json.dumps(body).encode('utf-8')
+        }]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await self.app(
+            {'type': 'http', 'method': method, 'path': path}, receive, send)
+        return sent[0]['status'], json.loads(sent[1]['body'].decode('utf-8'))
+
+    async def close(self):
+        pass
+
+
+class HTTPClient(object):
+    """
+    Talks HTTP/1.1 over one kept alive connection.
+    """
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port)
+        data = b'' if body is None else json.dumps(body).encode('utf-8')
+        self.writer.write((
+            "{} {} HTTP/1.1\r\nHost: {}\r\nContent-Type: application/json"
+            "\r\nContent-Length: {}\r\n\r\n"
+        ).format(method, path, self.host, len(data)).encode('latin-1') + data)
+
+        status_line = await self.reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        payload = await self.reader.readexactly(length)
+        return status, json.loads(payload.decode('utf-8'))
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def player(client, table_id, name, deadline, poll, latencies, rng):
+    """
+    Joins a table, then polls it and acts whenever it is our turn.
+    """
+    path = '/tables/{}'.format(table_id)
+    status, joined = await client.request(
+        'POST', path + '/join', {'name': name})
+    if status != 200:
+        return
+
+    while time.time() < deadline:
+        started = time.time()
+        status, state = await client.request('GET', path)
+        latencies.append(time.time() - started)
+
+        if state['waiting_on'] == joined['seat']:
+            action = rng.choice([simulator.CALL, simulator.CHECK,
+                                 simulator.FOLD, simulator.RAISE])
+            started = time.time()
+            await client.request('POST', path + '/act', {
+                'seat': joined['seat'], 'token': joined['token'],
+                'action': action, 'amount': 300})
+            latencies.append(time.time() - started)
+        await asyncio.sleep(poll * (0.5 + rng.random()))
+
+
+async def loop_lag(deadline, lags, interval=0.01):
+    """
+    Measures how late the event loop wakes a sleeping task.
+    """
+    while time.time() < deadline:
+        started = time.time()
+        await asyncio.sleep(interval)
+        lags.append(time.time() - started - interval)
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    num_tables = -(-args.players // args.seats)
+    deadline = time.time() + args.duration
+
+    app = None
+    if args.url:
+        clients = [HTTPClient(args.url) for _ in range(args.players)]
+        make = HTTPClient(args.url)
+    else:
+        app = server.PokerApp(shards.ShardManager(
+            args.shards, seed=args.seed, hand_pause=args.pause,
+            action_timeout=args.timeout).start())
+        clients = [AppClient(app)] * args.players
+        make = clients[0]
+
+    table_ids = []
+    for _ in range(num_tables):
+        status, state = await make.request('POST', '/tables', {'bots': 0})
+        table_ids.append(state['table'])
+
+    latencies = []
+    lags = []
+    started = time.time()
+    await asyncio.gather(loop_lag(deadline, lags), *[
+        player(client, table_ids[idx // args.seats], 'Player {}'.format(idx),
+               deadline, args.poll, latencies, rng)
+        for idx, client in enumerate(clients)])
+    elapsed = time.time() - started
+
+    hands = 0
+    for table_id in table_ids:
+        status, state = await make.request(
+            'GET', '/tables/{}'.format(table_id))
+        hands += state['hand']
+
+    for client in set(clients + [make]):
+        await client.close()
+    if app is not None:
+        app.shards.close()
+
+    latencies.sort()
+    lags.sort()
+    print("Players: {}, tables: {}".format(args.players, num_tables))
+    print("Hands: {} ({:.0f}/s)".format(hands, hands / elapsed))
+    print("Requests: {} ({:.0f}/s)".format(
+        len(latencies), len(latencies) / elapsed))
+    print("Latency p50: {:.2f} ms, p99: {:.2f} ms".format(
+        latencies[len(latencies) // 2] * 1e3,
+        latencies[int(len(latencies) * 0.99)] * 1e3))
+    print("Loop lag p99: {:.2f} ms, max: {:.2f} ms".format(
+        lags[int(len(lags) * 0.99)] * 1e3, lags[-1] * 1e3))
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Load tests the server.")
+
+    parser.add_argument(
+        '-n', '--players',
+        help="Number of players.",
+        type=int,
+        default=2000)
+    parser.add_argument(
+        '-s', '--seats',
+        help="Players seated at each table.",
+        type=int,
+        default=6)
+    parser.add_argument(
+        '-t', '--duration',
+        help="Seconds to run.",
+        type=float,
+        default=10.0)
+    parser.add_argument(
+        '--poll',
+        help="Seconds between polls of each player.",
+        type=float,
+        default=0.5)
+    parser.add_argument(
+        '--pause',
+        help="Seconds between hands, in process only.",
+        type=float,
+        default=0.1)
+    parser.add_argument(
+        '--timeout',
+        help="Seconds a player has to act, in process only.",
+        type=float,
+        default=2.0)
+    parser.add_argument(
+        '--shards',
+        help="Worker processes playing the tables, in process only.",
+        type=int,
+        default=1)
+    parser.add_argument(
+        '--seed',
+        help="Seed of the run.",
+        type=int,
+        default=0)
+    parser.add_argument(
+        '--url',
+        help="Load test a running server instead of the app in process.",
+        default=None)
+
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,456 @@
+"""
+Assets
+======
+Builds the front end for production into static/dist.
+
+The page in static/html loads React and Babel and compiles every .jsx file
+in the browser, which suits development only. The build joins the .jsx
+files in the order the page loads them, compiles and minifies them with
+esbuild into one bundle, and writes a page that loads the bundle with the
+production build of React. Every built file is named after a hash of its
+content, so it never changes under its name and can be cached forever; the
+built page is the one file that must be checked for changes.
+
+The card images are packed into one sprite sheet, 13 columns of ranks by a
+row per suit and a row of backs, at 1x and 2x and as AVIF and WebP with a
+JPEG fallback. A stylesheet picks the sheet the browser supports with
+`image-set`, so a whole table is drawn from one image and card.jsx shows a
+card by its offset in the sheet.
+
+Run it with `python -m poker_game.assets`, which needs esbuild, e.g. from
+`npm install` at the top of the repository, and Pillow for the sprites.
+"""
+import os
+import io
+import re
+import json
+import shutil
+import hashlib
+import subprocess
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from poker_game import codec
+
+STATIC_ROOT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'static')
+
+DIST_DIR = 'dist'
+DIST_ROOT = os.path.join(STATIC_ROOT, DIST_DIR)
+
+PAGE_PATH = os.path.join('html', 'main_game.html')
+MANIFEST_NAME = 'manifest.json'
+INDEX_NAME = 'index.html'
+
+# Hex digits of the content hash in built names.
+HASH_SIZE = 12
+
+REACT_VERSION = '16'
+
+# The production builds of React, in place of the development ones.
+PRODUCTION_SCRIPTS = [
+    'https://unpkg.com/react@{}/umd/react.production.min.js'.format(
+        REACT_VERSION),
+    'https://unpkg.com/react-dom@{}/umd/react-dom.production.min.js'.format(
+        REACT_VERSION),
+]
+
+CARDS_PATH = os.path.join('images', 'cards')
+
+# The backs in the last row of the sheet, in the order of card.jsx.
+BACK_NAMES = ['back_red', 'back_blue', 'back_gray', 'back_green',
+              'back_purple', 'back_yellow']
+
+SPRITE_COLUMNS = codec.NUM_RANKS
+SPRITE_ROWS = codec.NUM_SUITS + 1
+
+# Size of one card in the 1x sheet, in pixels, the shape of the images.
+CARD_WIDTH = 120
+CARD_HEIGHT = 184
+
+SPRITE_SCALES = (1, 2)
+
+# The formats of the sheet, best first, with their encoder options. JPEG is
+# the fallback every browser shows.
+SPRITE_FORMATS = [
+    ('avif', 'image/avif', {'quality': 50}),
+    ('webp', 'image/webp', {'quality': 80, 'method': 6}),
+    ('jpeg', 'image/jpeg', {'quality': 82, 'optimize': True,
+                            'progressive': True}),
+]
+
+# The sprite stylesheet the development page links, rebuilt with the sheets.
+SPRITES_CSS = 'sprites.css'
+
+_SCRIPT = re.compile(r'\s*<script src="([^"]+)"[^>]*></script>')
+_STYLESHEET = re.compile(r'href="(/static/(?:css|dist)/[^"]+\.css)"')
+_COMMENT = re.compile(r'\s*<!--.*?-->', re.DOTALL)
+_HASHED = re.compile(r'\.[0-9a-f]{{{}}}\.[^.]+$'.format(HASH_SIZE))
+
+
+def hashed_name(name, content):
+    """
+    Names a file after its content, e.g. 'app.js' becomes 'app.1a2b3c.js'.
+
+    Args:
+        name(str): The name of the file.
+        content(bytes): The content of the file.
+
+    Returns:
+        str: The hashed name.
+    """
+    digest = hashlib.sha256(content).hexdigest()[:HASH_SIZE]
+    base, ext = os.path.splitext(name)
+    return '{}.{}{}'.format(base, digest, ext)
+
+
+def is_hashed(name):
+    """
+    Returns whether a file name carries the hash of its content.
+    """
+    return _HASHED.search(name) is not None
+
+
+def page_scripts(page):
+    """
+    Lists the .jsx files a development page loads, in order.
+
+    Args:
+        page(str): The development page.
+
+    Returns:
+        list(str): The URL paths of the .jsx files.
+    """
+    return [src for src in _SCRIPT.findall(page) if src.endswith('.jsx')]
+
+
+def find_esbuild():
+    """
+    Finds the esbuild command, installed by npm or on the path.
+
+    Raises:
+        RuntimeError: esbuild is not installed.
+    """
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    local = os.path.join(repo_root, 'node_modules', '.bin', 'esbuild')
+    if os.path.isfile(local):
+        return local
+    found = shutil.which('esbuild')
+    if found is None:
+        raise RuntimeError(
+            "The build needs esbuild, run `npm install` first.")
+    return found
+
+
+def compile_jsx(source, esbuild=None):
+    """
+    Compiles and minifies JSX into one script.
+
+    Args:
+        source(str): The JSX of every file, joined.
+        esbuild(str | None): The esbuild command, found when `None`.
+
+    Returns:
+        bytes: The minified script.
+    """
+    command = [
+        esbuild or find_esbuild(), '--loader=jsx', '--minify',
+        '--format=iife', '--target=es2017',
+        '--define:process.env.NODE_ENV="production"'
+    ]
+    return subprocess.run(
+        command, input=source.encode('utf-8'), stdout=subprocess.PIPE,
+        check=True).stdout
+
+
+def production_page(page, assets):
+    """
+    Rewrites the development page to load the built assets.
+
+    Args:
+        page(str): The development page.
+        assets(dict(str, str)): The built name of every source path, e.g.
+            '/static/js/app.js' to '/static/dist/app.1a2b3c.js'.
+
+    Returns:
+        str: The production page.
+    """
+    def script(match):
+        src = match.group(1)
+        if src.endswith('.jsx') or 'babel' in src:
+            return ''
+        if 'react-dom' in src:
+            return '\n    <script src="{}" crossorigin></script>'.format(
+                PRODUCTION_SCRIPTS[1])
+        if 'react' in src:
+            return '\n    <script src="{}" crossorigin></script>'.format(
+                PRODUCTION_SCRIPTS[0])
+        return match.group(0)
+
+    page = _COMMENT.sub('', _SCRIPT.sub(script, page))
+    page = _STYLESHEET.sub(
+        lambda match: 'href="{}"'.format(
+            assets.get(match.group(1), match.group(1))), page)
+    # Deferred, so the bundle runs once the page is parsed.
+    return page.replace('</head>', '    <script src="{}" defer></script>\n'
+                        '</head>'.format(assets['/static/js/app.js']), 1)
+
+
+def write_asset(dist_root, name, content, assets, path):
+    """
+    Writes a built file under its hashed name and records it.
+    """
+    built = hashed_name(name, content)
+    with open(os.path.join(dist_root, built), 'wb') as built_file:
+        built_file.write(content)
+    assets[path] = '/static/{}/{}'.format(DIST_DIR, built)
+
+
+def sprite_layout():
+    """
+    Lists where every card sits in the sprite sheet.
+
+    Returns:
+        list(tuple(str, int, int)): The name, column and row of every card,
+            the faces in the order of their ids.
+    """
+    layout = [
+        (codec.ID_STRINGS[card_id], card_id % SPRITE_COLUMNS,
+         card_id // SPRITE_COLUMNS)
+        for card_id in range(codec.NUM_CARDS)
+    ]
+    layout.extend((name, column, SPRITE_ROWS - 1)
+                  for column, name in enumerate(BACK_NAMES))
+    return layout
+
+
+def sprite_sheet(cards_root, scale):
+    """
+    Packs the card images into one sheet.
+
+    Args:
+        cards_root(str): The folder of the card images.
+        scale(int): The size of the sheet, 1 or 2 for high density screens.
+
+    Returns:
+        PIL.Image.Image: The sheet.
+
+    Raises:
+        RuntimeError: Pillow is not installed.
+    """
+    if Image is None:
+        raise RuntimeError("Building the card sprites requires Pillow.")
+
+    width = CARD_WIDTH * scale
+    height = CARD_HEIGHT * scale
+    sheet = Image.new(
+        'RGB', (width * SPRITE_COLUMNS, height * SPRITE_ROWS), 'white')
+    for name, column, row in sprite_layout():
+        with Image.open(os.path.join(cards_root, name + '.jpg')) as card:
+            # Some of the images are CMYK.
+            card = card.convert('RGB').resize((width, height), Image.LANCZOS)
+            sheet.paste(card, (column * width, row * height))
+    return sheet
+
+
+def encode_sheet(sheet, image_format, options):
+    """
+    Encodes a sheet, or returns `None` when Pillow cannot write the format.
+    """
+    data = io.BytesIO()
+    try:
+        sheet.save(data, image_format.upper(), **options)
+    except (KeyError, OSError):
+        return None
+    return data.getvalue()
+
+
+def sprites_css(sheets):
+    """
+    Writes the stylesheet that draws cards from the sprite sheets.
+
+    Args:
+        sheets(dict(int, list(tuple(str, str)))): The built URL and MIME type
+            of every format of the sheet at each scale, best format first.
+
+    Returns:
+        str: The stylesheet.
+    """
+    fallback = [url for url, mime in sheets[1] if mime == 'image/jpeg'][0]
+    webkit_set = ', '.join(
+        'url({}) {}x'.format(url, scale)
+        for scale in SPRITE_SCALES
+        for url, mime in sheets[scale] if mime == 'image/jpeg')
+    image_set = []
+    for idx, (_, mime) in enumerate(sheets[1]):
+        for scale in SPRITE_SCALES:
+            image_set.append('url({}) type("{}") {}x'.format(
+                sheets[scale][idx][0], mime, scale))
+    # The page draws cards from single images unless this is set.
+    return (
+        ':root {{\n'
+        '  --card-sprites: 1;\n'
+        '}}\n'
+        '\n'
+        '.card-sprite {{\n'
+        '  display: inline-block;\n'
+        '  aspect-ratio: {width} / {height};\n'
+        '  background-repeat: no-repeat;\n'
+        '  background-size: {columns}00% {rows}00%;\n'
+        '  background-image: url({fallback});\n'
+        '  background-image: -webkit-image-set({webkit_set});\n'
+        '  background-image: image-set({image_set});\n'
+        '}}\n'
+    ).format(width=CARD_WIDTH, height=CARD_HEIGHT, columns=SPRITE_COLUMNS,
+             rows=SPRITE_ROWS, fallback=fallback, webkit_set=webkit_set,
+             image_set=', '.join(image_set))
+
+
+def build_sprites(static_root, dist_root, assets):
+    """
+    Builds the sprite sheets and their stylesheet into `dist_root`.
+
+    Args:
+        static_root(str): The folder of the sources.
+        dist_root(str): The folder of the build.
+        assets(dict(str, str)): The built names, updated with the sheets.
+    """
+    cards_root = os.path.join(static_root, CARDS_PATH)
+    sheets = {}
+    for scale in SPRITE_SCALES:
+        sheet = sprite_sheet(cards_root, scale)
+        sheets[scale] = []
+        for extension, mime, options in SPRITE_FORMATS:
+            content = encode_sheet(sheet, extension, options)
+            if content is None:
+                continue
+            name = 'cards@{}x.{}'.format(scale, extension)
+            path = '/'.join(['/static', CARDS_PATH.replace(os.sep, '/'), name])
+            write_asset(dist_root, name, content, assets, path)
+            sheets[scale].append((assets[path], mime))
+
+    css = sprites_css(sheets).encode('utf-8')
+    with open(os.path.join(dist_root, SPRITES_CSS), 'wb') as css_file:
+        css_file.write(css)
+    write_asset(dist_root, SPRITES_CSS, css, assets,
+                '/static/{}/{}'.format(DIST_DIR, SPRITES_CSS))
+
+
+def build_sprites_only(static_root=STATIC_ROOT, dist_root=DIST_ROOT):
+    """
+    Builds only the card sprites into `dist_root`, for the development page,
+    without esbuild. The rest of an earlier build is kept.
+
+    Returns:
+        dict(str, str): The built name of every sheet and the stylesheet.
+
+    Raises:
+        RuntimeError: Pillow is not installed.
+    """
+    if Image is None:
+        raise RuntimeError("Building the card sprites requires Pillow.")
+    if os.path.isdir(dist_root):
+        for name in os.listdir(dist_root):
+            # Sheets and stylesheets of earlier sprites.
+            if name.startswith('cards@') or name.startswith(
+                    os.path.splitext(SPRITES_CSS)[0] + '.'):
+                os.remove(os.path.join(dist_root, name))
+    else:
+        os.makedirs(dist_root)
+    assets = {}
+    build_sprites(static_root, dist_root, assets)
+    return assets
+
+
+def build(static_root=STATIC_ROOT, dist_root=DIST_ROOT, esbuild=None,
+          sprites=True):
+    """
+    Builds the bundle, the sprites, the stylesheets and the page into
+    `dist_root`, replacing any earlier build.
+
+    Args:
+        static_root(str): The folder of the sources.
+        dist_root(str): The folder of the build.
+        esbuild(str | None): The esbuild command, found when `None`.
+        sprites(bool): Whether to build the card sprites.
+
+    Returns:
+        dict(str, str): The built name of every source path.
+
+    Raises:
+        RuntimeError: The sprites are asked for without Pillow, or esbuild
+            fails.
+    """
+    if sprites and Image is None:
+        raise RuntimeError("Building the card sprites requires Pillow, "
+                           "build with --no-sprites without it.")
+    with open(os.path.join(static_root, PAGE_PATH)) as page:
+        page = page.read()
+
+    source = []
+    for src in page_scripts(page):
+        path = os.path.join(static_root, *src.split('/')[2:])
+        with open(path) as jsx_file:
+            source.append(jsx_file.read())
+    bundle = compile_jsx('\n'.join(source), esbuild)
+
+    if os.path.isdir(dist_root):
+        shutil.rmtree(dist_root)
+    os.makedirs(dist_root)
+
+    assets = {}
+    write_asset(dist_root, 'app.js', bundle, assets, '/static/js/app.js')
+    if sprites:
+        build_sprites(static_root, dist_root, assets)
+    for href in _STYLESHEET.findall(page):
+        # The sprite stylesheet is only there when the sprites were built.
+        if href in assets or href.startswith('/static/{}/'.format(DIST_DIR)):
+            continue
+        with open(os.path.join(static_root, *href.split('/')[2:]),
+                  'rb') as css_file:
+            write_asset(dist_root, os.path.basename(href), css_file.read(),
+                        assets, href)
+
+    with open(os.path.join(dist_root, INDEX_NAME), 'w') as index_file:
+        index_file.write(production_page(page, assets))
+    with open(os.path.join(dist_root, MANIFEST_NAME), 'w') as manifest:
+        json.dump(assets, manifest, indent=2, sort_keys=True)
+    return assets
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Builds the front end into static/dist.")
+
+    parser.add_argument(
+        '--esbuild',
+        help="The esbuild command, from node_modules or the path by default.",
+        default=None)
+    parser.add_argument(
+        '--no-sprites',
+        help="Skip the card sprites.",
+        dest='sprites',
+        default=True,
+        action='store_false')
+    parser.add_argument(
+        '--sprites-only',
+        help="Build only the card sprites the development page draws cards "
+             "from, which needs Pillow but not esbuild.",
+        default=False,
+        action='store_true')
+
+    args = parser.parse_args()
+    if args.sprites_only:
+        assets = build_sprites_only()
+    else:
+        assets = build(esbuild=args.esbuild, sprites=args.sprites)
+    for path, built in sorted(assets.items()):
+        print("{} -> {}".format(path, built))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""
+Batch
+=====
+Evaluates large batches of hands for `server`, spread over worker processes
+and returned chunk by chunk so a response can stream.
+
+A batch is a list of deals, each two hole cards and a board of 0, 3, 4 or 5
+cards. As JSON a deal is `[hole, board]` with cards as strings like 'As' or
+as ids. The binary form packs every deal into `RECORD_SIZE` bytes of card
+ids, the two hole cards then the board, padded with `EMPTY`.
+
+Every result is the strength from `hands.evaluate`, its category and the
+ids of the best five cards, most important first. As NDJSON each is one line
+`{"rank": ..., "category": ..., "best": [...]}`, and in binary each is a
+`RESULT` struct with the best cards padded with `EMPTY`.
+"""
+import asyncio
+import json
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from poker_game import codec
+from poker_game import hands
+
+# Most deals in one batch.
+MAX_HANDS = 100000
+
+# Deals evaluated by one task of a worker.
+CHUNK_SIZE = 2000
+
+# Chunks handed to the workers ahead of the one being sent, per worker.
+CHUNKS_AHEAD = 2
+
+# The binary deal, two hole cards then up to five board cards.
+RECORD_SIZE = 7
+EMPTY = 0xff
+
+BOARD_SIZES = (0, 3, 4, 5)
+
+# The binary result, the strength, the category and the best five cards.
+RESULT = struct.Struct('<IB5B')
+
+NDJSON = 'application/x-ndjson'
+BINARY = 'application/octet-stream'
+
+
+def _card_id(card):
+    """
+    Reads a card given as a string or an id.
+
+    Raises:
+        ValueError: The card is neither.
+    """
+    if isinstance(card, str):
+        try:
+            return codec.to_id(card)
+        except KeyError:
+            raise ValueError("Bad card {!r}.".format(card))
+    # JSON true and false load as bools, which are ints.
+    if (isinstance(card, int) and not isinstance(card, bool) and
+            0 <= card < codec.NUM_CARDS):
+        return card
+    raise ValueError("Bad card {!r}.".format(card))
+
+
+def check_deal(hole, board):
+    """
+    Checks the cards of one deal.
+
+    Raises:
+        ValueError: The deal has the wrong number of cards or a card twice.
+    """
+    if len(hole) != 2 or len(board) not in BOARD_SIZES:
+        raise ValueError("A deal is two hole cards and 0, 3, 4 or 5 board "
+                         "cards.")
+    if len(set(hole) | set(board)) != len(hole) + len(board):
+        raise ValueError("A deal holds a card twice.")
+
+
+def _check_size(num_deals):
+    if num_deals > MAX_HANDS:
+        raise ValueError("A batch holds at most {} deals.".format(MAX_HANDS))
+
+
+def parse_json(data):
+    """
+    Reads a batch from decoded JSON.
+
+    Args:
+        data(list): The deals, each `[hole, board]`.
+
+    Returns:
+        list(tuple(tuple(int), tuple(int))): The hole and board ids of every
+            deal.
+
+    Raises:
+        ValueError: The batch is malformed or too large.
+    """
+    if not isinstance(data, list):
+        raise ValueError("A batch is a list of deals.")
+    _check_size(len(data))
+
+    deals = []
+    for deal in data:
+        if not isinstance(deal, list) or len(deal) != 2 or not all(
+                isinstance(cards, list) for cards in deal):
+            raise ValueError("A deal is [hole, board].")
+        hole = tuple(_card_id(card) for card in deal[0])
+        board = tuple(_card_id(card) for card in deal[1])
+        check_deal(hole, board)
+        deals.append((hole, board))
+    return deals
+
+
+def parse_binary(body):
+    """
+    Reads a batch of binary deals.
+
+    Args:
+        body(bytes): `RECORD_SIZE` bytes per deal.
+
+    Returns:
+        list(tuple(tuple(int), tuple(int))): The hole and board ids of every
+            deal.
+
+    Raises:
+        ValueError: The batch is malformed or too large.
+    """
+    if len(body) % RECORD_SIZE:
+        raise ValueError(
+            "A binary batch is {} bytes per deal.".format(RECORD_SIZE))
+    _check_size(len(body) // RECORD_SIZE)
+
+    deals = []
+    for start in range(0, len(body), RECORD_SIZE):
+        record = body[start:start + RECORD_SIZE]
+        hole = tuple(record[:2])
+        board = tuple(card for card in record[2:] if card != EMPTY)
+        if EMPTY in hole or max(hole + board) >= codec.NUM_CARDS:
+            raise ValueError("Bad card in deal {}.".format(
+                start // RECORD_SIZE))
+        check_deal(hole, board)
+        deals.append((hole, board))
+    return deals
+
+
+def evaluate_chunk(deals):
+    """
+    Evaluates deals one after another.
+
+    Args:
+        deals(list(tuple(tuple(int), tuple(int)))): The hole and board ids of
+            every deal.
+
+    Returns:
+        list(tuple(int, int, list(int))): The strength, category and best
+            card ids of every deal.
+    """
+    results = []
+    best_hand_ids = hands.best_hand_ids
+    for hole, board in deals:
+        strength, cards = best_hand_ids(hole, board)
+        results.append((strength, hands.get_category(strength), cards))
+    return results
+
+
+def encode_ndjson(results):
+    """
+    Encodes results as one JSON object per line.
+    """
+    return ''.join(
+        '{{"rank":{},"category":"{}","best":{}}}\n'.format(
+            strength, hands.CATEGORY_NAMES[category],
+            json.dumps(best, separators=(',', ':')))
+        for strength, category, best in results).encode('utf-8')
+
+
+def encode_binary(results):
+    """
+    Encodes results as `RESULT` structs.
+    """
+    padding = [EMPTY] * 5
+    return b''.join(
+        RESULT.pack(strength, category, *(best + padding)[:5])
+        for strength, category, best in results)
+
+
+ENCODERS = {
+    NDJSON: encode_ndjson,
+    BINARY: encode_binary,
+}
+
+
+class BatchEvaluator(object):
+    """
+    Evaluates batches on a pool of worker processes shared by every request.
+
+    Args:
+        processes(int | None): Number of worker processes, all cores when
+            `None` and no pool when 1.
+        chunk_size(int): Deals evaluated by one task.
+    """
+
+    def __init__(self, processes=None, chunk_size=CHUNK_SIZE):
+        if processes is None:
+            processes = os.cpu_count() or 1
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.executor = None
+
+    async def evaluate(self, deals):
+        """
+        Evaluates a batch chunk by chunk, in order. Only a few chunks are
+        handed to the workers ahead of the one being consumed, so the results
+        of a large batch are never all held at once.
+
+        Args:
+            deals(list(tuple(tuple(int), tuple(int)))): The deals.
+
+        Returns:
+            async_generator(list(tuple(int, int, list(int)))): The results of
+                every chunk.
+        """
+        chunks = [deals[start:start + self.chunk_size]
+                  for start in range(0, len(deals), self.chunk_size)]
+        if self.processes <= 1:
+            for chunk in chunks:
+                yield evaluate_chunk(chunk)
+                # Let other requests run between chunks.
+                await asyncio.sleep(0)
+            return
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.processes)
+        loop = asyncio.get_event_loop()
+        ahead = self.processes * CHUNKS_AHEAD
+        pending = []
+        try:
+            for chunk in chunks:
+                pending.append(loop.run_in_executor(
+                    self.executor, evaluate_chunk, chunk))
+                if len(pending) >= ahead:
+                    yield await pending.pop(0)
+            while pending:
+                yield await pending.pop(0)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,134 @@
+"""
+Codec
+=====
+Lookup tables to convert a card between its forms.
+
+id:      0 to 51, as used by `poker.PokerEngine`. value = id % 13 with the
+         Ace as 0 and the King as 12, suit = id // 13 with Diamonds 0,
+         Clubs 1, Hearts 2 and Spades 3.
+string:  value then suit, e.g. 'As' or 'Td', as used by `hands` and by the
+         card images of the front end ('As.jpg').
+rank:    0 to 12 with the 2 as 0 and the Ace as 12.
+ordinal: 2 to 14, the rank plus 2.
+mask:    one bit of a packed set of cards. Each suit has 16 bits in suit
+         order and inside a suit the bit index is the rank.
+
+Every conversion is an index into a table built when the module is loaded.
+"""
+NUM_CARDS = 52
+NUM_RANKS = 13
+NUM_SUITS = 4
+
+SUIT_SHIFT = 16
+RANK_MASK = (1 << NUM_RANKS) - 1
+
+VALUE_CHARS = 'A23456789TJQK'
+SUIT_CHARS = 'dchs'
+
+# Ordinal of every value character, e.g. 'T' -> 10.
+VALUE_ORDINALS = dict(
+    (char, (value - 1) % NUM_RANKS + 2)
+    for value, char in enumerate(VALUE_CHARS)
+)
+
+# Suit of every suit character, upper or lower case, e.g. 's' -> 3.
+SUIT_NUMBERS = dict(
+    [(char, suit) for suit, char in enumerate(SUIT_CHARS)] +
+    [(char, suit) for suit, char in enumerate(SUIT_CHARS.upper())]
+)
+
+# String of every card id, e.g. 39 -> 'As'.
+ID_STRINGS = [
+    VALUE_CHARS[card_id % NUM_RANKS] + SUIT_CHARS[card_id // NUM_RANKS]
+    for card_id in range(NUM_CARDS)
+]
+
+# Id of every card string, with the suit in upper or lower case.
+STRING_IDS = dict(
+    [(string, card_id) for card_id, string in enumerate(ID_STRINGS)] +
+    [(string[0] + string[1].upper(), card_id)
+     for card_id, string in enumerate(ID_STRINGS)]
+)
+
+# Rank of every card id, e.g. 39 -> 12.
+ID_RANKS = [
+    (card_id % NUM_RANKS - 1) % NUM_RANKS for card_id in range(NUM_CARDS)]
+
+# Ordinal of every card id, e.g. 39 -> 14.
+ID_ORDINALS = [rank + 2 for rank in ID_RANKS]
+
+# Suit of every card id, e.g. 39 -> 3.
+ID_SUITS = [card_id // NUM_RANKS for card_id in range(NUM_CARDS)]
+
+# Rank bit of every card id, the same in every suit.
+ID_RANK_BITS = [1 << rank for rank in ID_RANKS]
+
+# Packed bit of every card id.
+CARD_MASKS = [
+    1 << (SUIT_SHIFT * suit + rank) for suit, rank in zip(ID_SUITS, ID_RANKS)]
+
+# Id of every packed bit index.
+BIT_IDS = dict(
+    (mask.bit_length() - 1, card_id)
+    for card_id, mask in enumerate(CARD_MASKS)
+)
+
+
+def to_id(card):
+    """
+    Converts a card string to its id.
+
+    Args:
+        card(str): A two character string with value then suit.
+
+    Returns:
+        int: The id of the card.
+    """
+    return STRING_IDS[card]
+
+
+def to_string(card_id):
+    """
+    Converts a card id to its string.
+
+    Args:
+        card_id(int): The id of the card.
+
+    Returns:
+        str: A two character string with value then suit.
+    """
+    return ID_STRINGS[card_id]
+
+
+def pack(card_ids):
+    """
+    Packs card ids into one integer with a bit per card.
+
+    Args:
+        card_ids(iterable(int)): The ids of the cards.
+
+    Returns:
+        int: The packed cards.
+    """
+    cards = 0
+    for card_id in card_ids:
+        cards |= CARD_MASKS[card_id]
+    return cards
+
+
+def unpack(cards):
+    """
+    Lists the ids of packed cards.
+
+    Args:
+        cards(int): The packed cards.
+
+    Returns:
+        list(int): The ids of the cards, from the lowest bit up.
+    """
+    card_ids = []
+    while cards:
+        bit = cards & -cards
+        card_ids.append(BIT_IDS[bit.bit_length() - 1])
+        cards ^= bit
+    return card_ids
@@ -0,0 +1,376 @@
+"""
+Equity
+======
+Estimates how often each hand wins by dealing random completions of the
+board from the rest of the 52 card deck used by `poker.PokerEngine`, or
+computes it exactly by walking every completion.
+
+The random completions are split into fixed size chunks and every chunk
+draws from its own generator seeded with the seed of the run and the index of
+the chunk. The answer for a seed is the same however many processes share the
+work.
+"""
+import os
+import math
+import multiprocessing
+from itertools import combinations
+
+from poker_game import codec
+from poker_game import hands
+from poker_game import streams
+from poker_game.poker import Deck, PokerEngine
+
+BOARD_SIZE = 5
+
+# Completions dealt by one task of the pool.
+CHUNK_SIZE = 2000
+
+# Width of the confidence interval in standard errors, about 95%.
+CONFIDENCE_Z = 1.96
+
+
+class PlayerEquity(object):
+    """
+    The equity of one hand.
+
+    Args:
+        hole_cards(tuple(int)): The ids of the two cards of the player.
+        wins(float): Weight of the boards won outright.
+        ties(float): Weight of the boards split with others.
+        equity(float): Weight of the pot won, splits are shared evenly.
+        equity_squares(float): Sum of the squared share of the pot won on
+            every board, used for the standard error.
+        trials(float): Weight of all the boards.
+        exact(bool): Whether every board was counted, leaving no error.
+    """
+
+    def __init__(self, hole_cards, wins, ties, equity, equity_squares,
+                 trials, exact=False):
+        self.hole_cards = hole_cards
+        self.win = wins / trials
+        self.tie = ties / trials
+        self.equity = equity / trials
+
+        if exact:
+            self.stderr = 0.0
+        else:
+            variance = max(equity_squares / trials - self.equity ** 2, 0.0)
+            self.stderr = math.sqrt(variance / trials)
+        self.interval = (
+            max(self.equity - CONFIDENCE_Z * self.stderr, 0.0),
+            min(self.equity + CONFIDENCE_Z * self.stderr, 1.0)
+        )
+
+    def __str__(self):
+        player_str = (
+            "Hand: {hand}\n"
+            "\tWin: {player.win:.4f}\n"
+            "\tTie: {player.tie:.4f}\n"
+            "\tEquity: {player.equity:.4f} "
+            "[{player.interval[0]:.4f}, {player.interval[1]:.4f}]\n"
+        ).format(
+            hand=' '.join(codec.ID_STRINGS[card] for card in self.hole_cards),
+            player=self)
+        return player_str
+
+
+class EquityResult(object):
+    """
+    The equity of every hand in a spot.
+
+    Args:
+        players(list(PlayerEquity)): The equity of each hand, in the order
+            given.
+        trials(int): The number of boards dealt.
+        seed(int | None): The seed that reproduces the result, `None` when
+            exact.
+        exact(bool): Whether every board was counted.
+    """
+
+    def __init__(self, players, trials, seed, exact=False):
+        self.players = players
+        self.trials = trials
+        self.seed = seed
+        self.exact = exact
+
+    def __str__(self):
+        if self.exact:
+            result_str = "Boards: {} (exact)\n".format(self.trials)
+        else:
+            result_str = "Trials: {}\nSeed: {}\n".format(
+                self.trials, self.seed)
+        return result_str + ''.join(str(player) for player in self.players)
+
+
+def check_cards(hole_cards, board, dead):
+    """
+    Checks that a spot is valid and returns the cards left in the deck.
+
+    Args:
+        hole_cards(list(list(int))): The ids of the two cards of each player.
+        board(list(int)): The ids of the 0 to 5 cards shared in the community.
+        dead(list(int)): The ids of cards out of the deck.
+
+    Returns:
+        list(int): The ids of the cards that can still be dealt.
+
+    Raises:
+        ValueError: The spot is not valid.
+    """
+    if len(hole_cards) < 2:
+        raise ValueError("Equity needs at least two hands.")
+    if len(board) > BOARD_SIZE:
+        raise ValueError("A board holds at most five cards.")
+
+    known = list(board) + list(dead)
+    for hole in hole_cards:
+        if len(hole) != 2:
+            raise ValueError("Every hand holds two cards, not {}.".format(
+                list(hole)))
+        known.extend(hole)
+
+    for card in known:
+        if not 0 <= card < PokerEngine.NUM_CARDS:
+            raise ValueError("Card id {} is not in the deck.".format(card))
+    if len(set(known)) != len(known):
+        raise ValueError("A card is dealt more than once.")
+
+    remaining = [
+        card for card in range(PokerEngine.NUM_CARDS) if card not in known]
+    if BOARD_SIZE - len(board) > len(remaining):
+        raise ValueError("Not enough cards left to complete the board.")
+    return remaining
+
+
+def _split_pot(strengths):
+    """
+    Returns the indexes of the hands that win the pot.
+    """
+    best = max(strengths)
+    return [idx for idx, strength in enumerate(strengths) if strength == best]
+
+
+def _add_board(totals, strengths, weight):
+    """
+    Adds the outcome of one board, counted weight times, to the totals.
+    """
+    winners = _split_pot(strengths)
+    share = 1.0 / len(winners)
+    for idx in winners:
+        total = totals[idx]
+        if len(winners) == 1:
+            total[0] += weight
+        else:
+            total[1] += weight
+        total[2] += share * weight
+        total[3] += share * share * weight
+
+
+def _simulate_chunk(task):
+    """
+    Deals one chunk of random board completions.
+
+    Args:
+        task(tuple): The ids of the hands, the board and the remaining cards,
+            the number of boards to deal, the seed of the run and the index
+            of the chunk.
+
+    Returns:
+        list(list(float)): The wins, ties, equity and squared equity of each
+            player.
+    """
+    hole_cards, board, remaining, trials, seed, index = task
+
+    # Every chunk gets its own stream so chunks can run anywhere.
+    rng = streams.RandomStream(seed, (index,))
+    needed = BOARD_SIZE - len(board)
+
+    # Pack the known cards of each player once.
+    packed = [hands.pack_cards(hole, board) for hole in hole_cards]
+    totals = [[0.0, 0.0, 0.0, 0.0] for _ in hole_cards]
+    card_masks = codec.CARD_MASKS
+
+    deck = Deck(rng, remaining)
+    for _ in range(trials):
+        drawn = 0
+        for card in deck.shuffle(needed)[:needed]:
+            drawn |= card_masks[card]
+
+        strengths = [hands.evaluate_packed(cards | drawn) for cards in packed]
+        _add_board(totals, strengths, 1.0)
+
+    return totals
+
+
+def _max_stderr(totals, trials):
+    """
+    Returns the largest standard error of the equity of any player.
+    """
+    largest = 0.0
+    for total in totals:
+        mean = total[2] / trials
+        variance = max(total[3] / trials - mean * mean, 0.0)
+        largest = max(largest, math.sqrt(variance / trials))
+    return largest
+
+
+def monte_carlo(hole_cards, board=(), dead=(), iterations=100000, seed=None,
+                processes=None, target_stderr=None):
+    """
+    Estimates the equity of each hand by dealing random board completions.
+
+    Args:
+        hole_cards(list(list(int))): The ids of the two cards of each player.
+        board(list(int)): The ids of the 0 to 5 cards shared in the community.
+        dead(list(int)): The ids of cards out of the deck.
+        iterations(int): The most boards to deal.
+        seed(int | None): Seed of the run, a random one is picked and
+            reported when `None`.
+        processes(int | None): Number of worker processes, all cores when
+            `None` and no pool when 1.
+        target_stderr(float | None): Stop once the standard error of every
+            equity is at most this.
+
+    Returns:
+        EquityResult: The equity of every hand.
+    """
+    hole_cards = [tuple(hole) for hole in hole_cards]
+    board = list(board)
+    remaining = check_cards(hole_cards, board, dead)
+    if iterations < 1:
+        raise ValueError("Equity needs at least one iteration.")
+
+    if seed is None:
+        seed = streams.new_entropy()
+
+    # Fixed chunks keep the result independent of the number of processes.
+    tasks = []
+    for index, start in enumerate(range(0, iterations, CHUNK_SIZE)):
+        trials = min(CHUNK_SIZE, iterations - start)
+        tasks.append((hole_cards, board, remaining, trials, seed, index))
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+
+    pool = None
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        chunks = pool.imap(_simulate_chunk, tasks)
+    else:
+        chunks = (_simulate_chunk(task) for task in tasks)
+
+    totals = [[0.0, 0.0, 0.0, 0.0] for _ in hole_cards]
+    trials = 0
+    try:
+        # Chunks arrive in order, so stopping early is reproducible too.
+        for task, chunk in zip(tasks, chunks):
+            trials += task[3]
+            for total, chunk_total in zip(totals, chunk):
+                for idx, value in enumerate(chunk_total):
+                    total[idx] += value
+
+            if (target_stderr is not None and
+                    _max_stderr(totals, trials) <= target_stderr):
+                break
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    players = [
+        PlayerEquity(hole, total[0], total[1], total[2], total[3], trials)
+        for hole, total in zip(hole_cards, totals)
+    ]
+    return EquityResult(players, trials, seed)
+
+
+def _suit_classes(remaining, needed, free_suits):
+    """
+    Groups every completion of the board into classes that only differ by a
+    swap of suits no known card holds.
+
+    Args:
+        remaining(list(int)): The ids of the cards that can still be dealt.
+        needed(int): The number of cards to deal.
+        free_suits(list(int)): The suits that no known card holds.
+
+    Returns:
+        list(tuple(int, int)): A packed completion of each class and the
+            number of completions in the class.
+    """
+    card_masks = [codec.CARD_MASKS[card] for card in remaining]
+
+    # With fewer than two free suits there is nothing to swap.
+    if len(free_suits) < 2:
+        return [(sum(combo), 1) for combo in combinations(card_masks, needed)]
+
+    shifts = [codec.SUIT_SHIFT * suit for suit in free_suits]
+    free_mask = 0
+    for shift in shifts:
+        free_mask |= codec.RANK_MASK << shift
+
+    classes = {}
+    for combo in combinations(card_masks, needed):
+        # Every card is a distinct bit, so the sum is the packed cards.
+        drawn = sum(combo)
+
+        # Swapping free suits only reorders their rank masks.
+        key = (drawn & ~free_mask, tuple(sorted(
+            drawn >> shift & codec.RANK_MASK for shift in shifts)))
+
+        if key in classes:
+            classes[key][1] += 1
+        else:
+            classes[key] = [drawn, 1]
+
+    return [(drawn, count) for drawn, count in classes.values()]
+
+
+def exact(hole_cards, board=(), dead=(), reduce_suits=True):
+    """
+    Computes the equity of each hand by walking every completion of the
+        board.
+
+    Note:
+        Completions that only differ by a swap of suits no known card holds
+        are evaluated once and counted with the size of their class.
+
+    Args:
+        hole_cards(list(list(int))): The ids of the two cards of each player.
+        board(list(int)): The ids of the 0 to 5 cards shared in the community.
+        dead(list(int)): The ids of cards out of the deck.
+        reduce_suits(bool): Whether to collapse suit isomorphic completions.
+
+    Returns:
+        EquityResult: The exact equity of every hand.
+    """
+    hole_cards = [tuple(hole) for hole in hole_cards]
+    board = list(board)
+    remaining = check_cards(hole_cards, board, dead)
+    needed = BOARD_SIZE - len(board)
+
+    free_suits = []
+    if reduce_suits:
+        known = set(codec.ID_SUITS[card] for card in board)
+        known.update(codec.ID_SUITS[card] for card in dead)
+        for hole in hole_cards:
+            known.update(codec.ID_SUITS[card] for card in hole)
+        free_suits = [suit for suit in range(4) if suit not in known]
+
+    # Pack the known cards of each player once.
+    packed = [hands.pack_cards(hole, board) for hole in hole_cards]
+    totals = [[0.0, 0.0, 0.0, 0.0] for _ in hole_cards]
+    boards = 0
+
+    for drawn, count in _suit_classes(remaining, needed, free_suits):
+        strengths = [hands.evaluate_packed(cards | drawn) for cards in packed]
+        _add_board(totals, strengths, count)
+        boards += count
+
+    players = [
+        PlayerEquity(
+            hole, total[0], total[1], total[2], total[3], boards, exact=True)
+        for hole, total in zip(hole_cards, totals)
+    ]
+    return EquityResult(players, boards, None, exact=True)
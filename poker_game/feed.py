@@ -0,0 +1,222 @@
+"""
+Feed
+====
+Pushes the events of a table to everyone watching it as small deltas.
+
+Every public message is a JSON array starting with its sequence number and
+a one letter type, with cards as ids and seats numbered at the table:
+
+[seq, 'S', state]                  Snapshot of the table, see `Table.state`.
+[seq, 'j', seat, name, stack, bot] A player sits down.
+[seq, 'l', seat]                   A player leaves.
+[seq, 'd', hand, button]           A hand is dealt.
+[seq, 'b', seat, bet, stack]       A blind is posted.
+[seq, 's', street, cards]          A street starts, with only the new cards.
+[seq, 'w', seat, to_call]          A seat is asked to act.
+[seq, 'a', seat, action, bet, stack]
+                                   A seat acts, the action as an index of
+                                   `simulator.ACTIONS`.
+[seq, 'r', winnings, shown]        The hand ends, the chips won or lost by
+                                   each seat and the cards shown down.
+
+A seated player is also sent their own cards as `[seq, 'h', cards]`, with
+the sequence number of the deal, and `[seq, 'e', reason]` when an action
+they sent is refused. Neither is kept for replay.
+
+Recent messages are kept so a client that reconnects with the last sequence
+number it saw gets only what it missed. A client too far behind, or too slow
+to keep its queue from filling, gets a fresh snapshot instead, so a slow
+watcher never holds up the table or anyone else.
+"""
+import asyncio
+import json
+from collections import deque
+
+from poker_game import simulator
+from poker_game import tables
+
+# Messages kept for clients that reconnect.
+HISTORY_SIZE = 512
+
+# Messages queued for one client before it is sent a snapshot instead.
+QUEUE_SIZE = 256
+
+ACTION_CODES = dict(
+    (action, code) for code, action in enumerate(simulator.ACTIONS))
+
+
+def encode(message):
+    """
+    Encodes a message as compact JSON.
+    """
+    return json.dumps(message, separators=(',', ':'))
+
+
+class Subscriber(object):
+    """
+    One client of a feed.
+
+    Args:
+        feed(TableFeed): The feed.
+        seat(int | None): The seat of the client, when it plays.
+        queue_size(int): Messages queued before the client lags.
+    """
+
+    def __init__(self, feed, seat=None, queue_size=QUEUE_SIZE):
+        self.feed = feed
+        self.seat = seat
+        self.queue = asyncio.Queue(queue_size)
+        self.lagged = False
+
+    def push(self, message):
+        """
+        Queues a message, or marks the client as lagging when it is full.
+        """
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def next(self):
+        """
+        Waits for the next message to send.
+
+        Returns:
+            list: The message, a snapshot when the client fell behind.
+        """
+        if self.lagged:
+            # Everything queued is older than the snapshot.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.lagged = False
+            return self.feed.snapshot(self.seat)
+        return await self.queue.get()
+
+
+class TableFeed(object):
+    """
+    The messages of one table and the clients watching it.
+
+    Args:
+        table(tables.Table): The table.
+        history_size(int): Messages kept for clients that reconnect.
+    """
+
+    def __init__(self, table, history_size=HISTORY_SIZE):
+        self.table = table
+        self.seq = 0
+        self.history = deque(maxlen=history_size)
+        self.subscribers = set()
+        self.board_size = 0
+        table.listeners.append(self.on_event)
+
+    def publish(self, *payload):
+        """
+        Numbers a message, keeps it and pushes it to every client.
+        """
+        self.seq += 1
+        message = [self.seq] + list(payload)
+        self.history.append(message)
+        for subscriber in self.subscribers:
+            subscriber.push(message)
+
+    def snapshot(self, seat=None):
+        """
+        Returns a snapshot message, with the cards of a seated player.
+        """
+        state = self.table.state()
+        if seat is not None:
+            state['hole'] = self.hole_cards(seat)
+        return [self.seq, 'S', state]
+
+    def hole_cards(self, seat):
+        """
+        Returns the card ids of a seat in the hand being played, or `None`.
+        """
+        taken = self.table.seats[seat]
+        if (taken is None or seat not in self.table.hand_seats or
+                taken.player.hand is None):
+            return None
+        hand = taken.player.hand
+        return [hand.card_1.id, hand.card_2.id]
+
+    def subscribe(self, last_seq=None, seat=None):
+        """
+        Adds a client, resuming after the last message it saw when those
+        messages are still kept. A seated client starts from a snapshot,
+        which holds their cards.
+
+        Args:
+            last_seq(int | None): The last sequence number the client saw.
+            seat(int | None): The seat of the client, when it plays.
+
+        Returns:
+            Subscriber: The client, with its first messages queued.
+        """
+        subscriber = Subscriber(self, seat)
+        first_kept = self.history[0][0] if self.history else self.seq + 1
+        if (last_seq is not None and seat is None and
+                first_kept <= last_seq + 1 and last_seq <= self.seq):
+            for message in self.history:
+                if message[0] > last_seq:
+                    subscriber.push(message)
+        else:
+            subscriber.push(self.snapshot(seat))
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def on_event(self, table, event):
+        """
+        Turns a table event into a message.
+        """
+        kind = event[0]
+        seats = table.hand_seats
+
+        if kind == tables.JOIN:
+            seat = event[1]
+            taken = table.seats[seat]
+            self.publish('j', seat, taken.player.name, taken.player.value,
+                         taken.is_bot())
+        elif kind == tables.LEAVE:
+            self.publish('l', event[1])
+        elif kind == simulator.DEAL:
+            self.board_size = 0
+            self.publish('d', event[1], table.button)
+            for subscriber in self.subscribers:
+                if subscriber.seat in seats:
+                    subscriber.push(
+                        [self.seq, 'h', self.hole_cards(subscriber.seat)])
+        elif kind == simulator.BLIND:
+            player = table.seats[seats[event[1]]].player
+            self.publish('b', seats[event[1]], event[2], player.value)
+        elif kind == simulator.STREET:
+            board = event[2]
+            self.publish('s', event[1], board[self.board_size:])
+            self.board_size = len(board)
+        elif kind == simulator.DECISION:
+            decision = event[1]
+            self.publish('w', seats[decision.seat], decision.to_call)
+        elif kind == simulator.ACTION:
+            seat = seats[event[1]]
+            taken = table.seats[seat]
+            stack = taken.player.value if taken is not None else 0
+            self.publish('a', seat, ACTION_CODES[event[2]], event[3], stack)
+        elif kind == simulator.RESULT:
+            result = event[1]
+            shown = {}
+            if result.showdown:
+                folded = set(action[1] for action in result.actions
+                             if action[2] == simulator.FOLD)
+                shown = dict(
+                    (str(seats[seat]), list(cards))
+                    for seat, cards in enumerate(result.hole_cards)
+                    if seat not in folded)
+            winnings = dict(
+                (str(seats[seat]), chips)
+                for seat, chips in enumerate(result.winnings) if chips)
+            self.publish('r', winnings, shown)
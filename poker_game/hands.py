@@ -5,6 +5,12 @@ Hands
 Contains functions that given a set of hands and the community cards,
 determines which five card hands the each player has.
 """
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from poker_game import codec
 
 """
 Cards represented as one character for value and second character as suit.
@@ -109,22 +115,7 @@ def get_ordinal(card):
     Returns:
         int: The ordinal value of the card.
     """
-    # Get first char that represents value.
-    value_str = to_value(card)
-
-    # For all cards that do not have an int.
-    str_to_int = {
-        'T': 10,
-        'J': 11,
-        'Q': 12,
-        'K': 13,
-        'A': 14
-    }
-
-    if value_str not in str_to_int:
-        return int(value_str)
-    else:
-        return str_to_int[value_str]
+    return codec.VALUE_ORDINALS[to_value(card)]
 
 
 def get_suit(card):
@@ -141,59 +132,583 @@ def get_suit(card):
         Returns:
             int: The suit of the card in numerical form.
         """
-    value_suit = to_suit(card)
-    suit_to_int = {
-        'd': 0,
-        'c': 1,
-        'h': 2,
-        's': 3
-    }
+    return codec.SUIT_NUMBERS[card[1]]
+
+
+"""
+Cards can also be given as the integer ids used by `poker.PokerEngine`, see
+`codec` for how ids, strings and packed cards relate.
+"""
+NUM_RANKS = codec.NUM_RANKS
+SUIT_SHIFT = codec.SUIT_SHIFT
+RANK_MASK = codec.RANK_MASK
+CARD_MASKS = codec.CARD_MASKS
+ID_STRINGS = codec.ID_STRINGS
+
+# Hand categories from worst to best.
+HIGH_CARD = 0
+ONE_PAIR = 1
+TWO_PAIR = 2
+THREE_OF_A_KIND = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+FOUR_OF_A_KIND = 7
+STRAIGHT_FLUSH = 8
+
+CATEGORY_NAMES = [
+    "High Card",
+    "One Pair",
+    "Two Pair",
+    "Three of a Kind",
+    "Straight",
+    "Flush",
+    "Full House",
+    "Four of a Kind",
+    "Straight Flush"
+]
+
+"""
+A hand strength is one integer, higher is better. The category sits above
+five 4 bit tiebreakers holding card ordinals, most significant first, with 0
+meaning no card.
+"""
+CATEGORY_SHIFT = 20
+
+
+def _build_straight_highs():
+    """
+    Builds the ordinal of the highest straight for every 13 bit rank mask.
+
+    Returns:
+        list(int): The high ordinal of the best straight or 0 for no straight.
+    """
+    windows = []
+
+    # Windows from the Ace high straight down to the Six high straight.
+    for high in range(NUM_RANKS - 1, 3, -1):
+        windows.append((0b11111 << (high - 4), high + 2))
+
+    # The wheel uses the Ace as a one.
+    windows.append((0b1000000001111, 5))
+
+    highs = []
+    for mask in range(1 << NUM_RANKS):
+        high_ordinal = 0
+        for window, ordinal in windows:
+            if mask & window == window:
+                high_ordinal = ordinal
+                break
+        highs.append(high_ordinal)
+
+    return highs
+
+
+def _build_top_fives():
+    """
+    Builds the packed tiebreakers of the five highest ranks of every 13 bit
+    rank mask.
+
+    Returns:
+        list(int): The ordinals of the top five ranks, 4 bits each, highest
+            first.
+    """
+    top_fives = []
+    for mask in range(1 << NUM_RANKS):
+        packed = 0
+        count = 0
+        for rank in range(NUM_RANKS - 1, -1, -1):
+            if mask >> rank & 1:
+                packed |= (rank + 2) << (4 * (4 - count))
+                count += 1
+                if count == 5:
+                    break
+        top_fives.append(packed)
+
+    return top_fives
+
+
+STRAIGHT_HIGHS = _build_straight_highs()
+TOP_FIVES = _build_top_fives()
+POPCOUNTS = [bin(mask).count('1') for mask in range(1 << NUM_RANKS)]
+
+
+def to_id(card):
+    """
+    Converts a card string to the integer id used by `poker.PokerEngine`.
+
+    Args:
+        card(str): A two character string with value then suit.
+
+    Returns:
+        int: The id of the card.
+    """
+    return codec.STRING_IDS[card]
+
+
+def pack_cards(hole_cards, community):
+    """
+    Packs card ids into one integer with a bit per card. Neither argument is
+        modified, so tuples work as well as lists.
+
+    Note:
+        Packed cards combine with `|`, so a board can be packed once and
+        combined with each player, e.g.
+        `evaluate_packed(board | pack_cards(hole_cards, ()))`.
+
+    Args:
+        hole_cards(iterable(int)): The card ids of the player.
+        community(iterable(int)): The card ids shared in the community.
+
+    Returns:
+        int: The packed cards.
+    """
+    cards = 0
+    for card in hole_cards:
+        cards |= CARD_MASKS[card]
+    for card in community:
+        cards |= CARD_MASKS[card]
+    return cards
+
+
+def _split(cards):
+    """
+    Splits packed cards into the rank masks of each suit and the rank masks of
+        ranks seen at least one, two, three and four times.
+
+    Args:
+        cards(int): The packed cards.
+
+    Returns:
+        tuple(list(int), int, int, int, int): The suit masks in suit order
+            followed by the masks of ranks seen at least once, twice, three
+            times and four times.
+    """
+    diamonds = cards & RANK_MASK
+    clubs = cards >> SUIT_SHIFT & RANK_MASK
+    hearts = cards >> (2 * SUIT_SHIFT) & RANK_MASK
+    spades = cards >> (3 * SUIT_SHIFT) & RANK_MASK
+
+    # Ranks held in either suit of each half of the deck.
+    low = diamonds | clubs
+    high = hearts | spades
+    low_both = diamonds & clubs
+    high_both = hearts & spades
+
+    seen_1 = low | high
+    seen_2 = low_both | high_both | (low & high)
+    seen_3 = (low_both & high) | (high_both & low)
+    seen_4 = low_both & high_both
+
+    return [diamonds, clubs, hearts, spades], seen_1, seen_2, seen_3, seen_4
+
+
+def _top_bit(mask):
+    """
+    Returns the bit of the highest rank in a rank mask.
+    """
+    return 1 << (mask.bit_length() - 1)
+
+
+def evaluate_packed(cards):
+    """
+    Computes the strength of the best hand in the packed cards. This is the
+        core of `evaluate` and allocates nothing.
+
+    Args:
+        cards(int): Up to seven cards packed by `pack_cards`.
+
+    Returns:
+        int: The hand strength, higher is better.
+    """
+    diamonds = cards & RANK_MASK
+    clubs = cards >> SUIT_SHIFT & RANK_MASK
+    hearts = cards >> (2 * SUIT_SHIFT) & RANK_MASK
+    spades = cards >> (3 * SUIT_SHIFT) & RANK_MASK
+
+    # With at most seven cards only one suit can hold a flush, and a flush
+    # rules out both a full-house and a four-of-a-kind.
+    flush = 0
+    if POPCOUNTS[diamonds] >= 5:
+        flush = diamonds
+    elif POPCOUNTS[clubs] >= 5:
+        flush = clubs
+    elif POPCOUNTS[hearts] >= 5:
+        flush = hearts
+    elif POPCOUNTS[spades] >= 5:
+        flush = spades
+
+    if flush:
+        high = STRAIGHT_HIGHS[flush]
+        if high:
+            return STRAIGHT_FLUSH << CATEGORY_SHIFT | high << 16
+        return FLUSH << CATEGORY_SHIFT | TOP_FIVES[flush]
+
+    low = diamonds | clubs
+    high = hearts | spades
+    low_both = diamonds & clubs
+    high_both = hearts & spades
+    seen_1 = low | high
+    seen_2 = low_both | high_both | (low & high)
+
+    # Without a pair the only hands left are a straight or a high card.
+    if not seen_2:
+        high = STRAIGHT_HIGHS[seen_1]
+        if high:
+            return STRAIGHT << CATEGORY_SHIFT | high << 16
+        return TOP_FIVES[seen_1]
+
+    seen_3 = (low_both & high) | (high_both & low)
+    if seen_3:
+        seen_4 = low_both & high_both
+        if seen_4:
+            quad = _top_bit(seen_4)
+            return (FOUR_OF_A_KIND << CATEGORY_SHIFT |
+                    (quad.bit_length() + 1) << 16 |
+                    TOP_FIVES[seen_1 ^ quad] >> 16 << 12)
+
+        trips = _top_bit(seen_3)
+        pairs = seen_2 ^ trips
+        if pairs:
+            return (FULL_HOUSE << CATEGORY_SHIFT |
+                    (trips.bit_length() + 1) << 16 |
+                    pairs.bit_length() + 1 << 12)
+
+        high = STRAIGHT_HIGHS[seen_1]
+        if high:
+            return STRAIGHT << CATEGORY_SHIFT | high << 16
+        return (THREE_OF_A_KIND << CATEGORY_SHIFT |
+                (trips.bit_length() + 1) << 16 |
+                TOP_FIVES[seen_1 ^ trips] >> 12 << 8)
+
+    high = STRAIGHT_HIGHS[seen_1]
+    if high:
+        return STRAIGHT << CATEGORY_SHIFT | high << 16
+
+    pair = _top_bit(seen_2)
+    second = seen_2 ^ pair
+    if second:
+        second = _top_bit(second)
+        return (TWO_PAIR << CATEGORY_SHIFT |
+                (pair.bit_length() + 1) << 16 |
+                (second.bit_length() + 1) << 12 |
+                TOP_FIVES[seen_1 ^ pair ^ second] >> 16 << 8)
+
+    return (ONE_PAIR << CATEGORY_SHIFT |
+            (pair.bit_length() + 1) << 16 |
+            TOP_FIVES[seen_1 ^ pair] >> 8 << 4)
+
+
+def evaluate(hole_cards, community):
+    """
+    Computes the strength of the best five card hand in a single pass over
+        the cards.
+
+    Args:
+        hole_cards(iterable(int)): The ids of the two cards of the player.
+        community(iterable(int)): The ids of the 0, 3, 4, or 5 cards shared
+            in the community.
+
+    Returns:
+        int: The hand strength. A stronger hand always has a larger value and
+            equal hands have equal values.
+    """
+    return evaluate_packed(pack_cards(hole_cards, community))
+
+
+def get_category(strength):
+    """
+    Returns the category of a hand strength.
+
+    Args:
+        strength(int): A hand strength from `evaluate`.
+
+    Returns:
+        int: One of the category constants, e.g. `FLUSH`.
+    """
+    return strength >> CATEGORY_SHIFT
+
+
+# Rows evaluated at a time by `evaluate_batch`.
+BATCH_CHUNK = 1 << 14
+
+_BATCH_TABLES = None
+
+
+def _get_batch_tables():
+    """
+    Returns the lookup tables as arrays for `evaluate_batch`, building them on
+        first use.
+
+    Returns:
+        tuple(ndarray): The packed bit of each card id, the popcounts, the
+            straight highs, the top fives, the highest bit and the highest
+            ordinal of every 13 bit rank mask.
+    """
+    global _BATCH_TABLES
+    if _BATCH_TABLES is None:
+        masks = range(1 << NUM_RANKS)
+        _BATCH_TABLES = (
+            np.array(CARD_MASKS, dtype=np.int64),
+            np.array(POPCOUNTS, dtype=np.int64),
+            np.array(STRAIGHT_HIGHS, dtype=np.int64),
+            np.array(TOP_FIVES, dtype=np.int64),
+            np.array([_top_bit(mask) if mask else 0 for mask in masks],
+                     dtype=np.int64),
+            np.array([mask.bit_length() + 1 if mask else 0 for mask in masks],
+                     dtype=np.int64),
+        )
+    return _BATCH_TABLES
+
+
+def _evaluate_chunk(cards):
+    """
+    Computes the strength of every row of card ids from its suit and rank
+        count histograms.
+
+    Args:
+        cards(ndarray): An [N, M] array of card ids.
+
+    Returns:
+        ndarray: The N hand strengths.
+    """
+    card_masks, popcounts, straight_highs, top_fives, top_bits, ordinals = \
+        _get_batch_tables()
+
+    # Every card is a distinct bit, so the sum of a row is its packed cards.
+    packed = card_masks[cards].sum(axis=1)
+    diamonds = packed & RANK_MASK
+    clubs = packed >> SUIT_SHIFT & RANK_MASK
+    hearts = packed >> (2 * SUIT_SHIFT) & RANK_MASK
+    spades = packed >> (3 * SUIT_SHIFT) & RANK_MASK
+
+    # The suit histogram, with at most seven cards only one suit can hold a
+    # flush.
+    flush = np.zeros_like(packed)
+    for suit in (diamonds, clubs, hearts, spades):
+        flush = np.where(popcounts[suit] >= 5, suit, flush)
+    has_flush = flush > 0
+
+    # The rank histogram as masks of ranks seen at least once, twice, three
+    # times and four times.
+    low = diamonds | clubs
+    high = hearts | spades
+    low_both = diamonds & clubs
+    high_both = hearts & spades
+    seen_1 = low | high
+    seen_2 = low_both | high_both | (low & high)
+    seen_3 = (low_both & high) | (high_both & low)
+    seen_4 = low_both & high_both
+
+    straight_flush_high = straight_highs[flush]
+    straight_high = straight_highs[seen_1]
+    quad = top_bits[seen_4]
+    trips = top_bits[seen_3]
+    pairs = seen_2 ^ trips
+    pair = top_bits[seen_2]
+    second = top_bits[seen_2 ^ pair]
+
+    conditions = [
+        straight_flush_high > 0,
+        seen_4 > 0,
+        (seen_3 > 0) & (pairs > 0),
+        has_flush,
+        straight_high > 0,
+        seen_3 > 0,
+        second > 0,
+        seen_2 > 0,
+    ]
+    strengths = [
+        STRAIGHT_FLUSH << CATEGORY_SHIFT | straight_flush_high << 16,
+        (FOUR_OF_A_KIND << CATEGORY_SHIFT | ordinals[seen_4] << 16 |
+         top_fives[seen_1 ^ quad] >> 16 << 12),
+        (FULL_HOUSE << CATEGORY_SHIFT | ordinals[seen_3] << 16 |
+         ordinals[pairs] << 12),
+        FLUSH << CATEGORY_SHIFT | top_fives[flush],
+        STRAIGHT << CATEGORY_SHIFT | straight_high << 16,
+        (THREE_OF_A_KIND << CATEGORY_SHIFT | ordinals[seen_3] << 16 |
+         top_fives[seen_1 ^ trips] >> 12 << 8),
+        (TWO_PAIR << CATEGORY_SHIFT | ordinals[pair] << 16 |
+         ordinals[second] << 12 |
+         top_fives[seen_1 ^ pair ^ second] >> 16 << 8),
+        (ONE_PAIR << CATEGORY_SHIFT | ordinals[pair] << 16 |
+         top_fives[seen_1 ^ pair] >> 8 << 4),
+    ]
+    return np.select(conditions, strengths, default=top_fives[seen_1])
+
+
+def evaluate_batch(hole, board):
+    """
+    Computes the strength of the best five card hand of every deal at once.
+
+    Args:
+        hole(ndarray): An [N, 2] array of the card ids of each player.
+        board(ndarray): An [N, 0], [N, 3], [N, 4] or [N, 5] array of the card
+            ids shared in the community of each deal.
+
+    Returns:
+        ndarray: The N hand strengths, the same values as `evaluate`.
+
+    Raises:
+        RuntimeError: NumPy is not installed.
+    """
+    if np is None:
+        raise RuntimeError("evaluate_batch requires NumPy.")
+
+    cards = np.concatenate(
+        [np.asarray(hole, dtype=np.int64), np.asarray(board, dtype=np.int64)],
+        axis=1)
+    result = np.empty(cards.shape[0], dtype=np.int32)
+
+    # Evaluate in chunks so the temporaries stay small.
+    for start in range(0, cards.shape[0], BATCH_CHUNK):
+        end = start + BATCH_CHUNK
+        result[start:end] = _evaluate_chunk(cards[start:end])
+
+    return result
+
+
+def _combine(hole_cards, community):
+    """
+    Combines the card strings of a player into one list and packs them into
+        one integer with a bit per card. Neither argument is modified.
+
+    Args:
+        hole_cards(iterable(str)): Two strings representing two cards.
+        community(iterable(str)): 0, 3, 4, or 5 strings representing the
+            cards shared in the community.
+
+    Returns:
+        tuple(list(tuple(str, int)), int): Each card with its packed bit, in
+            the order given, and the packed cards.
+    """
+    combined = []
+    cards = 0
+    for card in hole_cards:
+        mask = CARD_MASKS[to_id(card)]
+        combined.append((card, mask))
+        cards |= mask
+    for card in community:
+        mask = CARD_MASKS[to_id(card)]
+        combined.append((card, mask))
+        cards |= mask
+    return combined, cards
+
 
-    return suit_to_int[value_suit]
+# Packed bits of a rank in every suit.
+SUIT_SPREAD = (1 | 1 << SUIT_SHIFT | 1 << (2 * SUIT_SHIFT) |
+               1 << (3 * SUIT_SHIFT))
 
 
-def find_n_kickers(cards, used, n):
+def _take(combined, rank_bits, n, suit=None):
     """
-    Finds the top n kickers that are not already used.
+    Takes up to n cards of each rank in a rank mask, highest rank first. Cards
+        of the same rank are taken in the order they were given.
 
     Args:
-        cards(list(str)): A list of card strings sorted by ordinal value.
-        used(set(str)): A set of strings that have been used.
-        n(int): The number of cards to find.
+        combined(list(tuple(str, int))): The cards with their packed bits.
+        rank_bits(int): A rank mask of the ranks to take.
+        n(int): The number of cards to take from each rank.
+        suit(int | None): Only take cards of this suit.
 
     Returns:
-        list(str): A list with the top n cards that are not used.
+        list(str): The cards taken.
     """
+    taken = []
+    while rank_bits:
+        bit = _top_bit(rank_bits)
+        rank_bits ^= bit
+
+        # The bits of this rank in the suits we may take from.
+        if suit is None:
+            wanted = bit * SUIT_SPREAD
+        else:
+            wanted = bit << (SUIT_SHIFT * suit)
+
+        count = 0
+        for card, mask in combined:
+            if mask & wanted:
+                taken.append(card)
+                count += 1
+                if count == n:
+                    break
+    return taken
+
+
+def _top_n(mask, n):
+    """
+    Returns a rank mask of the n highest ranks in a rank mask.
+    """
+    top = 0
+    while mask and n:
+        bit = _top_bit(mask)
+        top |= bit
+        mask ^= bit
+        n -= 1
+    return top
 
-    kickers = []
 
-    # Start with the highest to lowest cards.
-    for card in cards:
-        # If the card has already been used, skip it.
-        if card in used:
-            continue
+def _straight_bits(mask):
+    """
+    Returns the rank bits of the best straight in a rank mask, highest card
+        first, or `None` if there is no straight.
+    """
+    high = STRAIGHT_HIGHS[mask]
+    if not high:
+        return None
+    # The wheel ends with the Ace.
+    if high == 5:
+        return [1 << 3, 1 << 2, 1 << 1, 1 << 0, 1 << 12]
+    return [1 << (high - 2 - offset) for offset in range(5)]
 
-        # Add the card.
-        kickers.append(card)
 
-        # If we hit the desired amount, stop.
-        if len(kickers) == n:
-            return kickers
+def _flush_suit(suits):
+    """
+    Returns the suit holding five or more cards or `None`.
+    """
+    for suit, mask in enumerate(suits):
+        if POPCOUNTS[mask] >= 5:
+            return suit
+    return None
 
 
 NUM_KICKERS_ONE_PAIR = 3
 NUM_KICKERS_TWO_PAIR = 1
 
 
+def _find_pairs(combined, cards):
+    """
+    Finds the pairs in combined cards, see `find_pairs`.
+    """
+    _, seen_1, seen_2, _, _ = _split(cards)
+
+    # No rank was seen twice.
+    if not seen_2:
+        return None
+
+    pair = _top_bit(seen_2)
+    second = seen_2 ^ pair
+
+    # One pair needs to find three kickers.
+    if not second:
+        kickers = _top_n(seen_1 ^ pair, NUM_KICKERS_ONE_PAIR)
+        return [_take(combined, pair, 2), _take(combined, kickers, 1)]
+
+    # Two pair needs to find one kicker.
+    second = _top_bit(second)
+    kickers = _top_n(seen_1 ^ pair ^ second, NUM_KICKERS_TWO_PAIR)
+    return [
+        _take(combined, pair, 2),
+        _take(combined, second, 2),
+        _take(combined, kickers, 1)
+    ]
+
+
 def find_pairs(hole_cards, community):
     """
     Determines if this hand has any pairs and if so, returns the pair and top
         three kicker or top two pairs and the top kicker.
 
-    Note:
-        When a three-of-a-kind happens, 3 pairs should be found all of the
-        same number. This is not the best way to handle this.
-
     Args:
         hole_cards(list(str)): A list of two strings representing two cards.
         community(list(str)): A list of 0, 3, 4, or 5 strings representing the
@@ -211,70 +726,25 @@ def find_pairs(hole_cards, community):
                 the highest pair, the second is the second highest, and the
                 last list is the highest kicker.
     """
-    # Initialize pairs to None as default return value.
-    pairs = None
-
-    # Combine hole_cards and community because does not matter where they are
-    # from.
-    hole_cards.extend(community)
-    combined = hole_cards
-
-    # Sort the cards from highest to lowest.
-    combined.sort(reverse=True, key=get_ordinal)
-
-    # Contains card values we have seen for finding pairs.
-    seen = set()
-
-    # Contains cards that have been used already for a pair.
-    used = set()
-
-    # Add each card to a seem set and if we have already seen it, then it is
-    # part of a pair.
-    for idx, card in enumerate(combined):
-        value = get_ordinal(card)
-        # If we have seen it, it is a pair with the one before it.
-        if value in seen:
-            prev_card = combined[idx - 1]
-            pair = [card, prev_card]
+    return _find_pairs(*_combine(hole_cards, community))
 
-            # Add both cards to used set.
-            used.add(prev_card)
-            used.add(card)
 
-            # Initilialize pairs list to an empty list.
-            if pairs is None:
-                pairs = []
-
-            # Add the pair.
-            pairs.append(pair)
+NUM_KICKERS_THREE_OF_A_KIND = 2
 
-            # If we found the top two pairs, stop.
-            if len(pairs) == 2:
-                break
-        # Add value to seen, for future.
-        seen.add(value)
-
-    # Find top kickers.
-    if pairs is None:
-        # If no pair is found, we do not need to find kickers.
-        pass
-    elif len(pairs) == 1:
-        # One pair needs to find three kickers.
-        kickers = find_n_kickers(combined, used, NUM_KICKERS_ONE_PAIR)
-        pairs.append(kickers)
-    elif len(pairs) == 2:
-        # Two pair needs to find one kicker.
-        kickers = find_n_kickers(combined, used, NUM_KICKERS_TWO_PAIR)
-        pairs.append(kickers)
-    else:
-        raise RuntimeError(
-            "More than two pairs found. List: '{}'".format(pairs)
-        )
 
-    return pairs
+def _find_three_of_a_kind(combined, cards):
+    """
+    Finds the three-of-a-kind in combined cards, see `find_three_of_a_kind`.
+    """
+    _, seen_1, _, seen_3, _ = _split(cards)
 
+    # No rank was seen three times.
+    if not seen_3:
+        return None
 
-NUM_KICKERS_THREE_OF_A_KIND = 2
+    trips = _top_bit(seen_3)
+    kickers = _top_n(seen_1 ^ trips, NUM_KICKERS_THREE_OF_A_KIND)
+    return [_take(combined, trips, 3), _take(combined, kickers, 1)]
 
 
 def find_three_of_a_kind(hole_cards, community):
@@ -282,9 +752,6 @@ def find_three_of_a_kind(hole_cards, community):
     Finds a three-of-a-kind and two best kickers. Returns `None` if no three of
         a kind is found.
 
-    Note:
-        Assumes that there is no four-of-a-kind or full-house possible.
-
     Args:
         hole_cards(list(str)): A list of two strings representing two cards.
         community(list(str)): A list of 0, 3, 4, or 5 strings representing the
@@ -300,60 +767,23 @@ def find_three_of_a_kind(hole_cards, community):
             list( list(str,str,str), list(str,str)): The first list is the
                 three-of-a-kind, the second is the top two kickers.
     """
-    # Initialize hand to empty list.
-    hand = []
-
-    # Combine hole_cards and community because does not matter where they are
-    # from.
-    hole_cards.extend(community)
-    combined = hole_cards
-
-    # Sort the cards from highest to lowest.
-    combined.sort(reverse=True, key=get_ordinal)
-
-    # Map of card value to count seen.
-    card_count = {}
-
-    # Contains cards that have been already used in the hand.
-    used = set()
-
-    # Count each card into card count and look for three-of-a-kind.
-    for idx, card in enumerate(combined):
-        # Grab the value of the card ignoring suit.
-        value = get_ordinal(card)
+    return _find_three_of_a_kind(*_combine(hole_cards, community))
 
-        # If the value is not in the map initialize it to 0.
-        if value not in card_count:
-            card_count[value] = 0
 
-        # Increment count of this value of card.
-        card_count[value] += 1
-
-        # Checking if we found the three-of-a-kind.
-        if card_count[value] == 3:
-            start = idx - 2
-            end = idx + 1
-
-            # Because it is sorted we can grab the last three cards seen.
-            three_of_a_kind = combined[start:end]
-
-            # Add three-of-a-kind to used set.
-            used.update(three_of_a_kind)
-
-            # Add three-of-a-kind to hand.
-            hand.append(three_of_a_kind)
-            break
+def _find_straight(combined, cards):
+    """
+    Finds the straight in combined cards, see `find_straight`.
+    """
+    _, seen_1, _, _, _ = _split(cards)
 
-    # No three-of-a-kind was found, return None.
-    if not hand:
+    straight = _straight_bits(seen_1)
+    if straight is None:
         return None
 
-    # We have found a three-of-a-kind, we find the top two kickers.
-    kickers = find_n_kickers(combined, used, NUM_KICKERS_THREE_OF_A_KIND)
-
-    # Add the kickers to the hand.
-    hand.append(kickers)
-
+    # One card of each rank, from the highest card down.
+    hand = []
+    for bit in straight:
+        hand.extend(_take(combined, bit, 1))
     return hand
 
 
@@ -377,52 +807,20 @@ def find_straight(hole_cards, community):
                 None: No straight was found.
                 list( list(str,str,str,str,str)): The highest straight found.
     """
+    return _find_straight(*_combine(hole_cards, community))
 
-    # Initialize hand to empty list.
-    hand = []
 
-    # Combine hole_cards and community because does not matter where they are
-    # from.
-    hole_cards.extend(community)
-    combined = hole_cards
-
-    # Sort the cards from highest to lowest.
-    combined.sort(reverse=True, key=get_ordinal)
-
-    # previous card value
-    value = 0
-
-    # iterate from highest card to lowest
-    for card in combined:
-        # add the card to the hand
-        hand.append(card)
-        # first iteration just set as previous card value then continue
-        if value != 0:
-            # if the current card is 1 smaller than the last card
-            if get_ordinal(card) == value - 1:
-                # if the hand is already 5 cards then we are done
-                if len(hand) == 5:
-                    return hand
-                # edge case of straight 5 high
-                elif len(hand) == 4 and get_ordinal(card) == 2:
-                    # when the cards are 5 4 3 2 check if there is an ace
-                    if get_ordinal(combined[0]) == 14:
-                        hand.append(combined[0])
-                        return hand
-            # if the last card is the same value as the current card
-            elif get_ordinal(card) == value:
-                # delete the current card and move on
-                hand.pop()
-                continue
-            # the card has a gap from the previous card
-            else:
-                # restart the hand
-                hand = [card]
-        # set the previous card value then back to top of loop
-        value = get_ordinal(card)
-
-    # if there is no straight found, return None
-    return None
+def _find_flush(combined, cards):
+    """
+    Finds the flush in combined cards, see `find_flush`.
+    """
+    suits, _, _, _, _ = _split(cards)
+
+    suit = _flush_suit(suits)
+    if suit is None:
+        return None
+
+    return _take(combined, _top_n(suits[suit], 5), 1, suit)
 
 
 def find_flush(hole_cards, community):
@@ -443,29 +841,26 @@ def find_flush(hole_cards, community):
                 None: No flush was found.
                 list( list(str,str,str,str,str)): The highest flush found.
     """
-    # create lists to sort each suit, hand[0] is list of diamonds, etc.
-    hand = [[], [], [], []]
+    return _find_flush(*_combine(hole_cards, community))
 
-    # Combine hole_cards and community because does not matter where they are
-    # from.
-    hole_cards.extend(community)
-    combined = hole_cards
 
-    # Sort the cards from highest to lowest.
-    combined.sort(reverse=True, key=get_ordinal)
+def _find_full_house(combined, cards):
+    """
+    Finds the full-house in combined cards, see `find_full_house`.
+    """
+    _, _, seen_2, seen_3, _ = _split(cards)
 
-    # iterate from highest card to lowest
-    for card in combined:
-        # find the suit of the card
-        suit = get_suit(card)
-        # add card to list of card of that suit
-        hand[suit].append(card)
-        # return if a suit has 5 cards
-        if len(hand[suit]) == 5:
-            return hand[suit]
+    # If there is not a three-of-a-kind, a full-house is not possible.
+    if not seen_3:
+        return None
 
-    # no suit has 5 cards
-    return None
+    # The pair may come from a second three-of-a-kind.
+    trips = _top_bit(seen_3)
+    pairs = seen_2 ^ trips
+    if not pairs:
+        return None
+
+    return [_take(combined, trips, 3), _take(combined, _top_bit(pairs), 2)]
 
 
 def find_full_house(hole_cards, community):
@@ -487,58 +882,32 @@ def find_full_house(hole_cards, community):
             list( list(str,str,str), list(str,str) ): The first list is the
                 three-of-a-kind, the second is the top pair.
     """
-    # Initialize hand to empty list.
-    hand = []
-
-    # Combine hole_cards and community because does not matter where they are
-    # from.
-    hole_cards.extend(community)
-    combined = hole_cards
-
-    # Sort the cards from highest to lowest.
-    combined.sort(reverse=True, key=get_ordinal)
-
-    # Find three-of-a-kind.
-    three_of_a_kind_hand = find_three_of_a_kind(combined, [])
+    return _find_full_house(*_combine(hole_cards, community))
 
-    # If there is not a three-of-a-kind, a full-house is not possible.
-    if three_of_a_kind_hand is None:
-        return None
 
-    # Get the list representing the three-of-a-kind.
-    three_of_a_kind = three_of_a_kind_hand[0]
+NUM_KICKERS_FOUR_OF_A_KIND = 1
 
-    # Remove the used cards from the available cards.
-    for card in three_of_a_kind:
-        combined.remove(card)
 
-    # Find pair.
-    pair_hand = find_pairs(combined, [])
+def _find_four_of_a_kind(combined, cards):
+    """
+    Finds the four-of-a-kind in combined cards, see `find_four_of_a_kind`.
+    """
+    _, seen_1, _, _, seen_4 = _split(cards)
 
-    # If there is not a pair, a full-house is not possible.
-    if pair_hand is None:
+    # No rank was seen four times.
+    if not seen_4:
         return None
 
-    # Get the list representing the top pair.
-    pair = pair_hand[0]
-
-    # Format the full-house.
-    hand = [three_of_a_kind, pair]
-
-    return hand
-
-
-NUM_KICKERS_FOUR_OF_A_KIND = 1
+    quad = _top_bit(seen_4)
+    kickers = _top_n(seen_1 ^ quad, NUM_KICKERS_FOUR_OF_A_KIND)
+    return [_take(combined, quad, 4), _take(combined, kickers, 1)]
 
 
 def find_four_of_a_kind(hole_cards, community):
     """
-    Finds a four-of-a-kind and two best kickers. Returns `None` if no four of
+    Finds a four-of-a-kind and the best kicker. Returns `None` if no four of
         a kind is found.
 
-    Note:
-        Assumes that there is no four-of-a-kind or full-house possible.
-
     Args:
         hole_cards(list(str)): A list of two strings representing two cards.
         community(list(str)): A list of 0, 3, 4, or 5 strings representing the
@@ -551,63 +920,29 @@ def find_four_of_a_kind(hole_cards, community):
     Note:
         The returns comes in two forms:
             None: No four-of-a-kind was found.
-            list( list(str,str,str), list(str,str)): The first list is the
-                four-of-a-kind, the second is the top two kickers.
+            list( list(str,str,str,str), list(str)): The first list is the
+                four-of-a-kind, the second is the top kicker.
     """
-    # Initialize hand to empty list.
-    hand = []
-
-    # Combine hole_cards and community because does not matter where they are
-    # from.
-    hole_cards.extend(community)
-    combined = hole_cards
-
-    # Sort the cards from highest to lowest.
-    combined.sort(reverse=True, key=get_ordinal)
-
-    # Map of card value to count seen.
-    card_count = {}
-
-    # Contains cards that have been already used in the hand.
-    used = set()
-
-    # Count each card into card count and look for four-of-a-kind.
-    for idx, card in enumerate(combined):
-        # Grab the value of the card ignoring suit.
-        value = get_ordinal(card)
+    return _find_four_of_a_kind(*_combine(hole_cards, community))
 
-        # If the value is not in the map initialize it to 0.
-        if value not in card_count:
-            card_count[value] = 0
 
-        # Increment count of this value of card.
-        card_count[value] += 1
-
-        # Checking if we found the four-of-a-kind.
-        if card_count[value] == 4:
-            start = idx - 3
-            end = idx + 1
-
-            # Because it is sorted we can grab the last four cards seen.
-            three_of_a_kind = combined[start:end]
-
-            # Add four-of-a-kind to used set.
-            used.update(three_of_a_kind)
-
-            # Add four-of-a-kind to hand.
-            hand.append(three_of_a_kind)
-            break
+def _find_straight_flush(combined, cards):
+    """
+    Finds the straight-flush in combined cards, see `find_straight_flush`.
+    """
+    suits, _, _, _, _ = _split(cards)
 
-    # No four-of-a-kind was found, return None.
-    if not hand:
+    suit = _flush_suit(suits)
+    if suit is None:
         return None
 
-    # We have found a four-of-a-kind, we find the top two kickers.
-    kickers = find_n_kickers(combined, used, NUM_KICKERS_FOUR_OF_A_KIND)
-
-    # Add the kickers to the hand.
-    hand.append(kickers)
+    straight = _straight_bits(suits[suit])
+    if straight is None:
+        return None
 
+    hand = []
+    for bit in straight:
+        hand.extend(_take(combined, bit, 1, suit))
     return hand
 
 
@@ -631,30 +966,86 @@ def find_straight_flush(hole_cards, community):
                 list( list(str,str,str,str,str)): The highest straight flush
                     found.
     """
-    # create lists to sort each suit, hand[0] is list of diamonds, etc.
-    hand = [[], [], [], []]
-
-    # Combine hole_cards and community because does not matter where they are
-    # from.
-    hole_cards.extend(community)
-    combined = hole_cards
-
-    # Sort the cards from highest to lowest.
-    combined.sort(reverse=True, key=get_ordinal)
-
-    # iterate from highest card to lowest
-    for card in combined:
-        # find the suit of the card
-        suit = get_suit(card)
-        # add card to list of card of that suit
-        hand[suit].append(card)
-
-    # now that all the suits are sorted, find a straight in the suit
-    for suits in hand:
-        # only 1 suit can have more than 5 cards, so find a straight in that
-        # suit
-        if len(suits) >= 5:
-            return find_straight(suits, [])
+    return _find_straight_flush(*_combine(hole_cards, community))
+
+
+def _find_high_card(combined, cards):
+    """
+    Finds the five highest cards in combined cards.
+    """
+    _, seen_1, _, _, _ = _split(cards)
+    return _take(combined, _top_n(seen_1, 5), 1)
+
+
+def _flatten(hand):
+    """
+    Flattens the lists returned by the find functions into one list.
+    """
+    if hand and isinstance(hand[0], list):
+        return [card for cards in hand for card in cards]
+    return hand
+
+
+# Finder of the cards of each category.
+_FINDERS = [
+    _find_high_card,
+    _find_pairs,
+    _find_pairs,
+    _find_three_of_a_kind,
+    _find_straight,
+    _find_flush,
+    _find_full_house,
+    _find_four_of_a_kind,
+    _find_straight_flush
+]
+
+
+def best_hand(hole_cards, community):
+    """
+    Finds the best five card hand, combining the cards only once instead of
+        once per find function.
+
+    Args:
+        hole_cards(iterable(str)): Two strings representing two cards.
+        community(iterable(str)): 0, 3, 4, or 5 strings representing the
+            cards shared in the community.
+
+    Returns:
+        tuple(int, list(str)): The hand strength and the cards that make the
+            hand, most important first.
+    """
+    combined, cards = _combine(hole_cards, community)
+    strength = evaluate_packed(cards)
+    hand = _FINDERS[get_category(strength)](combined, cards)
+    return strength, _flatten(hand)
+
+
+def best_hand_ids(hole_cards, community):
+    """
+    Finds the best five card hand of card ids, see `best_hand`, without
+        turning the cards into strings.
+
+    Args:
+        hole_cards(iterable(int)): The ids of the two cards of the player.
+        community(iterable(int)): The ids of the 0, 3, 4, or 5 cards shared
+            in the community.
+
+    Returns:
+        tuple(int, list(int)): The hand strength and the ids of the cards
+            that make the hand, most important first.
+    """
+    # The finders only match the packed bits, so ids stand in for strings.
+    combined = []
+    cards = 0
+    for card in hole_cards:
+        combined.append((card, CARD_MASKS[card]))
+        cards |= CARD_MASKS[card]
+    for card in community:
+        combined.append((card, CARD_MASKS[card]))
+        cards |= CARD_MASKS[card]
+    strength = evaluate_packed(cards)
+    hand = _FINDERS[get_category(strength)](combined, cards)
+    return strength, _flatten(hand)
 
 
 def main():
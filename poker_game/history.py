@@ -0,0 +1,573 @@
+"""
+History
+=======
+A compact binary log of every hand played.
+
+A log is a directory of numbered file pairs and an index:
+
+hands.NNNNNN.hh:  A header then one fixed width record a hand, see `RECORD`.
+                  Cards are one byte each, ids fit in 6 bits and 0xff marks
+                  an empty seat, so the records can be read in place as a
+                  NumPy structured array.
+hands.NNNNNN.act: The actions of every hand, as varints. A record points at
+                  the actions of its hand by offset and size.
+index.json:       The files in order with the first and last hand id and the
+                  number of records of each.
+
+Amounts of the actions are varints, the amounts won or lost by each seat are
+fixed width so the records stay fixed width. Hand ids must only go up, so
+any hand can be found with a binary search of the one file that holds it.
+A new pair of files is started once a file holds `max_records` hands.
+"""
+import os
+import mmap
+import json
+import struct
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from poker_game import simulator
+from poker_game import streams
+
+# Bump whenever the layout of the records changes.
+HISTORY_VERSION = 1
+
+MAGIC = b'PKHH'
+
+MAX_SEATS = 9
+
+# Marks a seat with no cards.
+NO_CARD = 0xff
+
+# Parts of the seed key of a stream kept in a record.
+MAX_KEY_SIZE = 2
+
+"""
+Header of a record file, 16 bytes.
+magic, version, seats a record, record size and little endian flag.
+"""
+HEADER = struct.Struct('<4sHHII')
+
+"""
+One hand.
+hand id, seed entropy, seed key, seed key size, stream kind, number of
+players, button, showdown flag, board, hole cards of each seat, chips won or
+lost by each seat, offset and size of the actions.
+"""
+RECORD = struct.Struct(
+    '<QQ{key}QBBBBB5s{holes}s{seats}iQI'.format(
+        key=MAX_KEY_SIZE, holes=2 * MAX_SEATS, seats=MAX_SEATS))
+
+# Codes of the stream kinds.
+KIND_CODES = {streams.RANDOM: 0, streams.NUMPY: 1}
+CODE_KINDS = dict((code, kind) for kind, code in KIND_CODES.items())
+
+# Codes of the actions.
+ACTION_CODES = dict(
+    (action, code) for code, action in enumerate(simulator.ACTIONS))
+
+INDEX_NAME = 'index.json'
+
+
+def record_dtype():
+    """
+    Returns the NumPy dtype of a record, laid out exactly as `RECORD`.
+    """
+    if np is None:
+        raise RuntimeError("Record arrays need numpy installed.")
+    return np.dtype([
+        ('hand_id', '<u8'),
+        ('entropy', '<u8'),
+        ('key', '<u8', (MAX_KEY_SIZE,)),
+        ('key_size', 'u1'),
+        ('kind', 'u1'),
+        ('num_players', 'u1'),
+        ('button', 'u1'),
+        ('showdown', 'u1'),
+        ('board', 'u1', (5,)),
+        ('hole_cards', 'u1', (MAX_SEATS, 2)),
+        ('winnings', '<i4', (MAX_SEATS,)),
+        ('actions_offset', '<u8'),
+        ('actions_size', '<u4')
+    ])
+
+
+def encode_varint(value, buffer):
+    """
+    Appends an unsigned integer to a buffer, 7 bits a byte, low bits first.
+
+    Args:
+        value(int): The integer, 0 or more.
+        buffer(bytearray): The buffer to append to.
+    """
+    while value > 0x7f:
+        buffer.append(value & 0x7f | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def decode_varint(buffer, position):
+    """
+    Reads an unsigned integer written by `encode_varint`.
+
+    Args:
+        buffer(bytes | mmap): The buffer to read from.
+        position(int): The offset of the first byte.
+
+    Returns:
+        tuple(int, int): The integer and the offset after it.
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def encode_actions(actions):
+    """
+    Encodes the actions of a hand.
+
+    Note:
+        The street, seat and action are packed into one varint, 2 bits for
+        the street, 4 for the seat and 3 for the action, then the total bet
+        follows as a second varint.
+
+    Args:
+        actions(list(tuple(int, int, str, int))): The street, seat, action
+            and total bet of every action.
+
+    Returns:
+        bytearray: The encoded actions.
+    """
+    buffer = bytearray()
+    for street, seat, action, bet in actions:
+        encode_varint(
+            street | seat << 2 | ACTION_CODES[action] << 6, buffer)
+        encode_varint(bet, buffer)
+    return buffer
+
+
+def decode_actions(buffer, position=0, size=None):
+    """
+    Decodes actions written by `encode_actions`.
+
+    Args:
+        buffer(bytes | mmap): The buffer to read from.
+        position(int): The offset of the first action.
+        size(int | None): The size of the actions, the rest of the buffer
+            when `None`.
+
+    Returns:
+        list(tuple(int, int, str, int)): The street, seat, action and total
+            bet of every action.
+    """
+    end = len(buffer) if size is None else position + size
+    actions = []
+    while position < end:
+        head, position = decode_varint(buffer, position)
+        bet, position = decode_varint(buffer, position)
+        actions.append((head & 0x3, head >> 2 & 0xf,
+                        simulator.ACTIONS[head >> 6], bet))
+    return actions
+
+
+def pack_record(result, actions_offset, actions_size):
+    """
+    Packs a hand into a record.
+
+    Args:
+        result(simulator.HandResult): The hand.
+        actions_offset(int): The offset of its actions in the actions file.
+        actions_size(int): The size of its actions.
+
+    Returns:
+        bytes: The record.
+    """
+    num_players = len(result.hole_cards)
+    if num_players > MAX_SEATS:
+        raise ValueError(
+            "History holds up to {} seats, not {}.".format(
+                MAX_SEATS, num_players))
+
+    entropy, key = result.seed if result.seed is not None else (0, ())
+    if len(key) > MAX_KEY_SIZE:
+        raise ValueError(
+            "History holds seed keys of up to {} parts.".format(MAX_KEY_SIZE))
+    padded_key = list(key) + [0] * (MAX_KEY_SIZE - len(key))
+
+    holes = bytearray([NO_CARD] * (2 * MAX_SEATS))
+    for seat, (card_1, card_2) in enumerate(result.hole_cards):
+        holes[2 * seat] = card_1
+        holes[2 * seat + 1] = card_2
+    winnings = list(result.winnings) + [0] * (MAX_SEATS - num_players)
+
+    return RECORD.pack(
+        result.hand_id, entropy, *(padded_key + [
+            len(key),
+            KIND_CODES.get(result.kind, 0),
+            num_players,
+            result.button,
+            int(result.showdown),
+            bytes(bytearray(result.board)),
+            bytes(holes)] + winnings + [actions_offset, actions_size]))
+
+
+def unpack_record(buffer, offset=0):
+    """
+    Unpacks a record, without its actions.
+
+    Args:
+        buffer(bytes | mmap): The buffer to read from.
+        offset(int): The offset of the record.
+
+    Returns:
+        tuple(simulator.HandResult, int, int): The hand, with no actions,
+            then the offset and size of its actions.
+    """
+    fields = RECORD.unpack_from(buffer, offset)
+    hand_id, entropy = fields[:2]
+    key_size, kind, num_players, button, showdown, board, holes = (
+        fields[2 + MAX_KEY_SIZE:9 + MAX_KEY_SIZE])
+    key = tuple(fields[2:2 + key_size])
+    winnings = list(fields[9 + MAX_KEY_SIZE:9 + MAX_KEY_SIZE + num_players])
+    actions_offset, actions_size = fields[-2:]
+
+    holes = bytearray(holes)
+    hole_cards = [(holes[2 * seat], holes[2 * seat + 1])
+                  for seat in range(num_players)]
+    result = simulator.HandResult(
+        hand_id, button, hole_cards, list(bytearray(board)), winnings,
+        bool(showdown), [], (entropy, key), CODE_KINDS[kind])
+    return result, actions_offset, actions_size
+
+
+def _file_name(number, extension):
+    return 'hands.{:06d}.{}'.format(number, extension)
+
+
+def read_index(directory):
+    """
+    Reads the index of a log.
+
+    Args:
+        directory(str): The directory of the log.
+
+    Returns:
+        list(dict): The number, first and last hand id and record count of
+            each file, in order.
+    """
+    path = os.path.join(directory, INDEX_NAME)
+    if not os.path.exists(path):
+        return []
+    with open(path) as index_file:
+        return json.load(index_file)['files']
+
+
+def _write_index(directory, files):
+    """
+    Writes the index next to its final path and moves it into place.
+    """
+    path = os.path.join(directory, INDEX_NAME)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as index_file:
+        json.dump({'version': HISTORY_VERSION, 'files': files}, index_file,
+                  sort_keys=True, separators=(',', ':'))
+        index_file.write('\n')
+    os.replace(tmp_path, path)
+
+
+class HistoryWriter(object):
+    """
+    Appends hands to a log through buffered files.
+
+    Note:
+        Every writer starts a new pair of files numbered past every file in
+        the directory, those a crash left out of the index too, so a log is
+        never rewritten. Only one writer should append to a directory at a
+        time.
+
+    Args:
+        directory(str): The directory of the log, made if missing.
+        max_records(int): The hands a file holds before a new one is started.
+        buffer_size(int): The bytes buffered before a write to disk.
+    """
+
+    def __init__(self, directory, max_records=1 << 20, buffer_size=1 << 16):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.max_records = max_records
+        self.buffer_size = buffer_size
+        self.files = read_index(directory)
+        self.last_id = self.files[-1]['last'] if self.files else -1
+        self.records = None
+        self.actions = None
+        self.actions_offset = 0
+
+    def _next_number(self):
+        """
+        Returns the number after that of every file in the index or the
+        directory.
+        """
+        numbers = [entry['number'] for entry in self.files]
+        for name in os.listdir(self.directory):
+            parts = name.split('.')
+            if len(parts) == 3 and parts[0] == 'hands' and parts[1].isdigit():
+                numbers.append(int(parts[1]))
+        return max(numbers) + 1 if numbers else 0
+
+    def _open(self):
+        """
+        Starts the next pair of files.
+        """
+        number = self._next_number()
+        self.files.append(
+            {'number': number, 'first': None, 'last': None, 'count': 0})
+        # Fails rather than truncates should the file exist after all.
+        self.records = open(
+            os.path.join(self.directory, _file_name(number, 'hh')),
+            'xb', self.buffer_size)
+        self.actions = open(
+            os.path.join(self.directory, _file_name(number, 'act')),
+            'xb', self.buffer_size)
+        self.records.write(HEADER.pack(
+            MAGIC, HISTORY_VERSION, MAX_SEATS, RECORD.size,
+            int(sys.byteorder == 'little')))
+        self.actions_offset = 0
+
+    def _close_files(self):
+        if self.records is not None:
+            self.records.close()
+            self.actions.close()
+            self.records = None
+            self.actions = None
+
+    def write(self, result):
+        """
+        Appends a hand.
+
+        Args:
+            result(simulator.HandResult): The hand.
+
+        Raises:
+            ValueError: The hand id is not above the last one written.
+        """
+        if result.hand_id <= self.last_id:
+            raise ValueError(
+                "Hand {} does not follow hand {}.".format(
+                    result.hand_id, self.last_id))
+
+        if self.records is None or (
+                self.files[-1]['count'] >= self.max_records):
+            self.rotate()
+
+        actions = encode_actions(result.actions)
+        self.records.write(
+            pack_record(result, self.actions_offset, len(actions)))
+        self.actions.write(actions)
+        self.actions_offset += len(actions)
+
+        entry = self.files[-1]
+        if entry['first'] is None:
+            entry['first'] = result.hand_id
+        entry['last'] = result.hand_id
+        entry['count'] += 1
+        self.last_id = result.hand_id
+
+    def rotate(self):
+        """
+        Closes the current files, records them in the index and starts new
+        ones.
+        """
+        self._close_files()
+        _write_index(self.directory,
+                     [entry for entry in self.files if entry['count']])
+        self._open()
+
+    def close(self):
+        """
+        Flushes the files and writes the index.
+        """
+        self._close_files()
+        self.files = [entry for entry in self.files if entry['count']]
+        _write_index(self.directory, self.files)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HistoryFile(object):
+    """
+    One memory mapped pair of files of a log.
+
+    Args:
+        directory(str): The directory of the log.
+        number(int): The number of the pair.
+
+    Raises:
+        ValueError: The record file is not a current log file.
+    """
+
+    def __init__(self, directory, number):
+        self.number = number
+        self.records = self._map(
+            os.path.join(directory, _file_name(number, 'hh')))
+        self.actions = self._map(
+            os.path.join(directory, _file_name(number, 'act')))
+
+        if len(self.records) < HEADER.size:
+            self.close()
+            raise ValueError("History file is truncated.")
+        magic, version, seats, record_size, little_endian = (
+            HEADER.unpack_from(self.records))
+        if (magic != MAGIC or version != HISTORY_VERSION or
+                seats != MAX_SEATS or record_size != RECORD.size or
+                bool(little_endian) != (sys.byteorder == 'little')):
+            self.close()
+            raise ValueError("Not a current history file.")
+
+        # A record cut short by a crash is left out.
+        self.count = (len(self.records) - HEADER.size) // RECORD.size
+
+    @staticmethod
+    def _map(path):
+        with open(path, 'rb') as mapped_file:
+            if not os.fstat(mapped_file.fileno()).st_size:
+                return b''
+            return mmap.mmap(
+                mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def hand_id(self, position):
+        """
+        Returns the hand id of a record.
+        """
+        return struct.unpack_from(
+            '<Q', self.records, HEADER.size + position * RECORD.size)[0]
+
+    def find(self, hand_id):
+        """
+        Returns the position of the record of a hand, or -1.
+        """
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.hand_id(middle) < hand_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.hand_id(low) == hand_id:
+            return low
+        return -1
+
+    def read(self, position):
+        """
+        Reads a record and its actions.
+
+        Returns:
+            simulator.HandResult: The hand.
+        """
+        result, offset, size = unpack_record(
+            self.records, HEADER.size + position * RECORD.size)
+        result.actions = decode_actions(self.actions, offset, size)
+        return result
+
+    def array(self):
+        """
+        Returns the records as a structured array backed by the memory map.
+        """
+        return np.frombuffer(self.records, record_dtype(), self.count,
+                             HEADER.size)
+
+    def close(self):
+        for mapped in (self.records, self.actions):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+
+class HistoryReader(object):
+    """
+    Reads a log in place through memory maps.
+
+    Args:
+        directory(str): The directory of the log.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = read_index(directory)
+        self.opened = {}
+
+    def _file(self, number):
+        if number not in self.opened:
+            self.opened[number] = HistoryFile(self.directory, number)
+        return self.opened[number]
+
+    def get(self, hand_id):
+        """
+        Reads one hand.
+
+        Args:
+            hand_id(int): The id of the hand.
+
+        Returns:
+            simulator.HandResult: The hand.
+
+        Raises:
+            KeyError: The hand is not in the log.
+        """
+        for entry in self.files:
+            if entry['first'] <= hand_id <= entry['last']:
+                history_file = self._file(entry['number'])
+                position = history_file.find(hand_id)
+                if position >= 0:
+                    return history_file.read(position)
+        raise KeyError(hand_id)
+
+    def __iter__(self):
+        for entry in self.files:
+            history_file = self._file(entry['number'])
+            for position in range(history_file.count):
+                yield history_file.read(position)
+
+    def __len__(self):
+        return sum(entry['count'] for entry in self.files)
+
+    def arrays(self):
+        """
+        Returns the records of every file as structured arrays.
+
+        Note:
+            The arrays read the memory maps in place, so drop them before
+            the reader is closed.
+
+        Returns:
+            list(numpy.ndarray): The records of each file, see
+                `record_dtype`.
+        """
+        if np is None:
+            raise RuntimeError("Record arrays need numpy installed.")
+        return [self._file(entry['number']).array() for entry in self.files]
+
+    def close(self):
+        for history_file in self.opened.values():
+            history_file.close()
+        self.opened = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,400 @@
+"""
+Lookup
+======
+Precomputed hand rank tables for five, six and seven card hands.
+
+Hands without a flush are ranked by their rank multiset alone. The sorted
+ranks r_1 <= ... <= r_n are turned into the strictly increasing
+c_i = r_i + i - 1 and hashed with the combinatorial number system,
+sum(C(c_i, i)), which is a perfect hash into C(12 + n, n) slots. Hands with a
+flush are ranked by the 13 bit rank mask of the flush suit alone, since with
+seven or fewer cards a flush rules out both a full-house and a
+four-of-a-kind.
+
+The tables hold the same strengths as `hands.evaluate` and are saved to a
+versioned binary file that is memory mapped on load, so only the first
+process pays to build them.
+"""
+import os
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from itertools import combinations_with_replacement
+
+from poker_game import codec
+from poker_game import hands
+
+# Bump whenever the layout of the file or the strength encoding changes.
+TABLE_VERSION = 1
+
+MAGIC = b'PKHR'
+
+"""
+Header of the table file, 32 bytes so the tables stay aligned.
+magic, version, little endian flag, reserved, length of the flush table, the
+five, six and seven card tables, CRC32 of the tables and reserved.
+"""
+HEADER = struct.Struct('<4sHBBIIIIII')
+
+HAND_SIZES = (5, 6, 7)
+
+NUM_RANKS = codec.NUM_RANKS
+
+
+def _binomial(n, k):
+    """
+    Returns n choose k, or 0 when k > n.
+    """
+    if k < 0 or k > n:
+        return 0
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+# HASH_TERMS[i][rank] is the hash term of the i-th lowest rank in a hand.
+HASH_TERMS = [
+    [_binomial(rank + i, i + 1) for rank in range(NUM_RANKS)]
+    for i in range(max(HAND_SIZES))
+]
+
+
+def table_size(num_cards):
+    """
+    Returns the number of slots in the table of a hand size.
+    """
+    return _binomial(NUM_RANKS + num_cards - 1, num_cards)
+
+
+def rank_hash(ranks):
+    """
+    Hashes a sorted list of rank indexes into its slot in the table.
+
+    Args:
+        ranks(list(int)): Rank indexes, 0 is a 2 and 12 is an Ace, from lowest
+            to highest.
+
+    Returns:
+        int: The slot of the rank multiset.
+    """
+    slot = 0
+    for i, rank in enumerate(ranks):
+        slot += HASH_TERMS[i][rank]
+    return slot
+
+
+def build_flush_table():
+    """
+    Builds the strength of every flush rank mask.
+
+    Returns:
+        array: The strength of every 13 bit mask with five or more ranks, 0
+            for the rest.
+    """
+    table = array('I', [0]) * (1 << NUM_RANKS)
+    for mask in range(1 << NUM_RANKS):
+        if hands.POPCOUNTS[mask] >= 5:
+            # The low 16 bits of the packed cards are the Diamonds.
+            table[mask] = hands.evaluate_packed(mask)
+    return table
+
+
+def build_rank_table(num_cards):
+    """
+    Builds the strength of every rank multiset of a hand size without a flush.
+
+    Args:
+        num_cards(int): The number of cards in the hand.
+
+    Returns:
+        array: The strength of every rank multiset in hash order, 0 for
+            multisets holding a rank more than four times.
+    """
+    table = array('I', [0]) * table_size(num_cards)
+    for ranks in combinations_with_replacement(range(NUM_RANKS), num_cards):
+        # Give the n-th card its n-th suit in turn, which never holds two
+        # cards of one rank or five cards of one suit.
+        cards = 0
+        counts = [0] * NUM_RANKS
+        for idx, rank in enumerate(ranks):
+            counts[rank] += 1
+            cards |= 1 << (codec.SUIT_SHIFT * (idx % 4) + rank)
+
+        # A rank can only be held four times.
+        if max(counts) > 4:
+            continue
+
+        table[rank_hash(ranks)] = hands.evaluate_packed(cards)
+    return table
+
+
+def build_tables():
+    """
+    Builds the flush table and the table of every hand size.
+
+    Returns:
+        list(array): The flush table then the five, six and seven card
+            tables.
+    """
+    tables = [build_flush_table()]
+    for num_cards in HAND_SIZES:
+        tables.append(build_rank_table(num_cards))
+    return tables
+
+
+def default_path():
+    """
+    Returns the path of the cached table file.
+
+    Note:
+        The directory can be set with the `POKER_GAME_CACHE` environment
+        variable and defaults to `~/.cache/poker_game`.
+    """
+    directory = os.environ.get('POKER_GAME_CACHE')
+    if not directory:
+        directory = os.path.join(
+            os.path.expanduser('~'), '.cache', 'poker_game')
+    return os.path.join(
+        directory, 'hand_ranks.v{}.bin'.format(TABLE_VERSION))
+
+
+def write_tables(path, tables):
+    """
+    Writes the tables to a file. The file is written next to its final path
+    and then moved into place, so readers never see a partial file.
+
+    Args:
+        path(str): The path of the table file.
+        tables(list(array)): The tables from `build_tables`.
+    """
+    payload = b''.join(table.tobytes() for table in tables)
+    header = HEADER.pack(
+        MAGIC,
+        TABLE_VERSION,
+        sys.byteorder == 'little',
+        0,
+        len(tables[0]),
+        len(tables[1]),
+        len(tables[2]),
+        len(tables[3]),
+        zlib.crc32(payload) & 0xffffffff,
+        0)
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as table_file:
+        table_file.write(header)
+        table_file.write(payload)
+    os.replace(tmp_path, path)
+
+
+def _check_buffer(buffer):
+    """
+    Checks the header and checksum of a table file held in a buffer.
+
+    Args:
+        buffer(bytes | mmap): The contents of the table file.
+
+    Returns:
+        tuple(int): The lengths of the flush, five, six and seven card tables.
+
+    Raises:
+        ValueError: The file is stale, truncated or corrupt.
+    """
+    if len(buffer) < HEADER.size:
+        raise ValueError("Table file is truncated.")
+
+    fields = HEADER.unpack(buffer[:HEADER.size])
+    magic, version, little_endian = fields[:3]
+    lengths = fields[4:8]
+    checksum = fields[8]
+
+    if magic != MAGIC:
+        raise ValueError("Not a table file.")
+    if version != TABLE_VERSION:
+        raise ValueError(
+            "Table file version {} is not {}.".format(version, TABLE_VERSION))
+    if bool(little_endian) != (sys.byteorder == 'little'):
+        raise ValueError("Table file has the wrong byte order.")
+
+    expected = [1 << NUM_RANKS] + [table_size(size) for size in HAND_SIZES]
+    if list(lengths) != expected:
+        raise ValueError("Table file has the wrong table lengths.")
+    if len(buffer) != HEADER.size + 4 * sum(lengths):
+        raise ValueError("Table file is truncated.")
+    if zlib.crc32(buffer[HEADER.size:]) & 0xffffffff != checksum:
+        raise ValueError("Table file checksum does not match.")
+
+    return lengths
+
+
+def check_tables(path):
+    """
+    Checks that a table file is current and intact.
+
+    Args:
+        path(str): The path of the table file.
+
+    Returns:
+        bool: Whether the file can be loaded.
+    """
+    try:
+        with open(path, 'rb') as table_file:
+            _check_buffer(table_file.read())
+    except (IOError, OSError, ValueError):
+        return False
+    return True
+
+
+class HandRankTables(object):
+    """
+    Hand rank tables ready for lookups.
+
+    Args:
+        tables(list(memoryview | array)): The flush table then the five, six
+            and seven card tables.
+        source(mmap | None): The memory map backing the tables, if any.
+        views(list(memoryview)): Views of the memory map to release on close.
+    """
+
+    def __init__(self, tables, source=None, views=()):
+        self.flush = tables[0]
+        self.by_size = dict(zip(HAND_SIZES, tables[1:]))
+        self.source = source
+        self.views = list(tables) + list(views)
+
+    @classmethod
+    def open(cls, path):
+        """
+        Memory maps a table file.
+
+        Args:
+            path(str): The path of the table file.
+
+        Returns:
+            HandRankTables: The tables backed by the file.
+
+        Raises:
+            ValueError: The file is stale, truncated or corrupt.
+        """
+        with open(path, 'rb') as table_file:
+            source = mmap.mmap(
+                table_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            lengths = _check_buffer(source)
+        except ValueError:
+            source.close()
+            raise
+
+        base = memoryview(source)
+        view = base[HEADER.size:].cast('I')
+        tables = []
+        start = 0
+        for length in lengths:
+            tables.append(view[start:start + length])
+            start += length
+        return cls(tables, source, [view, base])
+
+    def close(self):
+        """
+        Releases the memory map backing the tables.
+        """
+        if self.source is not None:
+            for view in self.views:
+                view.release()
+            self.source.close()
+            self.source = None
+
+    def evaluate(self, hole_cards, community):
+        """
+        Looks up the strength of the best five card hand.
+
+        Args:
+            hole_cards(iterable(int)): The ids of the two cards of the player.
+            community(iterable(int)): The ids of the 3, 4, or 5 cards shared
+                in the community.
+
+        Returns:
+            int: The same hand strength as `hands.evaluate`.
+        """
+        cards = 0
+        ranks = []
+        for card in hole_cards:
+            cards |= codec.CARD_MASKS[card]
+            ranks.append(codec.ID_RANKS[card])
+        for card in community:
+            cards |= codec.CARD_MASKS[card]
+            ranks.append(codec.ID_RANKS[card])
+
+        # At most one suit can hold a flush.
+        for suit in range(4):
+            mask = cards >> (codec.SUIT_SHIFT * suit) & codec.RANK_MASK
+            if hands.POPCOUNTS[mask] >= 5:
+                return self.flush[mask]
+
+        ranks.sort()
+        return self.by_size[len(ranks)][rank_hash(ranks)]
+
+
+def load_tables(path=None):
+    """
+    Loads the table file, building and saving it first if it is missing,
+    stale or corrupt.
+
+    Args:
+        path(str | None): The path of the table file, see `default_path`.
+
+    Returns:
+        HandRankTables: The loaded tables.
+    """
+    if path is None:
+        path = default_path()
+
+    try:
+        return HandRankTables.open(path)
+    except (IOError, OSError, ValueError):
+        pass
+
+    tables = build_tables()
+    try:
+        write_tables(path, tables)
+        return HandRankTables.open(path)
+    except (IOError, OSError, ValueError):
+        # The cache is not writable, keep the tables in memory.
+        return HandRankTables(tables)
+
+
+_TABLES = None
+
+
+def get_tables():
+    """
+    Returns the tables of this process, loading them on first use.
+    """
+    global _TABLES
+    if _TABLES is None:
+        _TABLES = load_tables()
+    return _TABLES
+
+
+def evaluate(hole_cards, community):
+    """
+    Looks up the strength of the best five card hand in the tables of this
+    process.
+
+    Args:
+        hole_cards(iterable(int)): The ids of the two cards of the player.
+        community(iterable(int)): The ids of the 3, 4, or 5 cards shared in
+            the community.
+
+    Returns:
+        int: The same hand strength as `hands.evaluate`.
+    """
+    return get_tables().evaluate(hole_cards, community)
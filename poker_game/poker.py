@@ -1,8 +1,8 @@
 """
 Poker Engine
 """
-import random
-from math import floor
+from poker_game import codec
+from poker_game import streams
 
 # Mapping Ace to King
 
@@ -13,6 +13,28 @@ from math import floor
 
 
 class Card(object):
+    """
+    An immutable playing card.
+
+    Note:
+        There are only 52 cards, so they are built once when this module is
+        loaded and `Card(id_)` hands back the shared instance for that id
+        instead of building a new one.
+
+    Args:
+        id_(int): The id of the card, 0 to 51.
+    """
+    __slots__ = (
+        'id',
+        'value',
+        'suit',
+        'suit_name',
+        'name',
+        'full_name',
+        'color',
+        'code'
+    )
+
     CARD_RANGE = 13
     VALUES = list(range(CARD_RANGE))
     DIAMONDS = 'D'
@@ -49,29 +71,67 @@ class Card(object):
             'Queen',
             'King']
 
-    def __init__(self, id_):
-        self.id = id_
-        self.set_value()
-        self.set_suit()
-        self.set_name()
-        self.color = Card.RED if self.suit in Card.REDS else Card.BLACK
-
-    def set_value(self):
-        self.value = self.id % Card.CARD_RANGE
+    # The shared instance of every id, filled in below the class.
+    DECK = []
 
-    def set_suit(self):
-        suit_num = int(floor(self.id / Card.CARD_RANGE))
-        self.suit = Card.SUITS[suit_num]
-        self.suit_name = Card.SUIT_NAMES[self.suit]
+    def __new__(cls, id_):
+        if not 0 <= id_ < len(Card.DECK):
+            raise ValueError("Card id {} is not in the deck.".format(id_))
+        return Card.DECK[id_]
 
-    def set_name(self):
-        self.name = Card.VALUE_NAMES[self.value]
-        self.full_name = "{card.name} of {card.suit_name}".format(card=self)
+    def __init__(self, id_):
+        # Every attribute was set when the deck was built.
+        pass
+
+    @classmethod
+    def _build(cls, id_):
+        """
+        Builds the instance of a card id. Only used to fill `Card.DECK`.
+        """
+        card = object.__new__(cls)
+        set_attr = object.__setattr__
+
+        value = id_ % Card.CARD_RANGE
+        suit = Card.SUITS[id_ // Card.CARD_RANGE]
+        suit_name = Card.SUIT_NAMES[suit]
+        name = Card.VALUE_NAMES[value]
+
+        set_attr(card, 'id', id_)
+        set_attr(card, 'value', value)
+        set_attr(card, 'suit', suit)
+        set_attr(card, 'suit_name', suit_name)
+        set_attr(card, 'name', name)
+        set_attr(card, 'full_name', "{} of {}".format(name, suit_name))
+        set_attr(card, 'color', Card.RED if suit in Card.REDS else Card.BLACK)
+        set_attr(card, 'code', codec.ID_STRINGS[id_])
+        return card
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card is immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("Card is immutable.")
+
+    def __reduce__(self):
+        # Unpickling looks the shared instance up again.
+        return (Card, (self.id,))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return "Card({})".format(self.id)
 
     def __str__(self):
         return self.full_name
 
 
+Card.DECK = [Card._build(id_) for id_ in range(52)]
+
+
 class Hand(object):
 
     def __init__(self, cards):
@@ -165,31 +225,121 @@ class Community(object):
         return community_str + '\n'
 
 
+class Deck(object):
+    """
+    A reusable deck of card ids held in a bytearray.
+
+    Shuffling only draws the positions that are about to be dealt, a partial
+    Fisher-Yates shuffle, so a deal of 2 players costs 9 draws instead of 52.
+
+    Args:
+        rng(streams.RandomStream | streams.NumpyStream | None): The stream
+            that shuffles the deck, a freshly seeded one when `None`.
+        cards(iterable(int) | None): The ids in the deck, all 52 by default.
+    """
+
+    def __init__(self, rng=None, cards=None):
+        self.rng = streams.make_stream() if rng is None else rng
+        if cards is None:
+            cards = range(PokerEngine.NUM_CARDS)
+        self.order = bytes(cards)
+        self.cards = bytearray(self.order)
+
+    def reset(self):
+        """
+        Puts the deck back in its starting order.
+        """
+        self.cards[:] = self.order
+
+    def shuffle(self, count=None):
+        """
+        Moves random cards to the front of the deck.
+
+        Args:
+            count(int | None): The number of cards to shuffle into place, the
+                whole deck when `None`.
+
+        Returns:
+            bytearray: The deck, with a uniform random draw in the first
+                `count` places.
+        """
+        cards = self.cards
+        size = len(cards)
+        if count is None or count > size:
+            count = size
+        for idx, draw in enumerate(self.rng.draw(count)):
+            # Swap a random card from the rest of the deck into place.
+            pick = idx + int(draw * (size - idx))
+            cards[idx], cards[pick] = cards[pick], cards[idx]
+        return cards
+
+    def deal(self, count):
+        """
+        Shuffles and deals cards from the front of the deck.
+
+        Note:
+            Every deal starts from the deck in order, so the cards dealt
+            depend only on the draws of the stream and a hand can be dealt
+            again from the seed of its stream.
+
+        Args:
+            count(int): The number of cards to deal.
+
+        Returns:
+            bytes: The ids of the cards dealt.
+        """
+        self.reset()
+        return bytes(self.shuffle(count)[:count])
+
+    def deal_many(self, num_hands, num_players=0, board_size=5):
+        """
+        Deals many independent deals into one array.
+
+        Args:
+            num_hands(int): The number of deals.
+            num_players(int): The number of players in each deal.
+            board_size(int): The number of community cards in each deal.
+
+        Returns:
+            bytearray: Each deal in turn, the board then the two cards of
+                each player, `board_size + 2 * num_players` ids a deal.
+        """
+        count = 2 * num_players + board_size
+        deals = bytearray(num_hands * count)
+        shuffle = self.shuffle
+        for start in range(0, num_hands * count, count):
+            deals[start:start + count] = shuffle(count)[:count]
+        return deals
+
+
 class PokerEngine(object):
 
     NUM_CARDS = 52
 
-    def __init__(self):
+    BOARD_SIZE = 5
+
+    def __init__(self, rng=None):
+        self.deck = Deck(rng)
         self.cards = None
 
     def deal_hands(self, num_players):
-        self.cards = list(range(PokerEngine.NUM_CARDS))
-        random.shuffle(self.cards)
+        # Only the cards that will be dealt this hand are shuffled.
+        self.cards = self.deck.deal(2 * num_players + PokerEngine.BOARD_SIZE)
+        # The board comes first, then two cards for each player.
+        first = PokerEngine.BOARD_SIZE
+        deck = Card.DECK
         hands = []
         for player in range(num_players):
-            id_1 = self.cards.pop()
-            id_2 = self.cards.pop()
-            card_1 = Card(id_1)
-            card_2 = Card(id_2)
-            hand_cards = [card_1, card_2]
+            hand_cards = [deck[self.cards[first + 2 * player]],
+                          deck[self.cards[first + 2 * player + 1]]]
             hand = Hand(hand_cards)
             hands.append(hand)
 
         return hands
 
     def deal_community(self):
-        community_cards = self.cards[:5]
-        community_cards = map(Card, community_cards)
+        community_cards = [
+            Card.DECK[id_] for id_ in self.cards[:PokerEngine.BOARD_SIZE]]
         community = Community(community_cards)
         return community
 
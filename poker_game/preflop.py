@@ -0,0 +1,329 @@
+"""
+Preflop
+=======
+Preflop equity of every starting hand against random hands.
+
+There are 169 kinds of starting hand: 13 pairs, 78 suited and 78 offsuit.
+They are laid out on the usual 13 by 13 grid with the Ace first, pairs on
+the diagonal, suited hands above it and offsuit hands below it, so the index
+of a hand is row * 13 + column.
+
+The table is built offline with `python -m poker_game.preflop` and shipped as
+a small JSON file that is read on first use.
+"""
+import os
+import json
+import random
+import multiprocessing
+
+from poker_game import codec
+from poker_game import hands
+from poker_game.poker import PokerEngine
+
+TABLE_VERSION = 1
+
+TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'data', 'preflop_equity.json')
+
+# Ranks from the top of the grid down.
+RANK_CHARS = 'AKQJT98765432'
+NUM_RANKS = len(RANK_CHARS)
+
+# The table holds heads-up up to nine handed.
+MIN_PLAYERS = 2
+MAX_PLAYERS = 9
+
+BOARD_SIZE = 5
+
+
+def _grid_rank(card):
+    """
+    Returns the row of the grid of a card id, the Ace is 0 and the 2 is 12.
+    """
+    return (NUM_RANKS - card % NUM_RANKS) % NUM_RANKS
+
+
+def hand_index(card_1, card_2):
+    """
+    Returns the index of the starting hand of two card ids.
+
+    Args:
+        card_1(int): The id of the first card.
+        card_2(int): The id of the second card.
+
+    Returns:
+        int: The index of the hand in `HAND_CLASSES`.
+    """
+    rank_1 = _grid_rank(card_1)
+    rank_2 = _grid_rank(card_2)
+    high = min(rank_1, rank_2)
+    low = max(rank_1, rank_2)
+
+    # Suited hands sit above the diagonal and offsuit hands below it.
+    if card_1 // NUM_RANKS == card_2 // NUM_RANKS:
+        return high * NUM_RANKS + low
+    return low * NUM_RANKS + high
+
+
+def _class_name(index):
+    """
+    Returns the name of a starting hand index, e.g. 'AKs', 'AKo' or 'QQ'.
+    """
+    row, column = divmod(index, NUM_RANKS)
+    if row == column:
+        return RANK_CHARS[row] * 2
+    if row < column:
+        return RANK_CHARS[row] + RANK_CHARS[column] + 's'
+    return RANK_CHARS[column] + RANK_CHARS[row] + 'o'
+
+
+HAND_CLASSES = [_class_name(index) for index in range(NUM_RANKS ** 2)]
+
+
+def hand_class(card_1, card_2):
+    """
+    Returns the name of the starting hand of two card ids.
+
+    Args:
+        card_1(int): The id of the first card.
+        card_2(int): The id of the second card.
+
+    Returns:
+        str: The name of the hand, e.g. 'AKs', 'AKo' or 'QQ'.
+    """
+    return HAND_CLASSES[hand_index(card_1, card_2)]
+
+
+def class_combos(index):
+    """
+    Returns every pair of card ids of a starting hand.
+
+    Args:
+        index(int): The index of the hand in `HAND_CLASSES`.
+
+    Returns:
+        list(tuple(int, int)): 6 pairs for a pair, 4 when suited and 12 when
+            offsuit.
+    """
+    row, column = divmod(index, NUM_RANKS)
+
+    # Poker values count up from the Ace.
+    value_1 = (NUM_RANKS - row) % NUM_RANKS
+    value_2 = (NUM_RANKS - column) % NUM_RANKS
+
+    combos = []
+    for suit_1 in range(4):
+        for suit_2 in range(4):
+            if row == column and suit_1 >= suit_2:
+                continue
+            if row < column and suit_1 != suit_2:
+                continue
+            if row > column and suit_1 == suit_2:
+                continue
+            combos.append((suit_1 * NUM_RANKS + value_1,
+                           suit_2 * NUM_RANKS + value_2))
+    return combos
+
+
+def _simulate_class(task):
+    """
+    Deals random opponents and boards against one starting hand.
+
+    Note:
+        Every deal holds the most opponents, and a table of k players uses
+        the first k - 1 of them, so one deal counts for every table size.
+
+    Args:
+        task(tuple(int, int, int)): The index of the hand, the number of deals
+            and the seed of the run.
+
+    Returns:
+        tuple(str, list(float)): The name of the hand and its equity for each
+            table size.
+    """
+    index, iterations, seed = task
+    rng = random.Random('{}:{}'.format(seed, HAND_CLASSES[index]))
+
+    # Suits do not matter against random hands, any combo will do.
+    hole = class_combos(index)[0]
+    remaining = [
+        card for card in range(PokerEngine.NUM_CARDS) if card not in hole]
+    num_opponents = MAX_PLAYERS - 1
+    needed = 2 * num_opponents + BOARD_SIZE
+
+    card_masks = codec.CARD_MASKS
+    hole_mask = card_masks[hole[0]] | card_masks[hole[1]]
+    totals = [0.0] * num_opponents
+
+    for _ in range(iterations):
+        cards = [card_masks[card] for card in rng.sample(remaining, needed)]
+        board = sum(cards[:BOARD_SIZE])
+        strength = hands.evaluate_packed(hole_mask | board)
+
+        # Walk the opponents, keeping the best and how many share it.
+        best = -1
+        best_count = 0
+        for opponent in range(num_opponents):
+            first = BOARD_SIZE + 2 * opponent
+            opponent_strength = hands.evaluate_packed(
+                board | cards[first] | cards[first + 1])
+            if opponent_strength > best:
+                best = opponent_strength
+                best_count = 1
+            elif opponent_strength == best:
+                best_count += 1
+
+            if strength > best:
+                totals[opponent] += 1.0
+            elif strength == best:
+                totals[opponent] += 1.0 / (best_count + 1)
+
+    return HAND_CLASSES[index], [total / iterations for total in totals]
+
+
+def _write_table(path, table):
+    """
+    Writes the table next to its final path and moves it into place.
+    """
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as table_file:
+        json.dump(table, table_file, sort_keys=True, separators=(',', ':'))
+        table_file.write('\n')
+    os.replace(tmp_path, path)
+
+
+def build_table(path=TABLE_PATH, iterations=50000, seed=0, processes=None):
+    """
+    Builds the preflop table, saving it after every hand.
+
+    Note:
+        The job can be stopped at any time. Run again with the same
+        iterations and seed, it skips the hands already in the file.
+
+    Args:
+        path(str): The path of the table file.
+        iterations(int): The number of deals for each hand.
+        seed(int): The seed of the run.
+        processes(int | None): Number of worker processes, all cores when
+            `None`.
+
+    Returns:
+        dict: The table.
+    """
+    table = None
+    if os.path.exists(path):
+        with open(path) as table_file:
+            table = json.load(table_file)
+
+    # Start again when the file was built some other way.
+    settings = {
+        'version': TABLE_VERSION,
+        'iterations': iterations,
+        'seed': seed,
+        'players': list(range(MIN_PLAYERS, MAX_PLAYERS + 1))
+    }
+    if table is None or any(table.get(key) != value
+                            for key, value in settings.items()):
+        table = dict(settings, equity={})
+
+    tasks = [
+        (index, iterations, seed)
+        for index, name in enumerate(HAND_CLASSES)
+        if name not in table['equity']
+    ]
+    if not tasks:
+        return table
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    pool = multiprocessing.Pool(min(processes, len(tasks)))
+    try:
+        for name, equities in pool.imap_unordered(_simulate_class, tasks):
+            table['equity'][name] = [round(value, 4) for value in equities]
+            _write_table(path, table)
+    finally:
+        pool.terminate()
+        pool.join()
+
+    return table
+
+
+_TABLE = None
+
+
+def get_table():
+    """
+    Returns the preflop table, reading it on first use.
+
+    Returns:
+        dict: The table, with the equity of every hand by name.
+
+    Raises:
+        ValueError: The table is missing hands.
+    """
+    global _TABLE
+    if _TABLE is None:
+        with open(TABLE_PATH) as table_file:
+            table = json.load(table_file)
+        if len(table['equity']) != len(HAND_CLASSES):
+            raise ValueError("Preflop table is incomplete.")
+        _TABLE = table
+    return _TABLE
+
+
+def preflop_equity(card_1, card_2, num_players=2):
+    """
+    Looks up the preflop equity of two cards against random hands.
+
+    Args:
+        card_1(int): The id of the first card.
+        card_2(int): The id of the second card.
+        num_players(int): The number of players at the table, 2 to 9.
+
+    Returns:
+        float: The share of the pot won on average.
+    """
+    if not MIN_PLAYERS <= num_players <= MAX_PLAYERS:
+        raise ValueError(
+            "Preflop equity covers 2 to 9 players, not {}.".format(
+                num_players))
+    equities = get_table()['equity'][hand_class(card_1, card_2)]
+    return equities[num_players - MIN_PLAYERS]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Builds the preflop equity table.")
+
+    parser.add_argument(
+        '-n', '--iterations',
+        help="Deals for each starting hand.",
+        type=int,
+        default=50000)
+    parser.add_argument(
+        '-s', '--seed',
+        help="Seed of the run.",
+        type=int,
+        default=0)
+    parser.add_argument(
+        '-p', '--processes',
+        help="Number of worker processes.",
+        type=int,
+        default=None)
+    parser.add_argument(
+        '-o', '--output',
+        help="Path of the table file.",
+        default=TABLE_PATH)
+
+    args = parser.parse_args()
+    build_table(args.output, args.iterations, args.seed, args.processes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,354 @@
+"""
+Ranges
+======
+Hand ranges in the usual notation and their equity against each other.
+
+A range is a comma separated list of parts:
+
+QQ        one pair.
+AKs, AKo  suited or offsuit hands, AK for both.
+AhKd      one combo.
+QQ+       a pair and every pair above it.
+ATo+      a hand and every kicker above it up to the top card, AT to AK.
+55-22     pairs from one to the other.
+A9s-A6s   a top card with kickers from one to the other.
+76s-54s   hands with the same gap, stepping both cards down.
+
+Any part can carry a weight, e.g. `AKs:0.5`. A range expands to combos of
+two `poker.Card` ids with a weight.
+
+Range against range equity deals every board completion once, evaluates
+every combo of each range on every board in one batch with
+`hands.evaluate_batch`, and then compares the two strength matrices for every
+pair of combos at once, masking the boards and pairs that share a card.
+"""
+from itertools import combinations
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from poker_game import codec
+from poker_game import hands
+from poker_game import preflop
+from poker_game import streams
+from poker_game.poker import Deck, PokerEngine
+
+RANK_CHARS = preflop.RANK_CHARS
+NUM_RANKS = preflop.NUM_RANKS
+
+SUITED = 's'
+OFFSUIT = 'o'
+
+BOARD_SIZE = 5
+
+# Boards dealt when there are too many completions to walk.
+NUM_BOARDS = 2000
+
+# Most completions walked exactly, every turn and river of a flop.
+MAX_EXACT_BOARDS = 1 << 11
+
+# Combo pairs by board cells compared at once.
+BLOCK_CELLS = 1 << 22
+
+
+def _rank(char, part):
+    """
+    Returns the grid row of a rank character, the Ace is 0 and the 2 is 12.
+    """
+    row = RANK_CHARS.find(char.upper())
+    if row < 0:
+        raise ValueError("Bad rank {!r} in {!r}.".format(char, part))
+    return row
+
+
+def _classes(high, low, suitedness):
+    """
+    Returns the indexes of `preflop.HAND_CLASSES` of two grid rows.
+
+    Args:
+        high(int): The row of the higher card.
+        low(int): The row of the lower card.
+        suitedness(str | None): `SUITED`, `OFFSUIT` or `None` for both.
+
+    Returns:
+        list(int): The class indexes.
+    """
+    if high == low:
+        return [high * NUM_RANKS + high]
+    indexes = []
+    if suitedness != OFFSUIT:
+        indexes.append(high * NUM_RANKS + low)
+    if suitedness != SUITED:
+        indexes.append(low * NUM_RANKS + high)
+    return indexes
+
+
+def _parse_hand(text, part):
+    """
+    Parses a hand like 'AKs', 'AK' or 'QQ' into two rows and a suitedness,
+        the higher card first.
+    """
+    if len(text) not in (2, 3):
+        raise ValueError("Bad hand {!r} in {!r}.".format(text, part))
+    first = _rank(text[0], part)
+    second = _rank(text[1], part)
+    suitedness = text[2].lower() if len(text) == 3 else None
+    if suitedness not in (None, SUITED, OFFSUIT):
+        raise ValueError("Bad suitedness {!r} in {!r}.".format(text, part))
+    if first == second and suitedness is not None:
+        raise ValueError("Pairs are never suited in {!r}.".format(part))
+    return min(first, second), max(first, second), suitedness
+
+
+def parse_part(part):
+    """
+    Expands one part of a range into hand classes.
+
+    Args:
+        part(str): The part, without its weight, e.g. 'ATo+' or '76s-54s'.
+
+    Returns:
+        list(int): The indexes of `preflop.HAND_CLASSES`.
+
+    Raises:
+        ValueError: The part is not in range notation.
+    """
+    if part.endswith('+'):
+        high, low, suitedness = _parse_hand(part[:-1], part)
+        if high == low:
+            # Every pair from this one up to the Aces.
+            return [index for row in range(high, -1, -1)
+                    for index in _classes(row, row, None)]
+        # Every kicker from this one up to just below the top card.
+        return [index for row in range(low, high, -1)
+                for index in _classes(high, row, suitedness)]
+
+    if '-' in part:
+        start, end = part.split('-', 1)
+        high_1, low_1, suitedness = _parse_hand(start, part)
+        high_2, low_2, end_suitedness = _parse_hand(end, part)
+        if suitedness != end_suitedness:
+            raise ValueError("Mixed suitedness in {!r}.".format(part))
+
+        if high_1 == low_1 and high_2 == low_2:
+            rows = range(min(high_1, high_2), max(high_1, high_2) + 1)
+            return [index for row in rows
+                    for index in _classes(row, row, None)]
+        if high_1 == high_2:
+            rows = range(min(low_1, low_2), max(low_1, low_2) + 1)
+            return [index for row in rows
+                    for index in _classes(high_1, row, suitedness)]
+        if low_1 - high_1 == low_2 - high_2:
+            gap = low_1 - high_1
+            rows = range(min(high_1, high_2), max(high_1, high_2) + 1)
+            return [index for row in rows
+                    for index in _classes(row, row + gap, suitedness)]
+        raise ValueError("Bad span {!r}.".format(part))
+
+    high, low, suitedness = _parse_hand(part, part)
+    return _classes(high, low, suitedness)
+
+
+def parse_range(text, dead=()):
+    """
+    Expands a range into weighted combos.
+
+    Args:
+        text(str): The range, e.g. 'QQ+, AKs, ATo+, 76s-54s'.
+        dead(iterable(int)): Ids of cards no combo may hold.
+
+    Returns:
+        list(tuple(int, int, float)): The two card ids and the weight of
+            every combo. A combo named twice keeps its last weight.
+
+    Raises:
+        ValueError: The text is not in range notation.
+    """
+    dead_mask = codec.pack(dead)
+    weights = {}
+    order = []
+
+    for part in text.replace(' ', '').split(','):
+        if not part:
+            continue
+        weight = 1.0
+        if ':' in part:
+            part, weight_text = part.split(':', 1)
+            weight = float(weight_text)
+
+        if len(part) == 4 and part[1].lower() in codec.SUIT_CHARS:
+            # One combo, e.g. 'AhKd'.
+            try:
+                combos = [(codec.to_id(part[:2]), codec.to_id(part[2:]))]
+            except KeyError:
+                raise ValueError("Bad combo {!r}.".format(part))
+            if combos[0][0] == combos[0][1]:
+                raise ValueError("Bad combo {!r}.".format(part))
+        else:
+            combos = [combo for index in parse_part(part)
+                      for combo in preflop.class_combos(index)]
+
+        for card_1, card_2 in combos:
+            key = (min(card_1, card_2), max(card_1, card_2))
+            if key not in weights:
+                order.append(key)
+            weights[key] = weight
+
+    return [
+        (card_1, card_2, weights[(card_1, card_2)])
+        for card_1, card_2 in order
+        if weights[(card_1, card_2)] > 0 and not (
+            codec.CARD_MASKS[card_1] | codec.CARD_MASKS[card_2]) & dead_mask
+    ]
+
+
+class RangeEquity(object):
+    """
+    The equity of two ranges against each other.
+
+    Args:
+        equity(float): The share of the pot won by the first range.
+        weight(float): The weight of every pair of combos and board counted.
+        num_boards(int): The number of board completions used.
+        exact(bool): Whether every completion was walked.
+    """
+
+    def __init__(self, equity, weight, num_boards, exact):
+        self.equity = equity
+        self.weight = weight
+        self.num_boards = num_boards
+        self.exact = exact
+
+    def __str__(self):
+        equity_str = (
+            "Range 1: {equity:.2%}\n"
+            "Range 2: {other:.2%}\n"
+            "\tBoards: {boards} ({kind})\n"
+        ).format(
+            equity=self.equity,
+            other=1.0 - self.equity,
+            boards=self.num_boards,
+            kind='exact' if self.exact else 'sampled')
+        return equity_str
+
+
+def _as_combos(cards_range, dead):
+    """
+    Accepts a range as text or as combos and drops combos holding dead cards.
+    """
+    if isinstance(cards_range, str):
+        return parse_range(cards_range, dead)
+    dead_mask = codec.pack(dead)
+    combos = []
+    for combo in cards_range:
+        weight = combo[2] if len(combo) == 3 else 1.0
+        if not (codec.CARD_MASKS[combo[0]] |
+                codec.CARD_MASKS[combo[1]]) & dead_mask:
+            combos.append((combo[0], combo[1], weight))
+    return combos
+
+
+def _completions(board, known, num_boards, seed):
+    """
+    Lists the board completions, all of them when few enough, otherwise a
+        random sample.
+
+    Returns:
+        tuple(list(tuple(int)), bool): The completions and whether they are
+            all of them.
+    """
+    remaining = [card for card in range(PokerEngine.NUM_CARDS)
+                 if card not in known]
+    needed = BOARD_SIZE - len(board)
+
+    count = 1
+    for idx in range(needed):
+        count = count * (len(remaining) - idx) // (idx + 1)
+    if count <= MAX_EXACT_BOARDS:
+        return list(combinations(remaining, needed)), True
+
+    deck = Deck(streams.make_stream(seed, streams.RANDOM), remaining)
+    deals = deck.deal_many(num_boards, board_size=needed)
+    return [tuple(deals[start:start + needed])
+            for start in range(0, len(deals), needed)], False
+
+
+def range_equity(range_1, range_2, board=(), dead=(), num_boards=NUM_BOARDS,
+                 seed=None):
+    """
+    Computes the equity of one range against another.
+
+    Args:
+        range_1(str | list(tuple)): The first range, as text or as combos of
+            two card ids with an optional weight.
+        range_2(str | list(tuple)): The second range.
+        board(iterable(int)): The ids of the board cards showing.
+        dead(iterable(int)): Ids of other cards known to be out of the deck.
+        num_boards(int): Boards to deal when there are too many completions
+            to walk, e.g. preflop.
+        seed(int | None): Seed of the boards dealt, a random one when `None`.
+
+    Returns:
+        RangeEquity: The equity of the first range.
+
+    Raises:
+        RuntimeError: NumPy is not installed.
+        ValueError: The ranges cannot meet on this board.
+    """
+    if np is None:
+        raise RuntimeError("range_equity requires NumPy.")
+
+    board = list(board)
+    known = board + list(dead)
+    combos_1 = _as_combos(range_1, known)
+    combos_2 = _as_combos(range_2, known)
+    if not combos_1 or not combos_2:
+        raise ValueError("A range has no combo left.")
+
+    completions, exact = _completions(board, set(known), num_boards, seed)
+    num_completions = len(completions)
+    boards = np.empty((num_completions, BOARD_SIZE), dtype=np.int64)
+    boards[:, :len(board)] = board
+    boards[:, len(board):] = completions
+
+    card_masks = np.array(codec.CARD_MASKS, dtype=np.int64)
+    board_masks = card_masks[boards[:, len(board):]].sum(axis=1)
+
+    def strengths(combos):
+        holes = np.array([combo[:2] for combo in combos], dtype=np.int64)
+        # Every combo on every board, one row each.
+        matrix = hands.evaluate_batch(
+            np.repeat(holes, num_completions, axis=0),
+            np.tile(boards, (len(combos), 1)))
+        matrix = matrix.reshape(len(combos), num_completions)
+        masks = card_masks[holes].sum(axis=1)
+        weights = np.array([combo[2] for combo in combos])
+        live = (masks[:, None] & board_masks[None, :]) == 0
+        return matrix, masks, weights, live
+
+    matrix_1, masks_1, weights_1, live_1 = strengths(combos_1)
+    matrix_2, masks_2, weights_2, live_2 = strengths(combos_2)
+
+    # Compare blocks of the first range against all of the second.
+    block = max(1, BLOCK_CELLS // (len(combos_2) * num_completions))
+    won = 0.0
+    total = 0.0
+    for start in range(0, len(combos_1), block):
+        end = start + block
+        pair_weights = (
+            weights_1[start:end, None] * weights_2[None, :] *
+            ((masks_1[start:end, None] & masks_2[None, :]) == 0))
+        live = live_1[start:end, None, :] & live_2[None, :, :]
+        first = matrix_1[start:end, None, :]
+        second = matrix_2[None, :, :]
+        score = ((first > second).astype(np.float64) +
+                 0.5 * (first == second)) * live
+
+        won += (score.sum(axis=2) * pair_weights).sum()
+        total += (live.sum(axis=2) * pair_weights).sum()
+
+    if not total:
+        raise ValueError("The ranges share every card.")
+    return RangeEquity(won / total, total, num_completions, exact)
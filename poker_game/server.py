@@ -1,38 +1,582 @@
 """
 Poker Game Server
 =================
+An ASGI application hosting many tables, played by worker processes.
+
+Run it under any ASGI server, e.g.
+
+    uvicorn poker_game.server:app --host 0.0.0.0 --port 4040
+
+or with `python -m poker_game.server`, which starts uvicorn itself. The
+tables are played by `POKER_GAME_SHARDS` worker processes of a
+`shards.ShardManager`, which routes every request to the worker holding its
+table, so the ASGI server runs a single process. With
+`POKER_GAME_SNAPSHOT_DIR` set to a folder, every worker writes its tables
+there every `POKER_GAME_SNAPSHOT_INTERVAL` seconds and when it stops, and
+starts from it again, hands in play included, see `snapshots`. With
+`POKER_GAME_HISTORY_DIR` set to a folder, every worker logs the hands it
+plays there, see `history`.
+
+Routes:
+
+GET  /                      The game page, the production build when one
+                            was made with `python -m poker_game.assets`.
+GET  /static/<path>         Files under poker_game/static, served from
+                            memory, see `statics`. Built files are cached
+                            forever, everything else is revalidated with its
+                            ETag.
+GET  /tables                The state of every table.
+POST /tables                Creates a table, `{"bots": n}` seats n bots.
+GET  /tables/<id>           The state of one table.
+POST /tables/<id>/join      Sits a player, `{"name": ...}`, and returns the
+                            seat and the token to act with.
+POST /tables/<id>/act       `{"seat", "token", "action", "amount"}`.
+POST /evaluate              Evaluates a batch of hands, see `batch`. The body
+                            is JSON, or binary deals when its Content-Type is
+                            application/octet-stream. The results stream as
+                            NDJSON, or as binary when that is what the Accept
+                            header asks for.
+POST /equity                The equity of a spot, `{"hands": [["As", "Kd"],
+                            ...], "board", "dead", "iterations", "exact",
+                            "seed"}`, answered from a cache when it can be,
+                            see `spots`. Exact spots need a flop or more.
+GET  /equity                The counters of that cache.
+WS   /tables/<id>/feed      Pushes the table as deltas, see `feed`. Takes
+                            `?seq=` to resume and `?seat=&token=` to receive
+                            hole cards and send actions as JSON objects.
 """
-from flask import Flask, send_from_directory, request
+import os
+import asyncio
+import json
+import secrets
+from urllib.parse import parse_qs
+
+from poker_game import assets
+from poker_game import batch
+from poker_game import codec
+from poker_game import feed
+from poker_game import shards
+from poker_game import simulator
+from poker_game import snapshots
+from poker_game import spots
+from poker_game import statics
+
+STATIC_ROOT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# The game page under STATIC_ROOT, the production build when there is one.
+INDEX_PATH = 'html/main_game.html'
+BUILT_INDEX_PATH = '{}/{}'.format(assets.DIST_DIR, assets.INDEX_NAME)
+
+# Largest request body read, in bytes.
+MAX_BODY = 1 << 16
+
+# Largest batch body read, room for `batch.MAX_HANDS` deals as JSON.
+MAX_BATCH_BODY = 1 << 23
+
+# Close codes of a refused WebSocket.
+WS_NOT_FOUND = 4404
+WS_FORBIDDEN = 4403
+
+# Whether static files are read again when they change, for development.
+STATIC_WATCH = os.environ.get('POKER_GAME_STATIC_WATCH') == '1'
+
+# Tables opened when the server starts, full of bots, from the environment.
+START_TABLES = int(os.environ.get('POKER_GAME_TABLES', '0'))
+START_BOTS = int(os.environ.get('POKER_GAME_BOTS', '0'))
+
+# Worker processes playing the tables.
+SHARDS = int(os.environ.get('POKER_GAME_SHARDS', '1'))
+
+# The folder of the snapshots of the tables, none when empty.
+SNAPSHOT_DIR = os.environ.get('POKER_GAME_SNAPSHOT_DIR', '')
+SNAPSHOT_INTERVAL = float(os.environ.get(
+    'POKER_GAME_SNAPSHOT_INTERVAL', snapshots.SNAPSHOT_INTERVAL))
+
+# The folder of the hand history, none when empty.
+HISTORY_DIR = os.environ.get('POKER_GAME_HISTORY_DIR', '')
+
+
+class HTTPError(Exception):
+    """
+    An error answered with an HTTP status.
+
+    Args:
+        status(int): The HTTP status.
+        message(str): The reason sent to the client.
+    """
+
+    def __init__(self, status, message):
+        super(HTTPError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+def header(scope, name, default=''):
+    """
+    Returns the value of a request header, `name` in lower case.
+    """
+    name = name.encode('latin-1')
+    for key, value in scope.get('headers', ()):
+        if key.lower() == name:
+            return value.decode('latin-1')
+    return default
+
+
+async def read_body(receive, max_body=MAX_BODY):
+    """
+    Reads the whole body of a request.
+
+    Args:
+        receive(function): The ASGI receive channel.
+        max_body(int): The largest body read, in bytes.
+
+    Raises:
+        HTTPError: The body is too large.
+    """
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+        if len(body) > max_body:
+            raise HTTPError(413, "Request body is too large.")
+    return body
+
+
+async def read_json(receive):
+    """
+    Reads the body of a request as a JSON object.
+
+    Raises:
+        HTTPError: The body is not a JSON object.
+    """
+    body = await read_body(receive)
+    if not body:
+        return {}
+    try:
+        data = json.loads(body.decode('utf-8'))
+    except ValueError:
+        raise HTTPError(400, "Request body is not JSON.")
+    if not isinstance(data, dict):
+        raise HTTPError(400, "Request body is not a JSON object.")
+    return data
+
+
+async def send_response(send, status, body, content_type, headers=()):
+    """
+    Sends a complete response.
+
+    Args:
+        send(function): The ASGI send channel.
+        status(int): The HTTP status.
+        body(bytes): The body.
+        content_type(str): The content type of the body.
+        headers(iterable(tuple(bytes, bytes))): Other headers.
+    """
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode('latin-1')),
+            (b'content-length', str(len(body)).encode('latin-1'))
+        ] + list(headers)
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, data, status=200):
+    await send_response(
+        send, status,
+        json.dumps(data, separators=(',', ':')).encode('utf-8'),
+        'application/json')
+
+
+async def send_stream(send, chunks, content_type):
+    """
+    Sends a response whose body is sent chunk by chunk as it is made, with no
+    length, so the server sends it chunked.
+
+    Args:
+        send(function): The ASGI send channel.
+        chunks(async_generator(bytes)): The parts of the body.
+        content_type(str): The content type of the body.
+    """
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', content_type.encode('latin-1'))]
+    })
+    async for chunk in chunks:
+        await send({'type': 'http.response.body', 'body': chunk,
+                    'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
 
-app = Flask(__name__)
 
+async def send_static(scope, send, static_file):
+    """
+    Sends a file from memory in the best encoding the client accepts, or an
+    empty 304 when the client holds this version.
 
-@app.route('/')
-def index():
-    return send_from_directory('static', 'html/main_game.html')
+    Args:
+        scope(dict): The request.
+        send(function): The ASGI send channel.
+        static_file(statics.StaticFile): The file.
+    """
+    encoding, body, etag = static_file.choose(
+        header(scope, 'accept-encoding'))
+    headers = [(b'etag', etag.encode('latin-1')),
+               (b'cache-control', static_file.cache_control.encode('latin-1'))]
+    if static_file.varies():
+        headers.append((b'vary', b'Accept-Encoding'))
+
+    if statics.etag_matches(header(scope, 'if-none-match'), etag):
+        await send({'type': 'http.response.start', 'status': 304,
+                    'headers': headers})
+        return await send({'type': 'http.response.body', 'body': b''})
+
+    if encoding != statics.IDENTITY:
+        headers.append((b'content-encoding', encoding.encode('latin-1')))
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', static_file.content_type.encode('latin-1')),
+            (b'content-length', str(len(body)).encode('latin-1'))
+        ] + headers
+    })
+    await send({'type': 'http.response.body',
+                'body': b'' if scope['method'] == 'HEAD' else body})
+
+
+class PokerApp(object):
+    """
+    The ASGI application.
+
+    Args:
+        shards(shards.ShardManager | None): The started workers playing the
+            tables, started on startup when `None`.
+        evaluator(batch.BatchEvaluator | None): Evaluates batches of hands,
+            on every core when `None`.
+        equity(spots.EquityService | None): Answers equity queries, on every
+            core when `None`.
+        static(statics.StaticIndex | None): The static files, those under
+            `STATIC_ROOT` when `None`.
+    """
+
+    def __init__(self, shards=None, evaluator=None, equity=None, static=None):
+        self.shards = shards
+        self.static = static or statics.StaticIndex(STATIC_ROOT, STATIC_WATCH)
+        self.evaluator = evaluator or batch.BatchEvaluator()
+        self.equity_service = equity or spots.EquityService()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'websocket':
+            await self.websocket(scope, receive, send)
+        elif scope['type'] == 'http':
+            try:
+                await self.http(scope, receive, send)
+            except HTTPError as error:
+                await send_json(send, {'error': error.message}, error.status)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.shards is not None:
+                    # Waits for every worker to write its last snapshot.
+                    await asyncio.get_event_loop().run_in_executor(
+                        None, self.shards.close)
+                self.evaluator.close()
+                self.equity_service.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def startup(self):
+        """
+        Reads the static files and starts the workers, which open the tables
+        of their snapshots, or else opens the starting tables.
+        """
+        self.static.load()
+        if self.shards is None:
+            self.shards = shards.ShardManager(
+                SHARDS, snapshot_dir=SNAPSHOT_DIR or None,
+                snapshot_interval=SNAPSHOT_INTERVAL,
+                history_dir=HISTORY_DIR or None)
+            await asyncio.get_event_loop().run_in_executor(
+                None, self.shards.start)
+        if not self.shards.locations:
+            for _ in range(START_TABLES):
+                await self.create_table(START_BOTS)
+
+    async def create_table(self, bots=0):
+        """
+        Returns:
+            dict: The state of the new table.
+        """
+        return await asyncio.wrap_future(self.shards.create(bots))
+
+    async def call_table(self, table_id, command, *args):
+        """
+        Runs a request on the worker holding a table, see
+        `shards.ShardManager.call_table`.
+
+        Raises:
+            HTTPError: No such table.
+        """
+        try:
+            future = self.shards.call_table(int(table_id), command, *args)
+        except (KeyError, ValueError):
+            raise HTTPError(404, "No table {}.".format(table_id))
+        try:
+            return await asyncio.wrap_future(future)
+        except KeyError:
+            raise HTTPError(404, "No table {}.".format(table_id))
+
+    async def websocket(self, scope, receive, send):
+        """
+        Pushes the feed of a table to a WebSocket and takes the actions of a
+        seated player from it.
+        """
+        message = await receive()
+        if message['type'] != 'websocket.connect':
+            return
+
+        parts = [part for part in scope['path'].split('/') if part]
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        try:
+            if len(parts) != 3 or parts[0] != 'tables' or parts[2] != 'feed':
+                raise KeyError(scope['path'])
+            table_id = int(parts[1])
+            last_seq = int(query['seq'][0]) if 'seq' in query else None
+            seat = int(query['seat'][0]) if 'seat' in query else None
+            token = query.get('token', [None])[0]
+            subscription, subscribed = self.shards.subscribe(
+                table_id, last_seq, seat, token)
+        except (KeyError, ValueError):
+            return await send({'type': 'websocket.close',
+                               'code': WS_NOT_FOUND})
+        try:
+            await asyncio.wrap_future(subscribed)
+        except (KeyError, PermissionError) as error:
+            subscription.close()
+            return await send({
+                'type': 'websocket.close',
+                'code': WS_FORBIDDEN if isinstance(error, PermissionError)
+                else WS_NOT_FOUND})
+
+        await send({'type': 'websocket.accept'})
+
+        async def push():
+            # A slow client holds up only this task, see
+            # `shards.Subscription`.
+            while True:
+                message = await subscription.next()
+                await send({'type': 'websocket.send',
+                            'text': feed.encode(message)})
+
+        pusher = asyncio.ensure_future(push())
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                if seat is None or message.get('text') is None:
+                    continue
+                try:
+                    data = json.loads(message['text'])
+                    await self.call_table(
+                        table_id, 'act', seat, data.get('action'),
+                        int(data.get('amount', 0)), token)
+                except (AttributeError, HTTPError, TypeError,
+                        ValueError) as error:
+                    subscription.push([subscription.seq, 'e', str(error)])
+        finally:
+            pusher.cancel()
+            subscription.close()
+
+    async def evaluate(self, scope, receive, send):
+        """
+        Evaluates a batch of hands, streaming the results as they are made.
+        """
+        body = await read_body(receive, MAX_BATCH_BODY)
+        try:
+            if header(scope, 'content-type').startswith(batch.BINARY):
+                deals = batch.parse_binary(body)
+            else:
+                deals = batch.parse_json(json.loads(body.decode('utf-8')))
+        except ValueError as error:
+            raise HTTPError(400, str(error))
+
+        content_type = batch.NDJSON
+        if batch.BINARY in header(scope, 'accept'):
+            content_type = batch.BINARY
+        encode = batch.ENCODERS[content_type]
+
+        async def chunks():
+            async for results in self.evaluator.evaluate(deals):
+                yield encode(results)
+
+        await send_stream(send, chunks(), content_type)
+
+    async def equity(self, receive, send):
+        """
+        Answers an equity query.
+        """
+        data = await read_json(receive)
+        try:
+            hole_cards = [[codec.to_id(card) for card in hole]
+                          for hole in data.get('hands', [])]
+            board = [codec.to_id(card) for card in data.get('board', [])]
+            dead = [codec.to_id(card) for card in data.get('dead', [])]
+            seed = data.get('seed')
+            result, cached = await self.equity_service.equity(
+                hole_cards, board, dead,
+                int(data.get('iterations', spots.DEFAULT_ITERATIONS)),
+                bool(data.get('exact', False)),
+                None if seed is None else int(seed))
+        except (KeyError, TypeError, ValueError) as error:
+            raise HTTPError(400, "Bad spot: {}".format(error))
+
+        return await send_json(send, {
+            'players': [
+                {'hand': hand, 'win': win, 'tie': tie, 'equity': share,
+                 'stderr': stderr}
+                for hand, (win, tie, share, stderr) in zip(
+                    data['hands'], result['players'])
+            ],
+            'trials': result['trials'],
+            'exact': result['exact'],
+            'cached': cached
+        })
+
+    async def http(self, scope, receive, send):
+        method = scope['method']
+        parts = [part for part in scope['path'].split('/') if part]
+
+        if method in ('GET', 'HEAD') and (not parts or parts[0] == 'static'):
+            if parts:
+                static_file = self.static.get('/'.join(parts[1:]))
+            else:
+                static_file = (self.static.get(BUILT_INDEX_PATH) or
+                               self.static.get(INDEX_PATH))
+            if static_file is None:
+                raise HTTPError(404, "Not found.")
+            return await send_static(scope, send, static_file)
+        if method == 'POST' and parts == ['evaluate']:
+            return await self.evaluate(scope, receive, send)
+        if parts == ['equity']:
+            if method == 'GET':
+                return await send_json(send, self.equity_service.stats())
+            return await self.equity(receive, send)
+
+        if parts[:1] != ['tables'] or len(parts) > 3:
+            raise HTTPError(404, "Not found.")
+
+        if len(parts) == 1:
+            if method == 'GET':
+                states = await asyncio.gather(*[
+                    asyncio.wrap_future(future)
+                    for future in self.shards.call_all('states')])
+                return await send_json(send, sorted(
+                    (state for worker in states for state in worker),
+                    key=lambda state: state['table']))
+            if method == 'POST':
+                data = await read_json(receive)
+                try:
+                    bots = int(data.get('bots', 0))
+                except (TypeError, ValueError) as error:
+                    raise HTTPError(400, "Bad bots: {}".format(error))
+                if bots < 0:
+                    raise HTTPError(400, "Bad bots: {} is negative.".format(
+                        bots))
+                state = await self.create_table(bots)
+                return await send_json(send, state, 201)
+
+        if len(parts) == 2 and method == 'GET':
+            return await send_json(
+                send, await self.call_table(parts[1], 'state'))
+
+        if len(parts) == 3 and method == 'POST':
+            data = await read_json(receive)
+            if parts[2] == 'join':
+                token = secrets.token_hex(16)
+                try:
+                    seat = await self.call_table(
+                        parts[1], 'join', str(data.get('name', 'Player')),
+                        simulator.STARTING_STACK, None, token)
+                except ValueError as error:
+                    raise HTTPError(409, str(error))
+                return await send_json(send, {'seat': seat, 'token': token})
+            if parts[2] == 'act':
+                try:
+                    await self.call_table(
+                        parts[1], 'act', int(data.get('seat', -1)),
+                        data.get('action'), int(data.get('amount', 0)),
+                        data.get('token'))
+                except (TypeError, ValueError) as error:
+                    raise HTTPError(400, str(error))
+                return await send_json(send, {'queued': True}, 202)
+
+        raise HTTPError(405, "Method not allowed.")
+
+
+app = PokerApp()
 
 
 def main(args):
-    app.run(
-        host='0.0.0.0',
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit(
+            "Serving needs an ASGI server, e.g. pip install uvicorn.")
+
+    if args.debug:
+        os.environ['POKER_GAME_STATIC_WATCH'] = '1'
+    os.environ['POKER_GAME_SHARDS'] = str(args.shards)
+    if args.snapshot:
+        os.environ['POKER_GAME_SNAPSHOT_DIR'] = args.snapshot
+    # One process, as requests reach a table through its shard worker.
+    uvicorn.run(
+        'poker_game.server:app',
+        host=args.host,
         port=args.port,
-        threaded=False,
-        debug=args.debug)
+        log_level='debug' if args.debug else 'info')
 
 
 if(__name__ == "__main__"):
     import argparse
     parser = argparse.ArgumentParser()
 
+    parser.add_argument(
+        '--host',
+        help="Address that the server will listen on.",
+        default='0.0.0.0')
     parser.add_argument(
         '-p', '--port',
         help="Port that the server will run on.",
         type=int,
         default=4040)
+    parser.add_argument(
+        '-w', '--shards',
+        help="Number of worker processes playing the tables.",
+        type=int,
+        default=SHARDS)
+    parser.add_argument(
+        '-s', '--snapshot',
+        help="Folder the tables are kept in across restarts.",
+        default='')
     parser.add_argument(
         '-d', '--debug',
-        help="Whether or not to run in debug mode.",
-        default=True,
+        help="Whether or not to run in debug mode, reading static files "
+             "again when they change.",
+        default=False,
         action='store_true')
 
     args = parser.parse_args()
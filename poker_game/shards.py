@@ -0,0 +1,722 @@
+"""
+Shards
+======
+Spreads tables over worker processes, each playing its share on its own
+event loop with a `tables.Lobby`.
+
+A table id is pinned to a worker by consistent hashing: every worker owns
+many points on a ring of hashes and a table belongs to the worker owning the
+first point at or after the hash of its id. Every request for a table goes
+to that worker, which holds the table in memory. When a worker is added or
+removed only the tables whose owner changed move, each between hands: the
+table plays out its hand, still taking actions, and only the requests sent
+while it is handed over are held back, then sent on to its new worker.
+
+The manager talks to the workers over `multiprocessing` queues, one per
+worker for requests and one shared for the replies, so no broker is needed.
+A worker answers every request in a task of its own. `call_table` and the
+other `call` methods return a `concurrent.futures.Future`, which an asyncio
+server awaits with `asyncio.wrap_future`; `state`, `join` and the like wait
+for it. The feed of a table, see `feed`, is kept by its worker and pushed to
+a `Subscription` of the manager, which follows the table when it moves.
+
+Given a folder for snapshots, every worker keeps its tables in a file of its
+own there, see `snapshots`, and a manager started again with the same folder
+and workers plays on every hand where it stopped. Given a folder for the
+hand history, every worker logs the hands it plays in a log of its own
+there, see `history`.
+"""
+import asyncio
+import bisect
+import hashlib
+import itertools
+import multiprocessing
+import os
+import threading
+
+from poker_game import feed
+from poker_game import history
+from poker_game import simulator
+from poker_game import snapshots
+from poker_game import streams
+from poker_game import tables
+from concurrent.futures import Future
+
+# Points of each worker on the ring.
+REPLICAS = 100
+
+# Errors raised in a worker and raised again by the manager.
+ERRORS = {
+    'KeyError': KeyError,
+    'PermissionError': PermissionError,
+    'ValueError': ValueError,
+}
+
+# The kinds of message a worker sends the manager.
+REPLY = 'reply'
+PUSH = 'push'
+
+
+def ring_hash(key):
+    """
+    Hashes a key to a point on the ring, the same in every process.
+    """
+    digest = hashlib.md5(str(key).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class HashRing(object):
+    """
+    A consistent hash ring of nodes.
+
+    Args:
+        nodes(iterable): The nodes.
+        replicas(int): Points of each node on the ring.
+    """
+
+    def __init__(self, nodes=(), replicas=REPLICAS):
+        self.replicas = replicas
+        self.points = []
+        self.owners = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        for replica in range(self.replicas):
+            point = ring_hash('{}:{}'.format(node, replica))
+            bisect.insort(self.points, point)
+            self.owners[point] = node
+
+    def remove(self, node):
+        for replica in range(self.replicas):
+            point = ring_hash('{}:{}'.format(node, replica))
+            self.points.pop(bisect.bisect_left(self.points, point))
+            del self.owners[point]
+
+    def nodes(self):
+        return set(self.owners.values())
+
+    def node_for(self, key):
+        """
+        Returns the node owning a key.
+
+        Raises:
+            KeyError: The ring is empty.
+        """
+        if not self.points:
+            raise KeyError("The ring has no nodes.")
+        idx = bisect.bisect(self.points, ring_hash(key)) % len(self.points)
+        return self.owners[self.points[idx]]
+
+
+class Worker(object):
+    """
+    The tables of one worker process, answering the requests of the manager
+    and pushing the feeds of its tables back to it.
+
+    Args:
+        lobby(tables.Lobby): The tables, on the running loop.
+        replies(multiprocessing.Queue): The replies and pushes to the manager.
+    """
+
+    def __init__(self, lobby, replies):
+        self.lobby = lobby
+        self.replies = replies
+        self.feeds = {}
+        # The table, client and pushing task of every subscription.
+        self.subscriptions = {}
+
+    def feed(self, table):
+        """
+        Returns the feed of a table, made on first use.
+        """
+        if table.table_id not in self.feeds:
+            self.feeds[table.table_id] = feed.TableFeed(table)
+        return self.feeds[table.table_id]
+
+    async def run(self, requests):
+        """
+        Answers requests until it is sent `None`, each in a task of its own
+        so a request waiting on a hand holds up no other.
+        """
+        loop = asyncio.get_event_loop()
+        running = set()
+        while True:
+            # The queue blocks, so wait for it on a thread.
+            message = await loop.run_in_executor(None, requests.get)
+            if message is None:
+                break
+            task = asyncio.ensure_future(self.answer(*message))
+            running.add(task)
+            task.add_done_callback(running.discard)
+        for sub_id in list(self.subscriptions):
+            self.unsubscribe(sub_id)
+        if running:
+            await asyncio.wait(running)
+
+    async def answer(self, request_id, command, args):
+        try:
+            result = await self.handle(command, args)
+        except Exception as error:
+            self.replies.put((REPLY, request_id, False,
+                              (type(error).__name__, str(error))))
+        else:
+            self.replies.put((REPLY, request_id, True, result))
+
+    async def handle(self, command, args):
+        """
+        Runs one request of the manager.
+        """
+        lobby = self.lobby
+        if command == 'tables':
+            return sorted(lobby.tables)
+        if command == 'states':
+            return [table.state() for table in lobby.tables.values()]
+        if command == 'adopt':
+            data = args[0]
+            table = lobby.adopt(data)
+            # Numbers the feed on from where it was, for clients resuming.
+            self.feed(table).seq = data.get('seq', 0)
+            return table.state()
+        if command == 'create':
+            table_id, bots = args
+            table = lobby.create_table(table_id)
+            for bot in range(min(bots, len(table.seats))):
+                table.join('Bot {}'.format(bot),
+                           strategy=simulator.raise_strong)
+            return table.state()
+        if command == 'unsubscribe':
+            # The table may have gone, taking the subscription with it.
+            self.unsubscribe(args[1])
+            return None
+
+        table = lobby.get(args[0])
+        if command == 'state':
+            return table.state()
+        if command == 'join':
+            name, stack, strategy, token = args[1:]
+            if strategy is not None:
+                strategy = simulator.STRATEGIES[strategy]
+            return table.join(name, stack, strategy, token)
+        if command == 'leave':
+            return table.leave(args[1])
+        if command == 'act':
+            return table.act(*args[1:])
+        if command == 'subscribe':
+            return self.subscribe(table, *args[1:])
+        if command == 'snapshot':
+            return self.feed(table).snapshot(args[1])
+        if command == 'drain':
+            # Plays out the hand, still taking actions, and deals no other.
+            await table.stop()
+            return table.hand_count
+        if command == 'export':
+            await table.stop()
+            for sub_id, subscription in list(self.subscriptions.items()):
+                if subscription[0] == table.table_id:
+                    self.unsubscribe(sub_id)
+            del lobby.tables[table.table_id]
+            table_feed = self.feeds.pop(table.table_id, None)
+            return dict(table.export(),
+                        seq=table_feed.seq if table_feed is not None else 0)
+        raise ValueError("Unknown command {!r}.".format(command))
+
+    def subscribe(self, table, sub_id, last_seq, seat, token):
+        """
+        Pushes the feed of a table to the manager, see
+        `feed.TableFeed.subscribe`. Subscribing again with an id replaces it.
+
+        Raises:
+            PermissionError: The token is not that of the seat.
+        """
+        if seat is not None and not table.authorized(seat, token):
+            raise PermissionError(
+                "Seat {} has another token.".format(seat))
+        self.unsubscribe(sub_id)
+        table_feed = self.feed(table)
+        subscriber = table_feed.subscribe(last_seq, seat)
+        task = asyncio.ensure_future(self.push(sub_id, subscriber))
+        self.subscriptions[sub_id] = (table.table_id, subscriber, task)
+        return table_feed.seq
+
+    async def push(self, sub_id, subscriber):
+        while True:
+            message = await subscriber.next()
+            self.replies.put((PUSH, sub_id, message))
+
+    def unsubscribe(self, sub_id):
+        if sub_id not in self.subscriptions:
+            return
+        table_id, subscriber, task = self.subscriptions.pop(sub_id)
+        task.cancel()
+        if table_id in self.feeds:
+            self.feeds[table_id].unsubscribe(subscriber)
+
+
+def snapshot_path(snapshot_dir, worker_id):
+    return os.path.join(snapshot_dir, 'worker-{}.snapshot'.format(worker_id))
+
+
+def history_path(history_dir, worker_id):
+    return os.path.join(history_dir, 'worker-{}'.format(worker_id))
+
+
+async def _serve_async(worker_id, requests, replies, entropy, kind,
+                       table_options, snapshot_dir, snapshot_interval,
+                       history_dir):
+    writer = None
+    if history_dir is not None:
+        writer = history.HistoryWriter(history_path(history_dir, worker_id))
+    lobby = tables.Lobby(entropy, kind, writer, **table_options)
+    snapshotter = None
+    if snapshot_dir is not None:
+        path = snapshot_path(snapshot_dir, worker_id)
+        if os.path.exists(path):
+            snapshots.restore(lobby, path)
+        snapshotter = snapshots.Snapshotter(lobby, path, snapshot_interval)
+        snapshotter.start()
+    try:
+        await Worker(lobby, replies).run(requests)
+    finally:
+        if snapshotter is not None:
+            await snapshotter.close()
+        await lobby.close()
+        if writer is not None:
+            writer.close()
+
+
+def serve(worker_id, requests, replies, entropy, kind, table_options,
+          snapshot_dir=None, snapshot_interval=snapshots.SNAPSHOT_INTERVAL,
+          history_dir=None):
+    """
+    Runs a worker until it is sent `None`.
+
+    Args:
+        worker_id(int): The id of the worker.
+        requests(multiprocessing.Queue): The requests of the manager, each
+            an id, a command and its arguments.
+        replies(multiprocessing.Queue): The replies, each `REPLY`, the id of
+            the request, whether it succeeded and its result or error, and
+            the feed messages, each `PUSH`, the id of the subscription and
+            the message.
+        entropy(int): The entropy of every table stream, shared by every
+            worker so a table deals the same wherever it is.
+        kind(str | None): The kind of stream, see `streams`.
+        table_options(dict): Options of every new `tables.Table`.
+        snapshot_dir(str | None): The folder of the snapshot of the worker,
+            none when `None`.
+        snapshot_interval(float): Seconds between snapshots.
+        history_dir(str | None): The folder of the hand history of every
+            worker, see `history`, none when `None`.
+    """
+    asyncio.run(_serve_async(worker_id, requests, replies, entropy, kind,
+                             table_options, snapshot_dir, snapshot_interval,
+                             history_dir))
+
+
+class Subscription(object):
+    """
+    The feed of a table pushed from its worker to one client, see
+    `ShardManager.subscribe`. It lags like a `feed.Subscriber`, then fetches
+    a snapshot from the worker.
+
+    Args:
+        manager(ShardManager): The manager.
+        table_id(int): The table.
+        seat(int | None): The seat of the client, when it plays.
+        token(str | None): The token of the seat.
+        queue_size(int): Messages queued before the client lags.
+    """
+
+    def __init__(self, manager, table_id, seat=None, token=None,
+                 queue_size=feed.QUEUE_SIZE):
+        self.manager = manager
+        self.table_id = table_id
+        self.seat = seat
+        self.token = token
+        self.sub_id = None
+        self.loop = asyncio.get_event_loop()
+        self.queue = asyncio.Queue(queue_size)
+        self.lagged = False
+        # The last sequence number pushed, and the one of the last snapshot.
+        self.seq = 0
+        self.skip_to = -1
+
+    def deliver(self, message):
+        """
+        Queues a message from the thread reading the workers.
+        """
+        self.seq = message[0]
+        self.loop.call_soon_threadsafe(self.push, message)
+
+    def push(self, message):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def next(self):
+        """
+        Waits for the next message to send.
+
+        Returns:
+            list: The message, a snapshot when the client fell behind.
+        """
+        while True:
+            if self.lagged:
+                while not self.queue.empty():
+                    self.queue.get_nowait()
+                self.lagged = False
+                snapshot = await asyncio.wrap_future(self.manager.call_table(
+                    self.table_id, 'snapshot', self.seat))
+                # Drops what was pushed before the snapshot was taken.
+                self.skip_to = snapshot[0]
+                return snapshot
+            message = await self.queue.get()
+            if message[0] > self.skip_to or message[1] in ('S', 'e'):
+                return message
+
+    def close(self):
+        self.manager.unsubscribe(self)
+
+
+class ShardManager(object):
+    """
+    Routes the tables of many worker processes.
+
+    Args:
+        num_workers(int | None): Workers started, one per core when `None`.
+        seed(int | None): The entropy of every table stream, fresh when
+            `None`.
+        kind(str | None): The kind of stream, see `streams`.
+        replicas(int): Points of each worker on the ring.
+        snapshot_dir(str | None): The folder the workers keep their tables
+            in across restarts, none when `None`.
+        snapshot_interval(float): Seconds between snapshots.
+        history_dir(str | None): The folder every worker logs the hands it
+            plays in, a log of its own each, none when `None`.
+        table_options(dict): Options of every new `tables.Table`.
+    """
+
+    def __init__(self, num_workers=None, seed=None, kind=None,
+                 replicas=REPLICAS, snapshot_dir=None,
+                 snapshot_interval=snapshots.SNAPSHOT_INTERVAL,
+                 history_dir=None, **table_options):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.entropy = streams.new_entropy() if seed is None else seed
+        self.kind = kind
+        self.table_options = table_options
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_interval = snapshot_interval
+        self.history_dir = history_dir
+        self.ring = HashRing(replicas=replicas)
+
+        self.workers = {}
+        # The worker holding every table.
+        self.locations = {}
+        # The requests held back for every table being moved, sent to it
+        # once it has.
+        self.moving = {}
+        self.subscriptions = {}
+        self.replies = multiprocessing.Queue()
+        self.pending = {}
+        self.reader = None
+        # Held only while routing and queueing, so a request and the move of
+        # its table happen one before the other.
+        self.lock = threading.Lock()
+        # Held while tables move, one rebalance at a time.
+        self.rebalancing = threading.Lock()
+        self._worker_ids = itertools.count()
+        self._request_ids = itertools.count()
+        self._table_ids = itertools.count()
+        self._sub_ids = itertools.count()
+
+    def start(self):
+        """
+        Starts the workers and the thread reading their replies, and finds
+        the tables they restored from their snapshots.
+        """
+        if self.snapshot_dir is not None:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+        self.reader = threading.Thread(target=self._read_replies, daemon=True)
+        self.reader.start()
+        for _ in range(self.num_workers):
+            self._spawn()
+        if self.snapshot_dir is not None:
+            for worker_id in list(self.workers):
+                for table_id in self.call(worker_id, 'tables').result():
+                    self.locations[table_id] = worker_id
+            if self.locations:
+                self._table_ids = itertools.count(max(self.locations) + 1)
+            self.rebalance()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _spawn(self):
+        worker_id = next(self._worker_ids)
+        requests = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=serve, daemon=True,
+            args=(worker_id, requests, self.replies, self.entropy, self.kind,
+                  self.table_options, self.snapshot_dir,
+                  self.snapshot_interval, self.history_dir))
+        process.start()
+        with self.lock:
+            self.workers[worker_id] = (process, requests)
+            self.ring.add(worker_id)
+        return worker_id
+
+    def _read_replies(self):
+        while True:
+            reply = self.replies.get()
+            if reply is None:
+                return
+            if reply[0] == PUSH:
+                _, sub_id, message = reply
+                with self.lock:
+                    subscription = self.subscriptions.get(sub_id)
+                if subscription is not None:
+                    subscription.deliver(message)
+                continue
+            _, request_id, ok, result = reply
+            with self.lock:
+                future = self.pending.pop(request_id)
+            if ok:
+                future.set_result(result)
+            else:
+                name, message = result
+                future.set_exception(ERRORS.get(name, RuntimeError)(message))
+
+    def _send(self, worker_id, future, command, args):
+        # The caller holds the lock.
+        request_id = next(self._request_ids)
+        self.pending[request_id] = future
+        self.workers[worker_id][1].put((request_id, command, args))
+        return future
+
+    def call(self, worker_id, command, *args):
+        """
+        Sends a request to a worker.
+
+        Returns:
+            concurrent.futures.Future: The result of the request.
+        """
+        with self.lock:
+            return self._send(worker_id, Future(), command, args)
+
+    def call_all(self, command, *args):
+        """
+        Sends a request to every worker.
+
+        Returns:
+            list(concurrent.futures.Future): The result of every worker.
+        """
+        with self.lock:
+            return [self._send(worker_id, Future(), command, args)
+                    for worker_id in sorted(self.workers)]
+
+    def call_table(self, table_id, command, *args):
+        """
+        Sends a request to the worker holding a table, or holds it back
+        while the table moves.
+
+        Returns:
+            concurrent.futures.Future: The result of the request.
+
+        Raises:
+            KeyError: No such table.
+        """
+        future = Future()
+        args = (table_id,) + args
+        with self.lock:
+            if table_id not in self.locations:
+                raise KeyError("No table {}.".format(table_id))
+            if table_id in self.moving:
+                self.moving[table_id].append((future, command, args))
+                return future
+            # Queues keep their order, so it reaches the table before any
+            # later export of it.
+            return self._send(self.locations[table_id], future, command, args)
+
+    def route(self, table_id):
+        """
+        Returns the worker a table belongs on.
+        """
+        return self.ring.node_for(table_id)
+
+    def create(self, bots=0):
+        """
+        Creates a table on the worker it belongs on.
+
+        Returns:
+            concurrent.futures.Future: The state of the table.
+        """
+        with self.lock:
+            table_id = next(self._table_ids)
+            worker_id = self.route(table_id)
+            self.locations[table_id] = worker_id
+            return self._send(worker_id, Future(), 'create', (table_id, bots))
+
+    def create_table(self, bots=0):
+        """
+        Creates a table and waits for it.
+
+        Returns:
+            dict: The state of the table.
+        """
+        return self.create(bots).result()
+
+    def state(self, table_id):
+        return self.call_table(table_id, 'state').result()
+
+    def join(self, table_id, name, stack=simulator.STARTING_STACK,
+             strategy=None, token=None):
+        """
+        Sits a player, see `tables.Table.join`.
+
+        Args:
+            strategy(str | None): The name of the strategy of a bot, see
+                `simulator.STRATEGIES`.
+        """
+        return self.call_table(
+            table_id, 'join', name, stack, strategy, token).result()
+
+    def leave(self, table_id, seat):
+        return self.call_table(table_id, 'leave', seat).result()
+
+    def act(self, table_id, seat, action, amount=0, token=None):
+        return self.call_table(
+            table_id, 'act', seat, action, amount, token).result()
+
+    def subscribe(self, table_id, last_seq=None, seat=None, token=None):
+        """
+        Pushes the feed of a table to a client on the running loop, see
+        `feed.TableFeed.subscribe`.
+
+        Returns:
+            tuple(Subscription, concurrent.futures.Future): The client, and
+                the answer of the worker, failing with `KeyError` for no such
+                table and `PermissionError` for a wrong token.
+        """
+        subscription = Subscription(self, table_id, seat, token)
+        with self.lock:
+            subscription.sub_id = next(self._sub_ids)
+            self.subscriptions[subscription.sub_id] = subscription
+        try:
+            future = self.call_table(table_id, 'subscribe',
+                                     subscription.sub_id, last_seq, seat,
+                                     token)
+        except KeyError:
+            self.unsubscribe(subscription)
+            raise
+        return subscription, future
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            if self.subscriptions.pop(subscription.sub_id, None) is None:
+                return
+        try:
+            self.call_table(subscription.table_id, 'unsubscribe',
+                            subscription.sub_id)
+        except KeyError:
+            pass
+
+    def migrate(self, table_id, owner):
+        """
+        Moves a table to another worker between hands. Requests for it reach
+        it while its hand plays out and are held back only while it moves.
+        """
+        with self.lock:
+            location = self.locations[table_id]
+        self.call(location, 'drain', table_id).result()
+        with self.lock:
+            self.moving[table_id] = []
+        try:
+            data = self.call(location, 'export', table_id).result()
+            try:
+                self.call(owner, 'adopt', data).result()
+            except Exception:
+                # Plays on where it was.
+                self.call(location, 'adopt', data).result()
+                raise
+            location = owner
+        finally:
+            with self.lock:
+                self.locations[table_id] = location
+                held = self.moving.pop(table_id)
+                for subscription in self.subscriptions.values():
+                    if subscription.table_id == table_id:
+                        self._send(location, Future(), 'subscribe', (
+                            table_id, subscription.sub_id, None,
+                            subscription.seat, subscription.token))
+                for future, command, args in held:
+                    self._send(location, future, command, args)
+
+    def rebalance(self):
+        """
+        Moves every table not on the worker it belongs on, one at a time.
+
+        Returns:
+            list(int): The ids of the tables moved.
+        """
+        with self.rebalancing:
+            with self.lock:
+                moves = [(table_id, self.route(table_id))
+                         for table_id, worker_id
+                         in sorted(self.locations.items())
+                         if self.route(table_id) != worker_id]
+            for table_id, owner in moves:
+                self.migrate(table_id, owner)
+        return [table_id for table_id, _ in moves]
+
+    def add_worker(self):
+        """
+        Starts a worker and moves the tables that now belong on it.
+
+        Returns:
+            int: The id of the worker.
+        """
+        worker_id = self._spawn()
+        self.rebalance()
+        return worker_id
+
+    def remove_worker(self, worker_id):
+        """
+        Moves the tables of a worker to the others and stops it.
+
+        Raises:
+            KeyError: No such worker.
+            ValueError: It is the last worker.
+        """
+        with self.lock:
+            if worker_id not in self.workers:
+                raise KeyError("No worker {}.".format(worker_id))
+            if len(self.workers) == 1:
+                raise ValueError("The last worker holds every table.")
+            self.ring.remove(worker_id)
+        self.rebalance()
+        with self.lock:
+            process, requests = self.workers.pop(worker_id)
+        requests.put(None)
+        process.join()
+
+    def close(self):
+        """
+        Stops every worker and the reader.
+        """
+        for process, requests in self.workers.values():
+            requests.put(None)
+        for process, _ in self.workers.values():
+            process.join()
+        self.workers = {}
+        self.subscriptions = {}
+        self.replies.put(None)
+        if self.reader is not None:
+            self.reader.join()
@@ -0,0 +1,759 @@
+"""
+Simulator
+=========
+Plays complete hands of no-limit Texas Holdem between strategy functions,
+with no one at the keyboard.
+
+A strategy is a function that takes a `Decision` and returns an action and an
+amount, e.g. `(CALL, 0)` or `(RAISE, 300)`. The amount of a bet or raise is
+the total the player wants in front of them on this street. Actions that are
+not allowed are turned into the closest allowed one: a check facing a bet
+folds, a call with nothing to call checks and a raise below the minimum
+calls.
+
+Every hand deals from its own stream, the child of the stream of the run
+keyed by the number of the hand, so a run gives the same hands however many
+processes share it. The seed of that stream is kept with the result of the
+hand, and `replay_hand` plays the hand again from it. Stacks are reset
+before every hand and the button moves one seat each hand.
+"""
+import os
+import multiprocessing
+
+from poker_game import codec
+from poker_game import hands
+from poker_game import preflop
+from poker_game import streams
+from poker_game.poker import Community, PokerEngine, Player
+
+FOLD = 'fold'
+CHECK = 'check'
+CALL = 'call'
+BET = 'bet'
+RAISE = 'raise'
+
+ACTIONS = [FOLD, CHECK, CALL, BET, RAISE]
+
+# Events of a hand, see `hand_events`.
+DEAL = 'deal'
+BLIND = 'blind'
+STREET = 'street'
+DECISION = 'decision'
+ACTION = 'action'
+RESULT = 'result'
+
+SMALL_BLIND = 50
+BIG_BLIND = 100
+STARTING_STACK = 10000
+
+# Hands played by one task of the pool.
+CHUNK_SIZE = 1000
+
+
+class Decision(object):
+    """
+    What a strategy sees when it is its turn to act.
+
+    Args:
+        seat(int): The seat of the player.
+        hole_cards(tuple(int)): The ids of the two cards of the player.
+        board(list(int)): The ids of the community cards showing.
+        street(int): The street, see `poker.Community`.
+        pot(int): The chips in the pot, including bets on this street.
+        to_call(int): The chips needed to call.
+        min_raise(int): The smallest total a raise can be.
+        stack(int): The chips the player has left.
+        bet(int): The chips the player has in front of them on this street.
+        num_active(int): The number of players still in the hand.
+        big_blind(int): The size of the big blind.
+    """
+
+    def __init__(self, seat, hole_cards, board, street, pot, to_call,
+                 min_raise, stack, bet, num_active, big_blind):
+        self.seat = seat
+        self.hole_cards = hole_cards
+        self.board = board
+        self.street = street
+        self.pot = pot
+        self.to_call = to_call
+        self.min_raise = min_raise
+        self.stack = stack
+        self.bet = bet
+        self.num_active = num_active
+        self.big_blind = big_blind
+
+
+class HandResult(object):
+    """
+    The outcome of one hand.
+
+    Args:
+        hand_id(int): The number of the hand in the run.
+        button(int): The seat of the button.
+        hole_cards(list(tuple(int))): The ids of the cards of each seat.
+        board(list(int)): The ids of the five community cards.
+        winnings(list(int)): The chips won or lost by each seat.
+        showdown(bool): Whether the hand went to a showdown.
+        actions(list(tuple(int, int, str, int))): The street, seat, action and
+            total bet of every action, in order.
+        seed(tuple(int, tuple(int))): The seed of the stream that dealt the
+            hand, see `streams`.
+        kind(str): The kind of that stream.
+    """
+
+    def __init__(self, hand_id, button, hole_cards, board, winnings, showdown,
+                 actions, seed=None, kind=None):
+        self.hand_id = hand_id
+        self.button = button
+        self.hole_cards = hole_cards
+        self.board = board
+        self.winnings = winnings
+        self.showdown = showdown
+        self.actions = actions
+        self.seed = seed
+        self.kind = kind
+
+    def __str__(self):
+        result_str = (
+            "Hand {result.hand_id}:\n"
+            "\tBoard: {board}\n"
+            "\tWinnings: {result.winnings}\n"
+        ).format(
+            result=self,
+            board=' '.join(codec.ID_STRINGS[card] for card in self.board))
+        return result_str
+
+
+class HandState(object):
+    """
+    The betting state of one hand.
+
+    Args:
+        players(list(poker.Player)): The players, by seat, with their hands
+            set.
+        community(poker.Community): The community cards.
+        big_blind(int): The size of the big blind.
+    """
+
+    def __init__(self, players, community, big_blind):
+        self.players = players
+        self.community = community
+        self.big_blind = big_blind
+        self.folded = [False] * len(players)
+        self.contributed = [0] * len(players)
+        self.actions = []
+
+    def active(self):
+        """
+        Returns the seats still in the hand.
+        """
+        return [seat for seat, folded in enumerate(self.folded)
+                if not folded]
+
+    def pay(self, seat, amount):
+        """
+        Moves up to amount chips from a player to the pot.
+        """
+        player = self.players[seat]
+        amount = min(amount, player.value)
+        player.value -= amount
+        player.set_bet(player.bet + amount)
+        self.contributed[seat] += amount
+
+    def board(self):
+        """
+        Returns the ids of the community cards showing.
+        """
+        state = self.community.state
+        if state == Community.PREFLOP:
+            return []
+        if state == Community.FLOP:
+            cards = self.community.flop
+        elif state == Community.TURN:
+            cards = self.community.turn
+        else:
+            cards = self.community.river
+        return [card.id for card in cards]
+
+    def betting_round(self, first):
+        """
+        Asks players to act, starting at a seat, until every player still in
+        the hand has matched the highest bet or is all-in.
+
+        Note:
+            This is a generator. It yields `(DECISION, Decision)` and must be
+            sent the action and amount in reply, then yields
+            `(ACTION, seat, action, bet)` once the action is taken.
+
+        Args:
+            first(int): The seat that acts first.
+        """
+        num_seats = len(self.players)
+        current_bet = max(player.bet for player in self.players)
+        min_raise = self.big_blind
+        board = self.board()
+
+        def can_act(seat):
+            return not self.folded[seat] and self.players[seat].value > 0
+
+        waiting = set(seat for seat in range(num_seats) if can_act(seat))
+
+        # Nobody to bet against once all but one player are all-in.
+        if len(waiting) <= 1:
+            seat = next(iter(waiting), None)
+            if seat is None or self.players[seat].bet >= current_bet:
+                return
+
+        seat = first
+        while waiting:
+            if seat in waiting:
+                player = self.players[seat]
+                to_call = current_bet - player.bet
+                decision = Decision(
+                    seat,
+                    (player.hand.card_1.id, player.hand.card_2.id),
+                    board,
+                    self.community.state,
+                    sum(self.contributed),
+                    to_call,
+                    current_bet + min_raise,
+                    player.value,
+                    player.bet,
+                    len(self.active()),
+                    self.big_blind)
+                action, amount = yield DECISION, decision
+
+                # Turn the action into an allowed one.
+                if action in (BET, RAISE):
+                    amount = min(amount, player.bet + player.value)
+                    all_in = amount == player.bet + player.value
+                    if amount <= current_bet or (
+                            amount < current_bet + min_raise and not all_in):
+                        action = CALL
+                if action == CHECK and to_call > 0:
+                    action = FOLD
+                if action == CALL and to_call == 0:
+                    action = CHECK
+                if action not in ACTIONS:
+                    action = CHECK if to_call == 0 else FOLD
+
+                waiting.discard(seat)
+                if action == FOLD:
+                    self.folded[seat] = True
+                    if len(self.active()) == 1:
+                        self.actions.append(
+                            (self.community.state, seat, action, player.bet))
+                        yield ACTION, seat, action, player.bet
+                        return
+                elif action == CALL:
+                    self.pay(seat, to_call)
+                elif action in (BET, RAISE):
+                    min_raise = max(min_raise, amount - current_bet)
+                    current_bet = amount
+                    self.pay(seat, amount - player.bet)
+
+                    # Everyone else must answer the raise.
+                    waiting = set(
+                        other for other in range(num_seats)
+                        if other != seat and can_act(other))
+
+                self.actions.append(
+                    (self.community.state, seat, action, player.bet))
+                yield ACTION, seat, action, player.bet
+
+            seat = (seat + 1) % num_seats
+
+    def award(self, button):
+        """
+        Splits the pot, and every side pot, between the best hands still in
+        the hand. Odd chips go to the first winners left of the button.
+
+        Args:
+            button(int): The seat of the button.
+
+        Returns:
+            bool: Whether the hand went to a showdown.
+        """
+        num_seats = len(self.players)
+        active = self.active()
+
+        if len(active) == 1:
+            self.players[active[0]].value += sum(self.contributed)
+            return False
+
+        board = hands.pack_cards((), [card.id for card in
+                                      self.community.river])
+        strengths = {}
+        for seat in active:
+            hand = self.players[seat].hand
+            strengths[seat] = hands.evaluate_packed(board | hands.pack_cards(
+                (hand.card_1.id, hand.card_2.id), ()))
+
+        # Seats in the order odd chips are handed out.
+        order = [(button + 1 + offset) % num_seats
+                 for offset in range(num_seats)]
+
+        previous = 0
+        for level in sorted(set(self.contributed)):
+            if level == 0:
+                continue
+            pot = sum(min(chips, level) - min(chips, previous)
+                      for chips in self.contributed)
+            eligible = [seat for seat in active
+                        if self.contributed[seat] >= level]
+            if not eligible:
+                eligible = active
+
+            best = max(strengths[seat] for seat in eligible)
+            winners = [seat for seat in order
+                       if seat in eligible and strengths[seat] == best]
+            share, odd_chips = divmod(pot, len(winners))
+            for idx, seat in enumerate(winners):
+                self.players[seat].value += share + (1 if idx < odd_chips
+                                                     else 0)
+            previous = level
+
+        return True
+
+
+def hand_events(engine, players, button, small_blind=SMALL_BLIND,
+                big_blind=BIG_BLIND, hand_id=0):
+    """
+    Plays one complete hand step by step: blinds, four betting rounds and
+    the showdown.
+
+    Note:
+        This is a generator of events, each a tuple starting with its kind:
+
+        `(DEAL, hand_id, button)`
+        `(BLIND, seat, amount)`
+        `(STREET, street, board)` as each street starts.
+        `(DECISION, Decision)` must be sent the action and amount in reply.
+        `(ACTION, seat, action, bet)` once an action is taken.
+        `(RESULT, HandResult)` last.
+
+        Whoever drives it decides how each seat answers, a strategy function
+        or a player on the other end of a connection.
+
+    Args:
+        engine(poker.PokerEngine): The engine that deals the cards.
+        players(list(poker.Player)): The players, by seat, with their stacks.
+        button(int): The seat of the button.
+        small_blind(int): The size of the small blind.
+        big_blind(int): The size of the big blind.
+        hand_id(int): The number of the hand in the run.
+
+    Returns:
+        HandResult: The outcome of the hand.
+    """
+    num_seats = len(players)
+    starting = [player.value for player in players]
+
+    for player, hand in zip(players, engine.deal_hands(num_seats)):
+        player.set_hand(hand)
+        player.set_bet(0)
+    community = engine.deal_community()
+    state = HandState(players, community, big_blind)
+    yield DEAL, hand_id, button
+
+    # Heads-up the button posts the small blind.
+    if num_seats == 2:
+        small = button
+    else:
+        small = (button + 1) % num_seats
+    big = (small + 1) % num_seats
+    state.pay(small, small_blind)
+    yield BLIND, small, players[small].bet
+    state.pay(big, big_blind)
+    yield BLIND, big, players[big].bet
+
+    for street in range(Community.RIVER + 1):
+        if street != Community.PREFLOP:
+            community.next()
+            for player in players:
+                player.set_bet(0)
+        yield STREET, street, state.board()
+
+        # Preflop starts left of the big blind, later streets left of the
+        # button.
+        if street == Community.PREFLOP:
+            first = (big + 1) % num_seats
+        else:
+            first = (button + 1) % num_seats
+        yield from state.betting_round(first)
+
+        if len(state.active()) == 1:
+            break
+
+    showdown = state.award(button)
+    result = HandResult(
+        hand_id,
+        button,
+        [(player.hand.card_1.id, player.hand.card_2.id) for player in players],
+        [card.id for card in community.river],
+        [player.value - chips for player, chips in zip(players, starting)],
+        showdown,
+        state.actions,
+        engine.deck.rng.seed,
+        engine.deck.rng.KIND)
+    yield RESULT, result
+    return result
+
+
+def play_hand(engine, players, strategies, button, small_blind=SMALL_BLIND,
+              big_blind=BIG_BLIND, hand_id=0):
+    """
+    Plays one complete hand, asking a strategy for every decision.
+
+    Args:
+        engine(poker.PokerEngine): The engine that deals the cards.
+        players(list(poker.Player)): The players, by seat, with their stacks.
+        strategies(list(function)): The strategy of each seat.
+        button(int): The seat of the button.
+        small_blind(int): The size of the small blind.
+        big_blind(int): The size of the big blind.
+        hand_id(int): The number of the hand in the run.
+
+    Returns:
+        HandResult: The outcome of the hand.
+    """
+    events = hand_events(
+        engine, players, button, small_blind, big_blind, hand_id)
+    reply = None
+    while True:
+        event = events.send(reply)
+        reply = None
+        if event[0] == DECISION:
+            reply = strategies[event[1].seat](event[1])
+        elif event[0] == RESULT:
+            events.close()
+            return event[1]
+
+
+def iter_hands(num_hands, num_players, strategy_fns, seed, start=0,
+               stack=STARTING_STACK, kind=None, history=None):
+    """
+    Plays hands one after another, yielding each result as it is played.
+
+    Args:
+        num_hands(int): The number of hands to play.
+        num_players(int): The number of seats at the table.
+        strategy_fns(list(function)): The strategies, seat n plays strategy
+            n modulo their number.
+        seed(int): The seed of the run.
+        start(int): The number of the first hand.
+        stack(int): The chips every player starts each hand with.
+        kind(str | None): The kind of stream, see `streams`.
+        history(history.HistoryWriter | None): A log to append every hand
+            to.
+
+    Yields:
+        HandResult: The outcome of each hand.
+    """
+    strategies = [strategy_fns[seat % len(strategy_fns)]
+                  for seat in range(num_players)]
+    players = [Player("Seat {}".format(seat), stack)
+               for seat in range(num_players)]
+    engine = PokerEngine()
+    root = streams.make_stream(seed, kind)
+
+    for hand_id in range(start, start + num_hands):
+        # Every hand has its own stream, so chunks can run anywhere.
+        engine.deck.rng = root.spawn(hand_id)
+        for player in players:
+            player.value = stack
+
+        result = play_hand(
+            engine, players, strategies, hand_id % num_players,
+            hand_id=hand_id)
+        if history is not None:
+            history.write(result)
+        yield result
+
+
+class StrategyStats(object):
+    """
+    Totals of one strategy over a run.
+
+    Args:
+        name(str): The name of the strategy.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.hands = 0
+        self.won = 0
+        self.net = 0
+        self.showdowns = 0
+
+    def add(self, other):
+        """
+        Adds the totals of another run of the same strategy.
+        """
+        self.hands += other.hands
+        self.won += other.won
+        self.net += other.net
+        self.showdowns += other.showdowns
+
+    def win_rate(self, big_blind=BIG_BLIND):
+        """
+        Returns the big blinds won per 100 hands.
+        """
+        if not self.hands:
+            return 0.0
+        return 100.0 * self.net / big_blind / self.hands
+
+    def __str__(self):
+        stats_str = (
+            "Strategy: {stats.name}\n"
+            "\tHands: {stats.hands}\n"
+            "\tWon: {won:.2%}\n"
+            "\tNet: {stats.net}\n"
+            "\tbb/100: {rate:.2f}\n"
+        ).format(
+            stats=self,
+            won=float(self.won) / max(self.hands, 1),
+            rate=self.win_rate())
+        return stats_str
+
+
+class SimulationStats(object):
+    """
+    Totals of every strategy over a run.
+
+    Args:
+        names(list(str)): The name of each strategy.
+    """
+
+    def __init__(self, names):
+        self.hands = 0
+        self.strategies = [StrategyStats(name) for name in names]
+
+    def record(self, result):
+        """
+        Adds the outcome of one hand.
+        """
+        self.hands += 1
+        num_strategies = len(self.strategies)
+        for seat, chips in enumerate(result.winnings):
+            stats = self.strategies[seat % num_strategies]
+            stats.hands += 1
+            stats.net += chips
+            if chips > 0:
+                stats.won += 1
+            if result.showdown:
+                stats.showdowns += 1
+
+    def add(self, other):
+        """
+        Adds the totals of another run with the same strategies.
+        """
+        self.hands += other.hands
+        for stats, other_stats in zip(self.strategies, other.strategies):
+            stats.add(other_stats)
+
+    def __str__(self):
+        return "Hands: {}\n".format(self.hands) + ''.join(
+            str(stats) for stats in self.strategies)
+
+
+def replay_hand(result, strategy_fns, stack=STARTING_STACK):
+    """
+    Plays a hand again from the seed kept with its result.
+
+    Args:
+        result(HandResult): The hand to play again.
+        strategy_fns(list(function)): The strategies, as given to the run.
+        stack(int): The chips every player starts the hand with.
+
+    Returns:
+        HandResult: The outcome of the hand, the same as `result` when the
+            strategies are the same.
+    """
+    num_players = len(result.hole_cards)
+    strategies = [strategy_fns[seat % len(strategy_fns)]
+                  for seat in range(num_players)]
+    players = [Player("Seat {}".format(seat), stack)
+               for seat in range(num_players)]
+    engine = PokerEngine(streams.from_seed(result.seed, result.kind))
+    return play_hand(engine, players, strategies, result.button,
+                     hand_id=result.hand_id)
+
+
+def _simulate_chunk(task):
+    """
+    Plays one chunk of hands and returns its totals.
+    """
+    start, num_hands, num_players, strategy_fns, seed, kind = task
+    stats = SimulationStats([fn.__name__ for fn in strategy_fns])
+    for result in iter_hands(num_hands, num_players, strategy_fns, seed,
+                             start=start, kind=kind):
+        stats.record(result)
+    return stats
+
+
+def simulate(num_hands, num_players, strategy_fns, seed=None,
+             processes=None, progress=None, kind=None):
+    """
+    Plays many hands across a process pool and totals every strategy.
+
+    Note:
+        Strategies are sent to the workers, so they must be functions
+        defined at the top of a module.
+
+    Args:
+        num_hands(int): The number of hands to play.
+        num_players(int): The number of seats at the table.
+        strategy_fns(list(function)): The strategies, seat n plays strategy
+            n modulo their number.
+        seed(int | None): The seed of the run, a random one when `None`.
+        processes(int | None): Number of worker processes, all cores when
+            `None` and no pool when 1.
+        progress(function | None): Called with the totals so far each time a
+            chunk of hands finishes.
+        kind(str | None): The kind of stream, see `streams`.
+
+    Returns:
+        SimulationStats: The totals of every strategy.
+    """
+    if seed is None:
+        seed = streams.new_entropy()
+
+    # Settle the kind here so every worker deals from the same kind.
+    kind = kind or streams.default_kind()
+
+    tasks = [
+        (start, min(CHUNK_SIZE, num_hands - start), num_players,
+         strategy_fns, seed, kind)
+        for start in range(0, num_hands, CHUNK_SIZE)
+    ]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+
+    pool = None
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        chunks = pool.imap_unordered(_simulate_chunk, tasks)
+    else:
+        chunks = (_simulate_chunk(task) for task in tasks)
+
+    stats = SimulationStats([fn.__name__ for fn in strategy_fns])
+    try:
+        for chunk in chunks:
+            stats.add(chunk)
+            if progress is not None:
+                progress(stats)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    stats.seed = seed
+    stats.kind = kind
+    return stats
+
+
+def check_call(decision):
+    """
+    Never raises and never folds.
+    """
+    if decision.to_call:
+        return CALL, 0
+    return CHECK, 0
+
+
+def check_fold(decision):
+    """
+    Checks when it can and folds to any bet.
+    """
+    if decision.to_call:
+        return FOLD, 0
+    return CHECK, 0
+
+
+def raise_strong(decision):
+    """
+    Raises strong hands, calls fair ones and gives up on the rest.
+    """
+    if decision.street == Community.PREFLOP:
+        equity = preflop.preflop_equity(
+            decision.hole_cards[0], decision.hole_cards[1],
+            min(max(decision.num_active, preflop.MIN_PLAYERS),
+                preflop.MAX_PLAYERS))
+        fair_share = 1.0 / decision.num_active
+        if equity > 1.5 * fair_share:
+            return RAISE, decision.min_raise + 2 * decision.big_blind
+        if equity > fair_share:
+            return check_call(decision)
+        return check_fold(decision)
+
+    category = hands.get_category(
+        hands.evaluate(decision.hole_cards, decision.board))
+    if category >= hands.TWO_PAIR:
+        return RAISE, decision.bet + decision.to_call + decision.pot
+    if category == hands.ONE_PAIR:
+        return check_call(decision)
+    return check_fold(decision)
+
+
+STRATEGIES = {
+    'check_call': check_call,
+    'check_fold': check_fold,
+    'raise_strong': raise_strong
+}
+
+
+def main():
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Plays headless hands.")
+
+    parser.add_argument(
+        '-n', '--hands',
+        help="Number of hands to play.",
+        type=int,
+        default=10000)
+    parser.add_argument(
+        '-p', '--players',
+        help="Number of seats at the table.",
+        type=int,
+        default=6)
+    parser.add_argument(
+        '-s', '--strategies',
+        help="Strategies to seat in turn.",
+        nargs='+',
+        choices=sorted(STRATEGIES),
+        default=['raise_strong', 'check_call'])
+    parser.add_argument(
+        '--seed',
+        help="Seed of the run.",
+        type=int,
+        default=None)
+    parser.add_argument(
+        '--rng',
+        help="Kind of random stream.",
+        choices=sorted(streams.STREAM_KINDS),
+        default=None)
+    parser.add_argument(
+        '--processes',
+        help="Number of worker processes.",
+        type=int,
+        default=None)
+
+    args = parser.parse_args()
+    strategy_fns = [STRATEGIES[name] for name in args.strategies]
+
+    started = time.time()
+    stats = simulate(args.hands, args.players, strategy_fns, args.seed,
+                     args.processes, kind=args.rng)
+    elapsed = time.time() - started
+
+    print(stats)
+    print("Seed: {} ({})".format(stats.seed, stats.kind))
+    print("{:.0f} hands/s".format(args.hands / elapsed))
+
+
+if __name__ == '__main__':
+    main()
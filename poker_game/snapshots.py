@@ -0,0 +1,203 @@
+"""
+Snapshots
+=========
+Writes every table of a `tables.Lobby` to a file, hands in play included,
+and starts them again from it, so a worker restarts without calling off a
+hand.
+
+A table is kept as the plain data of `tables.Table.export`: its seats and
+stacks, the seed of its stream and, for the hand being played, the stacks
+it was dealt with and the reply to every decision so far. Every deal comes
+from the seed, so that is enough to play the hand again to the decision it
+was waiting on. The deck, hole cards, board, bets and stacks are written
+too and checked against the replay.
+
+The file is a `HEADER`, holding a checksum of the rest, then the tables as
+JSON compressed with zlib, a few hundred bytes a table. On platforms with
+`os.fork` the worker only forks: the child writes the file from its
+copy-on-write view of the tables, frozen at the fork, while the parent plays
+on. The file is written next to its path and renamed over it, so a crash
+leaves the last whole snapshot.
+"""
+import asyncio
+import gc
+import json
+import os
+import struct
+import time
+import zlib
+
+MAGIC = b'PKSN'
+VERSION = 1
+
+# The magic, version and CRC-32 of the compressed tables.
+HEADER = struct.Struct('<4sBI')
+
+# Seconds between snapshots.
+SNAPSHOT_INTERVAL = 10.0
+
+
+def dumps(lobby):
+    """
+    Packs every table of a lobby.
+
+    Args:
+        lobby(tables.Lobby): The lobby.
+
+    Returns:
+        bytes: The snapshot.
+    """
+    data = {
+        'time': time.time(),
+        'tables': [table.export() for table in lobby.tables.values()],
+    }
+    body = zlib.compress(
+        json.dumps(data, separators=(',', ':')).encode('utf-8'))
+    return HEADER.pack(MAGIC, VERSION, zlib.crc32(body)) + body
+
+
+def loads(snapshot):
+    """
+    Unpacks a snapshot.
+
+    Returns:
+        dict: The time of the snapshot and the exported tables.
+
+    Raises:
+        ValueError: It is not a whole snapshot of this version.
+    """
+    if len(snapshot) < HEADER.size:
+        raise ValueError("The snapshot is truncated.")
+    magic, version, checksum = HEADER.unpack_from(snapshot)
+    body = snapshot[HEADER.size:]
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a snapshot of version {}.".format(VERSION))
+    if zlib.crc32(body) != checksum:
+        raise ValueError("The snapshot is corrupt.")
+    return json.loads(zlib.decompress(body).decode('utf-8'))
+
+
+def write(lobby, path):
+    """
+    Writes a snapshot of a lobby, replacing the file at once.
+    """
+    temp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp_path, 'wb') as snapshot_file:
+        snapshot_file.write(dumps(lobby))
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temp_path, path)
+
+
+def fork_write(lobby, path):
+    """
+    Writes a snapshot of a lobby from a child process, or at once where
+    there is no `os.fork`.
+
+    Returns:
+        int | None: The id of the child, to wait for.
+    """
+    if not hasattr(os, 'fork'):
+        write(lobby, path)
+        return None
+    pid = os.fork()
+    if pid:
+        return pid
+    # The child never collects, so it copies no page just to scan it.
+    gc.disable()
+    status = 0
+    try:
+        write(lobby, path)
+    except BaseException:
+        status = 1
+    finally:
+        # Skips the handlers of the parent, its loop and its files.
+        os._exit(status)
+
+
+def restore(lobby, path):
+    """
+    Starts every table of a snapshot in a lobby. A hand that cannot be
+    replayed, e.g. with another kind of stream, is called off.
+
+    Args:
+        lobby(tables.Lobby): The lobby, on the running loop.
+        path(str): The snapshot.
+
+    Returns:
+        list(tables.Table): The tables.
+
+    Raises:
+        ValueError: The file is not a whole snapshot.
+    """
+    with open(path, 'rb') as snapshot_file:
+        data = loads(snapshot_file.read())
+    return [lobby.adopt(table) for table in data['tables']]
+
+
+class Snapshotter(object):
+    """
+    Writes snapshots of a lobby every so often.
+
+    Args:
+        lobby(tables.Lobby): The lobby.
+        path(str): The snapshot file.
+        interval(float): Seconds between snapshots.
+    """
+
+    def __init__(self, lobby, path, interval=SNAPSHOT_INTERVAL):
+        self.lobby = lobby
+        self.path = path
+        self.interval = interval
+        self.task = None
+        self.written = 0
+        self.failed = 0
+        # Seconds the loop was held by the last snapshot.
+        self.pause = 0.0
+
+    async def snapshot(self):
+        """
+        Writes one snapshot, holding the loop only to fork.
+
+        Raises:
+            RuntimeError: The child failed to write it.
+        """
+        start = time.perf_counter()
+        pid = fork_write(self.lobby, self.path)
+        self.pause = time.perf_counter() - start
+        if pid is not None:
+            loop = asyncio.get_event_loop()
+            _, status = await loop.run_in_executor(None, os.waitpid, pid, 0)
+            if status != 0:
+                raise RuntimeError(
+                    "Writing snapshot {} failed.".format(self.path))
+        self.written += 1
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.snapshot()
+            except (OSError, RuntimeError):
+                # The last whole snapshot stays, try again next time.
+                self.failed += 1
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+        return self.task
+
+    async def close(self):
+        """
+        Stops the snapshots and writes a last one in this process, as the
+        tables stop with it.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        write(self.lobby, self.path)
+        self.written += 1
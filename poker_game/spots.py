@@ -0,0 +1,292 @@
+"""
+Spots
+=====
+Equity queries answered from a bounded cache for `server`.
+
+The suits of a spot carry no meaning of their own, so AsKs against QhQd has
+the same equities as AhKh against QcQs. A spot is cached under a canonical
+form: the hands, board and dead cards sorted, under the swap of suits that
+gives the smallest key, together with how the result was computed. Popular
+spots then share one entry however their suits were written.
+
+The cache holds a bounded number of results in least recently used order,
+each for a limited time, and counts its hits, misses and evictions.
+Identical queries arriving while the first is still computed wait for that
+computation instead of starting their own.
+"""
+import asyncio
+import itertools
+import math
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from poker_game import codec
+from poker_game import equity
+
+# Results kept in the cache.
+CACHE_SIZE = 4096
+
+# Seconds a result stays in the cache.
+CACHE_TTL = 3600.0
+
+# Most boards dealt for one query.
+MAX_ITERATIONS = 1000000
+
+DEFAULT_ITERATIONS = 100000
+
+# Most boards walked for one exact query, so from the flop on. Preflop there
+# are 1712304 with two hands, seconds of a worker each.
+MAX_EXACT_BOARDS = 20000
+
+SUIT_ORDERS = list(itertools.permutations(range(codec.NUM_SUITS)))
+
+
+def _swap_suits(cards, order):
+    """
+    Moves every card to the suit given by `order[suit]`.
+    """
+    return [codec.NUM_RANKS * order[card // codec.NUM_RANKS] +
+            card % codec.NUM_RANKS for card in cards]
+
+
+def canonical_spot(hole_cards, board=(), dead=()):
+    """
+    Finds the canonical form of a spot.
+
+    Args:
+        hole_cards(list(list(int))): The ids of the two cards of each player.
+        board(list(int)): The ids of the cards shared in the community.
+        dead(list(int)): The ids of cards out of the deck.
+
+    Returns:
+        tuple(tuple, list(int)): The canonical hands, board and dead cards,
+            and for every canonical hand the index of the hand it came from.
+    """
+    best = None
+    for order in SUIT_ORDERS:
+        holes = [tuple(sorted(_swap_suits(hole, order)))
+                 for hole in hole_cards]
+        players = sorted(range(len(holes)), key=holes.__getitem__)
+        key = (tuple(holes[idx] for idx in players),
+               tuple(sorted(_swap_suits(board, order))),
+               tuple(sorted(_swap_suits(dead, order))))
+        if best is None or key < best[0]:
+            best = (key, players)
+    return best
+
+
+def compute(spot, iterations, exact, seed):
+    """
+    Computes the equity of a canonical spot, in a worker.
+
+    Args:
+        spot(tuple): The canonical hands, board and dead cards.
+        iterations(int): The most boards to deal.
+        exact(bool): Whether to walk every completion instead.
+        seed(int | None): Seed of the boards dealt.
+
+    Returns:
+        dict: The trials, whether exact, and the win, tie, equity and
+            standard error of every hand.
+    """
+    hole_cards, board, dead = spot
+    if exact:
+        result = equity.exact(hole_cards, board, dead)
+    else:
+        result = equity.monte_carlo(
+            hole_cards, board, dead, iterations, seed, processes=1)
+    return {
+        'trials': result.trials,
+        'exact': result.exact,
+        'players': [
+            (player.win, player.tie, player.equity, player.stderr)
+            for player in result.players
+        ]
+    }
+
+
+class LRUCache(object):
+    """
+    A bounded cache dropping its least recently used entry when full and any
+    entry older than its time to live.
+
+    Args:
+        max_size(int): The most entries kept.
+        ttl(float): Seconds an entry is kept.
+        clock(function): Returns the time in seconds.
+    """
+
+    def __init__(self, max_size=CACHE_SIZE, ttl=CACHE_TTL,
+                 clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """
+        Returns the value of a key, counting a hit or a miss.
+        """
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] <= self.clock():
+            del self.entries[key]
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        """
+        Stores a value, evicting the least recently used entry when full.
+        """
+        self.entries[key] = (self.clock() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        """
+        Returns the counters of the cache.
+        """
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+
+def _retrieve(task):
+    """
+    Retrieves the error of a computation, so one nobody waits on any more is
+    not logged.
+    """
+    if not task.cancelled():
+        task.exception()
+
+
+class EquityService(object):
+    """
+    Answers equity queries from the cache or from worker processes.
+
+    Args:
+        cache(LRUCache | None): The cache, a default one when `None`.
+        processes(int | None): Number of worker processes, all cores when
+            `None`. With 1 queries run on a thread instead.
+    """
+
+    def __init__(self, cache=None, processes=None):
+        self.cache = cache if cache is not None else LRUCache()
+        if processes is None:
+            processes = os.cpu_count() or 1
+        self.processes = processes
+        self.executor = None
+        self.in_flight = {}
+        self.shared = 0
+
+    async def equity(self, hole_cards, board=(), dead=(),
+                     iterations=DEFAULT_ITERATIONS, exact=False, seed=None):
+        """
+        Finds the equity of every hand of a spot.
+
+        Args:
+            hole_cards(list(list(int))): The ids of the two cards of each
+                player.
+            board(list(int)): The ids of the cards shared in the community.
+            dead(list(int)): The ids of cards out of the deck.
+            iterations(int): The most boards to deal.
+            exact(bool): Whether to walk every completion instead.
+            seed(int | None): Seed of the boards dealt, of the canonical spot.
+
+        Returns:
+            tuple(dict, bool): The result, with the hands in the order given,
+                and whether it came from the cache or a query in flight.
+
+        Raises:
+            ValueError: The spot or the number of iterations is not valid,
+                or an exact spot has too many boards to walk.
+        """
+        equity.check_cards(hole_cards, board, dead)
+        if exact:
+            unseen = (codec.NUM_CARDS - 2 * len(hole_cards) - len(board) -
+                      len(dead))
+            boards = math.comb(unseen, equity.BOARD_SIZE - len(board))
+            if boards > MAX_EXACT_BOARDS:
+                raise ValueError(
+                    "An exact spot may have up to {} boards, not {}.".format(
+                        MAX_EXACT_BOARDS, boards))
+        elif not 1 <= iterations <= MAX_ITERATIONS:
+            raise ValueError("Iterations must be from 1 to {}.".format(
+                MAX_ITERATIONS))
+
+        spot, players = canonical_spot(hole_cards, board, dead)
+        key = (spot, True) if exact else (spot, iterations, seed)
+
+        result = self.cache.get(key)
+        cached = result is not None
+        if result is None:
+            task = self.in_flight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(
+                    self._compute(key, spot, iterations, exact, seed))
+                task.add_done_callback(_retrieve)
+                self.in_flight[key] = task
+            else:
+                self.shared += 1
+                cached = True
+            # A caller that goes away leaves the computation to the others
+            # and to the cache.
+            result = await asyncio.shield(task)
+
+        # Put the hands back in the order they were given.
+        ordered = [None] * len(players)
+        for canonical, original in enumerate(players):
+            ordered[original] = result['players'][canonical]
+        return dict(result, players=ordered), cached
+
+    async def _compute(self, key, spot, iterations, exact, seed):
+        """
+        Computes a spot once, in a task of its own that every query for it
+        arriving meanwhile shares, and caches the result.
+        """
+        loop = asyncio.get_event_loop()
+        if self.processes > 1 and self.executor is None:
+            self.executor = ProcessPoolExecutor(self.processes)
+        try:
+            result = await loop.run_in_executor(
+                self.executor, compute, spot, iterations, exact, seed)
+            self.cache.put(key, result)
+            return result
+        finally:
+            del self.in_flight[key]
+
+    def stats(self):
+        """
+        Returns the counters of the cache and of the shared queries.
+        """
+        return dict(self.cache.stats(), in_flight=len(self.in_flight),
+                    shared=self.shared)
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -1,18 +1,180 @@
 'use strict';
 
+// Milliseconds before reconnecting, doubled on every failure.
+const RECONNECT_DELAY = 500;
+const MAX_RECONNECT_DELAY = 8000;
+
 class App extends React.Component {
   constructor(props) {
     super(props);
+
+    // The table to watch and the seat to play, from the page URL, e.g.
+    // /?table=0&seat=2&token=...
+    const params = new URLSearchParams(window.location.search);
+    this.table = params.get('table') || '0';
+    this.seat = params.get('seat');
+    this.token = params.get('token');
+
+    this.seq = null;
+    this.socket = null;
+    this.delay = RECONNECT_DELAY;
+    this.closed = false;
+
+    this.state = {
+      board: [],
+      hole: [],
+      button: null,
+      waiting_on: null,
+      seats: []
+    }
+
+    this.handle_message = this.handle_message.bind(this);
+    this.handle_action = this.handle_action.bind(this);
+  }
+
+  componentDidMount() {
+    this.connect();
+  }
+
+  componentWillUnmount() {
+    this.closed = true;
+    if (this.socket) {
+      this.socket.close();
+    }
+  }
+
+  connect() {
+    const scheme = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+    let url = scheme + '//' + window.location.host +
+      '/tables/' + this.table + '/feed';
+    const query = [];
+    // Resume after the last message seen, the server sends a snapshot
+    // when it no longer has them.
+    if (this.seq !== null) {
+      query.push('seq=' + this.seq);
+    }
+    if (this.seat !== null) {
+      query.push('seat=' + this.seat);
+      query.push('token=' + encodeURIComponent(this.token));
+    }
+    if (query.length) {
+      url += '?' + query.join('&');
+    }
+
+    this.socket = new WebSocket(url);
+    this.socket.onopen = () => {
+      this.delay = RECONNECT_DELAY;
+    };
+    this.socket.onmessage = event => {
+      this.handle_message(JSON.parse(event.data));
+    };
+    this.socket.onclose = () => {
+      if (!this.closed) {
+        setTimeout(() => this.connect(), this.delay);
+        this.delay = Math.min(this.delay * 2, MAX_RECONNECT_DELAY);
+      }
+    };
+  }
+
+  handle_action(action, amount) {
+    this.socket.send(JSON.stringify({action: action, amount: amount}));
+  }
+
+  // Applies one message of the feed, see poker_game/feed.py.
+  handle_message(message) {
+    const seq = message[0];
+    const type = message[1];
+    if (type !== 'h' && type !== 'e') {
+      this.seq = seq;
+    }
+
+    switch (type) {
+      case 'S': {
+        const state = message[2];
+        this.setState(() => ({
+          board: state.board,
+          hole: state.hole ? state.hole.map(Card.id_to_name) : [],
+          button: state.button,
+          waiting_on: state.waiting_on,
+          seats: state.seats
+        }));
+        break;
+      }
+      case 'j':
+        this.set_seat(message[2], {
+          name: message[3], stack: message[4], bet: 0, bot: message[5]
+        });
+        break;
+      case 'l':
+        this.set_seat(message[2], null);
+        break;
+      case 'd':
+        this.setState(() => ({
+          board: [], hole: [], button: message[3], waiting_on: null
+        }));
+        break;
+      case 'h':
+        this.setState(() => ({
+          hole: message[2] ? message[2].map(Card.id_to_name) : []
+        }));
+        break;
+      case 'b':
+      case 'a': {
+        const seat = message[2];
+        const bet = type === 'b' ? message[3] : message[4];
+        const stack = type === 'b' ? message[4] : message[5];
+        this.update_seat(seat, {bet: bet, stack: stack});
+        this.setState(() => ({waiting_on: null}));
+        break;
+      }
+      case 's':
+        this.setState(state => ({
+          board: state.board.concat(message[3].map(Card.id_to_name))
+        }));
+        break;
+      case 'w':
+        this.setState(() => ({waiting_on: message[2]}));
+        break;
+      case 'r':
+        this.setState(() => ({waiting_on: null}));
+        break;
+      case 'e':
+        console.log(message[2]);
+        break;
+    }
+  }
+
+  set_seat(seat, value) {
+    this.setState(state => {
+      const seats = state.seats.slice();
+      seats[seat] = value;
+      return {seats: seats};
+    });
+  }
+
+  update_seat(seat, changes) {
+    this.setState(state => {
+      const seats = state.seats.slice();
+      seats[seat] = Object.assign({}, seats[seat], changes);
+      return {seats: seats};
+    });
   }
 
   render() {
+    const hole = this.state.hole;
+    const seat = this.seat === null ? null : parseInt(this.seat, 10);
 
     return (
       <div>
         <Title/>
-        <Community/>
+        <Community cards={this.state.board}/>
 
-        <HandChooser card_left="back_red" card_right="back_red"/>
+        <HandChooser
+          card_left={hole.length ? hole[0] : DEFAULT_BACK}
+          card_right={hole.length ? hole[1] : DEFAULT_BACK}
+          to_act={seat !== null && this.state.waiting_on === seat}
+          on_action={this.handle_action}
+        />
       </div>
     );
   }
@@ -20,4 +182,4 @@ class App extends React.Component {
 
 // Render the App.
 const dom_container = document.querySelector('#app-container');
-ReactDOM.render(<App/>, dom_container);
\ No newline at end of file
+ReactDOM.render(<App/>, dom_container);
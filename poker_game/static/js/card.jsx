@@ -1,22 +1,76 @@
 'use strict';
 
+const VALUE_CHARS = 'A23456789TJQK';
+const SUIT_CHARS = 'dchs';
+const NUM_RANKS = 13;
+
+// The layout of the sprite sheet, see poker_game/assets.py: a column per
+// rank, a row per suit and a last row of backs.
+const BACK_NAMES = [
+  'back_red', 'back_blue', 'back_gray', 'back_green', 'back_purple',
+  'back_yellow'
+];
+const SPRITE_COLUMNS = NUM_RANKS;
+const SPRITE_ROWS = SUIT_CHARS.length + 1;
+
 class Card extends React.Component {
   
   constructor(props) {
     super(props);
   }
 
+  // Whether the sprite stylesheet loaded, see poker_game/assets.py. Without
+  // a build every card is its own image.
+  static has_sprites(){
+    if (Card.sprites === undefined) {
+      Card.sprites = getComputedStyle(document.documentElement)
+        .getPropertyValue('--card-sprites').trim() === '1';
+    }
+    return Card.sprites;
+  }
+
   static to_url(card_name){
-    const base_url = "/static/images/cards/";
-    const img_ext = ".jpg";
-    const card_url = base_url + card_name + img_ext;
-    return card_url;
+    return '/static/images/cards/' + card_name + '.jpg';
+  }
+
+  // Finds the column and row of a card in the sprite sheet.
+  static sprite_cell(card_name){
+    const back = BACK_NAMES.indexOf(card_name);
+    if (back >= 0) {
+      return [back, SPRITE_ROWS - 1];
+    }
+    return [
+      VALUE_CHARS.indexOf(card_name[0].toUpperCase()),
+      SUIT_CHARS.indexOf(card_name[1].toLowerCase())
+    ];
+  }
+
+  // The background position showing a card, in percent of the sheet.
+  static sprite_position(card_name){
+    const [column, row] = Card.sprite_cell(card_name);
+    const x = column * 100 / (SPRITE_COLUMNS - 1);
+    const y = row * 100 / (SPRITE_ROWS - 1);
+    return x + '% ' + y + '%';
+  }
+
+  // Names a card id the way the server does, e.g. 0 is 'Ad'.
+  static id_to_name(card_id){
+    return VALUE_CHARS[card_id % NUM_RANKS] +
+      SUIT_CHARS[Math.floor(card_id / NUM_RANKS)];
   }
 
   render() {
 
+    if (!Card.has_sprites()) {
+      return (
+        <img className="card" src={Card.to_url(this.props.card_name)}
+             alt={this.props.card_name}/>
+      );
+    }
     return (
-      <img className="card" src={Card.to_url(this.props.card_name)}/>
+      <div className="card card-sprite" role="img"
+           aria-label={this.props.card_name}
+           style={{backgroundPosition: Card.sprite_position(this.props.card_name)}}/>
     );
   }
-}
\ No newline at end of file
+}
@@ -1,45 +1,60 @@
 'use strict';
 
+const ACTIONS = ['fold', 'check', 'call', 'bet', 'raise'];
+
 class HandChooser extends React.Component {
   
   constructor(props) {
     super(props);
 
     this.state = {
-      card_left: props.card_left,
-      card_right: props.card_right
+      amount: 0
     }
 
-    this.handle_button = this.handle_button.bind(this);
+    this.handle_amount = this.handle_amount.bind(this);
   }
 
-  handle_button(){
-    console.log("Running");
-    const card_left = $('#card_left').val();
-    const card_right = $('#card_right').val();
-
+  handle_amount(event){
+    const amount = parseInt(event.target.value, 10) || 0;
     this.setState(state => ({
-      card_left: card_left,
-      card_right: card_right
+      amount: amount
     }));
   }
 
   render() {
+    // Only a seated player asked to act gets the buttons.
+    let actions = null;
+    if (this.props.to_act && this.props.on_action) {
+      actions = (
+        <div>
+          {ACTIONS.map(action =>
+            <button key={action}
+                    onClick={() => this.props.on_action(
+                      action, this.state.amount)}>
+              {action}
+            </button>
+          )}
+          Amount: <input type="number" value={this.state.amount}
+                         onChange={this.handle_amount}/>
+        </div>
+      );
+    }
 
     return (
       <div>
         <h2 className="center">Hand Chooser</h2>
-        <br/>
-        Card Left: <input type="text" id="card_left"/><br/>
-        Card Right: <input type="text" id="card_right"/><br/>
-        <button onClick={this.handle_button}>
-          Set Cards
-        </button>
         <Hand
-          card_left={this.state.card_left}
-          card_right={this.state.card_right}
+          card_left={this.props.card_left}
+          card_right={this.props.card_right}
         />
+        {actions}
       </div>
     );
   }
-}
\ No newline at end of file
+}
+
+HandChooser.defaultProps = {
+  card_left: DEFAULT_BACK,
+  card_right: DEFAULT_BACK,
+  to_act: false
+};
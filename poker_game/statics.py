@@ -0,0 +1,302 @@
+"""
+Statics
+=======
+Serves the files under poker_game/static from memory for `server`.
+
+Every file is read once, when the server starts, together with its gzip and,
+when the brotli package is installed, brotli forms if they are smaller.
+Each form has a strong ETag from a hash of its content, so a client that
+holds a file gets an empty 304, and the form sent is the best one the
+client accepts. Files named after their content, see `assets`, are cached
+by browsers forever, every other file is revalidated.
+
+In production nginx can serve the files from disk instead, leaving the
+workers to the game:
+
+    python -m poker_game.statics compress
+    python -m poker_game.statics nginx > /etc/nginx/snippets/poker_game.conf
+
+The first writes the .gz and .br files nginx sends as they are, the second
+the locations to include in the server block.
+"""
+import os
+import gzip
+import hashlib
+import mimetypes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from poker_game import assets
+
+IDENTITY = 'identity'
+GZIP = 'gzip'
+BROTLI = 'br'
+
+# Encodings in the order they are preferred.
+ENCODINGS = [BROTLI, GZIP]
+
+SUFFIXES = {
+    GZIP: '.gz',
+    BROTLI: '.br',
+}
+
+# Files smaller than this are not worth compressing.
+MIN_COMPRESS_SIZE = 256
+
+# Content types that compress, images and fonts already are.
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'image/svg+xml')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+
+def compress(body, encoding):
+    """
+    Compresses a body at the highest level, as it is only done once.
+    """
+    if encoding == GZIP:
+        return gzip.compress(body, 9, mtime=0)
+    return brotli.compress(body, quality=11)
+
+
+def is_compressible(content_type):
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def accepted_encodings(accept_encoding):
+    """
+    Reads the encodings a client accepts from its Accept-Encoding header.
+
+    Args:
+        accept_encoding(str): The header.
+
+    Returns:
+        set(str): The encodings, without those refused with q=0.
+    """
+    accepted = set()
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = params.strip().replace(' ', '')
+        if name and quality not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Returns whether an If-None-Match header names an ETag.
+    """
+    if if_none_match.strip() == '*':
+        return True
+    return etag in [tag.strip() for tag in if_none_match.split(',')]
+
+
+class StaticFile(object):
+    """
+    One file held in memory with its compressed forms.
+
+    Args:
+        path(str): The path of the file on disk.
+        body(bytes): The content of the file.
+        cache_control(str): The Cache-Control header of the file.
+    """
+
+    def __init__(self, path, body, cache_control=REVALIDATE):
+        self.path = path
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        self.cache_control = cache_control
+        self.mtime = os.stat(path).st_mtime_ns
+
+        digest = hashlib.sha256(body).hexdigest()[:assets.HASH_SIZE * 2]
+        # The encoding, body and strong ETag of every form, best first.
+        self.forms = []
+        if (len(body) >= MIN_COMPRESS_SIZE and
+                is_compressible(self.content_type)):
+            for encoding in ENCODINGS:
+                if encoding == BROTLI and brotli is None:
+                    continue
+                compressed = compress(body, encoding)
+                if len(compressed) < len(body):
+                    self.forms.append((encoding, compressed, '"{}-{}"'.format(
+                        digest, encoding)))
+        self.forms.append((IDENTITY, body, '"{}"'.format(digest)))
+
+    def choose(self, accept_encoding):
+        """
+        Picks the best form a client accepts.
+
+        Args:
+            accept_encoding(str): The Accept-Encoding header of the client.
+
+        Returns:
+            tuple(str, bytes, str): The encoding, body and ETag.
+        """
+        accepted = accepted_encodings(accept_encoding)
+        for form in self.forms[:-1]:
+            if form[0] in accepted:
+                return form
+        return self.forms[-1]
+
+    def varies(self):
+        """
+        Returns whether the body sent depends on the Accept-Encoding header.
+        """
+        return len(self.forms) > 1
+
+
+class StaticIndex(object):
+    """
+    Every file under a folder, read into memory.
+
+    Args:
+        root(str): The folder.
+        watch(bool): Whether to read a file again when it changes on disk,
+            for development.
+    """
+
+    def __init__(self, root, watch=False):
+        self.root = os.path.realpath(root)
+        self.watch = watch
+        self.files = {}
+        self.loaded = False
+
+    def load(self):
+        """
+        Reads every file under the folder, skipping the compressed copies
+        written for nginx.
+        """
+        self.files = {}
+        for folder, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(tuple(SUFFIXES.values())):
+                    continue
+                path = os.path.join(folder, name)
+                self._read(os.path.relpath(path, self.root).replace(
+                    os.sep, '/'))
+        self.loaded = True
+
+    def _read(self, name):
+        path = os.path.join(self.root, *name.split('/'))
+        with open(path, 'rb') as static_file:
+            body = static_file.read()
+        cache_control = REVALIDATE
+        if (name.startswith(assets.DIST_DIR + '/') and
+                assets.is_hashed(name)):
+            cache_control = IMMUTABLE
+        self.files[name] = StaticFile(path, body, cache_control)
+        return self.files[name]
+
+    def get(self, name):
+        """
+        Finds a file by its path under the folder, e.g. 'css/stylesheet.css'.
+        A file written since the index was loaded, such as a new build, is
+        read on its first request.
+
+        Returns:
+            StaticFile | None: The file, `None` when there is no such file
+                inside the folder.
+        """
+        if not self.loaded:
+            self.load()
+        static_file = self.files.get(name)
+        if static_file is not None and not self.watch:
+            return static_file
+
+        path = os.path.realpath(os.path.join(self.root, *name.split('/')))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(
+                path):
+            return None
+        if (static_file is not None and
+                os.stat(path).st_mtime_ns == static_file.mtime):
+            return static_file
+        return self._read(os.path.relpath(path, self.root).replace(
+            os.sep, '/'))
+
+
+def compress_files(root=assets.STATIC_ROOT):
+    """
+    Writes the compressed copies of every file under a folder that nginx
+    sends with gzip_static and brotli_static.
+
+    Returns:
+        list(str): The paths written.
+    """
+    index = StaticIndex(root)
+    index.load()
+    written = []
+    for static_file in index.files.values():
+        for encoding, body, _ in static_file.forms[:-1]:
+            path = static_file.path + SUFFIXES[encoding]
+            with open(path, 'wb') as compressed_file:
+                compressed_file.write(body)
+            written.append(path)
+    return written
+
+
+def nginx_config(root=assets.STATIC_ROOT, prefix='/static/'):
+    """
+    Writes the nginx locations serving the static files from disk.
+
+    Args:
+        root(str): The folder of the static files.
+        prefix(str): The URL path they are served under.
+
+    Returns:
+        str: The locations, to include in a server block.
+    """
+    root = os.path.realpath(root)
+    return (
+        "# Static files of the poker game, see poker_game/statics.py.\n"
+        "# brotli_static needs the ngx_brotli module, remove it without.\n"
+        "# Only files named after their content are cached forever.\n"
+        "location ~ \"^{prefix}({dist}/.+\\.[0-9a-f]{{{size}}}\\.[^./]+)$\" "
+        "{{\n"
+        "    alias {root}/$1;\n"
+        "    gzip_static on;\n"
+        "    brotli_static on;\n"
+        "    add_header Cache-Control \"{immutable}\";\n"
+        "    add_header Vary Accept-Encoding;\n"
+        "}}\n"
+        "\n"
+        "location {prefix} {{\n"
+        "    alias {root}/;\n"
+        "    gzip_static on;\n"
+        "    brotli_static on;\n"
+        "    etag on;\n"
+        "    add_header Cache-Control \"{revalidate}\";\n"
+        "    add_header Vary Accept-Encoding;\n"
+        "}}\n"
+    ).format(prefix=prefix, dist=assets.DIST_DIR, size=assets.HASH_SIZE,
+             root=root, immutable=IMMUTABLE, revalidate=REVALIDATE)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Prepares the static files for nginx.")
+
+    parser.add_argument(
+        'command',
+        help="`compress` writes the .gz and .br files, `nginx` prints the "
+             "locations serving them.",
+        choices=['compress', 'nginx'])
+    parser.add_argument(
+        '--root',
+        help="The folder of the static files.",
+        default=assets.STATIC_ROOT)
+
+    args = parser.parse_args()
+    if args.command == 'compress':
+        for path in compress_files(args.root):
+            print(path)
+    else:
+        print(nginx_config(args.root), end='')
+
+
+if __name__ == '__main__':
+    main()
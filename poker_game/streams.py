@@ -0,0 +1,182 @@
+"""
+Streams
+=======
+Independent random streams for dealing cards.
+
+A stream is named by its seed, the entropy of the run and a key of integers,
+e.g. `(7, (2, 1041))` for hand 1041 of table 2 of run 7. `spawn` adds to the
+key, so every table, worker and hand can own a stream that does not depend
+on any other, and `from_seed` rebuilds any stream from its seed alone.
+
+Two kinds of stream are offered:
+
+numpy:  PCG64 from NumPy, drawn in bulk into a buffer. The default when
+        NumPy is installed.
+random: The Mersenne Twister of the random module.
+
+Both give the same draws for the same seed on every machine, but the two
+kinds give different draws, so the kind is part of what replays a hand.
+"""
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUMPY = 'numpy'
+RANDOM = 'random'
+
+# Uniform draws made at once by a numpy stream, starting small so short
+# lived streams, e.g. one a hand, stay cheap, and doubling up to the most.
+MIN_BUFFER_SIZE = 1 << 5
+BUFFER_SIZE = 1 << 12
+
+
+def new_entropy():
+    """
+    Returns fresh entropy from the operating system.
+    """
+    return random.SystemRandom().getrandbits(64)
+
+
+class RandomStream(object):
+    """
+    A stream on the random module.
+
+    Args:
+        entropy(int): The entropy of the run.
+        key(tuple(int)): The key of the stream.
+    """
+
+    KIND = RANDOM
+
+    def __init__(self, entropy, key=()):
+        self.seed = (entropy, tuple(key))
+        self._random = random.Random(
+            ':'.join(str(part) for part in (entropy,) + self.seed[1]))
+
+    def spawn(self, key):
+        """
+        Returns the child stream of a key.
+
+        Args:
+            key(int): The key of the child, e.g. a table or hand number.
+
+        Returns:
+            RandomStream: The child stream.
+        """
+        return RandomStream(self.seed[0], self.seed[1] + (key,))
+
+    def random(self):
+        """
+        Returns a uniform draw in [0, 1).
+        """
+        return self._random.random()
+
+    def draw(self, count):
+        """
+        Returns a list of uniform draws in [0, 1).
+        """
+        rand = self._random.random
+        return [rand() for _ in range(count)]
+
+
+class NumpyStream(object):
+    """
+    A stream on the PCG64 generator of NumPy.
+
+    Args:
+        entropy(int): The entropy of the run.
+        key(tuple(int)): The key of the stream.
+    """
+
+    KIND = NUMPY
+
+    def __init__(self, entropy, key=()):
+        if np is None:
+            raise RuntimeError("NumPy streams need numpy installed.")
+        self.seed = (entropy, tuple(key))
+        sequence = np.random.SeedSequence(entropy, spawn_key=self.seed[1])
+        self._generator = np.random.Generator(np.random.PCG64(sequence))
+        self._buffer = []
+        self._index = 0
+
+    def spawn(self, key):
+        """
+        Returns the child stream of a key.
+
+        Args:
+            key(int): The key of the child, e.g. a table or hand number.
+
+        Returns:
+            NumpyStream: The child stream.
+        """
+        return NumpyStream(self.seed[0], self.seed[1] + (key,))
+
+    def random(self):
+        """
+        Returns a uniform draw in [0, 1).
+        """
+        return self.draw(1)[0]
+
+    def draw(self, count):
+        """
+        Returns a list of uniform draws in [0, 1).
+        """
+        index = self._index
+        if index + count > len(self._buffer):
+            # Slicing a list of floats is much cheaper than a call into
+            # NumPy, so draw a buffer at a time, keeping the draws left.
+            size = min(BUFFER_SIZE, max(MIN_BUFFER_SIZE,
+                                        2 * len(self._buffer)))
+            self._buffer = self._buffer[index:] + self._generator.random(
+                max(count, size)).tolist()
+            index = 0
+        self._index = index + count
+        return self._buffer[index:index + count]
+
+
+STREAM_KINDS = {
+    RANDOM: RandomStream,
+    NUMPY: NumpyStream
+}
+
+
+def default_kind():
+    """
+    Returns the kind of stream used when none is given.
+    """
+    return RANDOM if np is None else NUMPY
+
+
+def from_seed(seed, kind=None):
+    """
+    Rebuilds a stream from its seed.
+
+    Args:
+        seed(tuple(int, tuple(int))): The entropy and key of the stream.
+        kind(str | None): The kind of stream, the default kind when `None`.
+
+    Returns:
+        RandomStream | NumpyStream: The stream.
+    """
+    entropy, key = seed
+    return STREAM_KINDS[kind or default_kind()](entropy, key)
+
+
+def make_stream(entropy=None, kind=None):
+    """
+    Makes the root stream of a run.
+
+    Args:
+        entropy(int | None): The entropy of the run, fresh entropy when
+            `None`.
+        kind(str | None): The kind of stream, the default kind when `None`.
+
+    Returns:
+        RandomStream | NumpyStream: The stream.
+    """
+    if entropy is None:
+        entropy = new_entropy()
+    return from_seed((entropy, ()), kind)
@@ -0,0 +1,561 @@
+"""
+Tables
+======
+Many poker tables played at once on one asyncio event loop.
+
+Every table runs as its own task and keeps its state in memory. A hand is
+played by `simulator.hand_events`. Bots answer a decision at once, while a
+seated player is waited on without blocking the loop, so thousands of
+players can share one process. A player who does not act in time checks
+when they can and folds otherwise.
+"""
+import asyncio
+import copy
+import itertools
+
+from poker_game import codec
+from poker_game import simulator
+from poker_game import streams
+from poker_game.poker import PokerEngine, Player
+
+MAX_SEATS = 9
+
+# Seconds a player has to act.
+ACTION_TIMEOUT = 30.0
+
+# Seconds between hands, so players see the result.
+HAND_PAUSE = 2.0
+
+# Events of a table besides those of `simulator.hand_events`.
+JOIN = 'join'
+LEAVE = 'leave'
+
+# What replaying the hand of a snapshot must give again.
+REPLAYED = ['deck', 'hole', 'board', 'bets', 'stacks']
+
+
+class Seat(object):
+    """
+    One player sitting at a table.
+
+    Args:
+        name(str): The name of the player.
+        stack(int): The chips the player sits down with.
+        strategy(function | None): The strategy of a bot, `None` for a
+            player who acts through `Table.act`.
+        token(str | None): The secret a player acts with.
+    """
+
+    def __init__(self, name, stack, strategy=None, token=None):
+        self.player = Player(name, stack)
+        self.buy_in = stack
+        self.strategy = strategy
+        self.token = token
+        self.actions = asyncio.Queue()
+
+    def is_bot(self):
+        return self.strategy is not None
+
+
+class Table(object):
+    """
+    One table and the task that plays it.
+
+    Args:
+        table_id(int): The id of the table.
+        rng(streams.RandomStream | streams.NumpyStream): The stream of the
+            table.
+        num_seats(int): The number of seats.
+        small_blind(int): The size of the small blind.
+        big_blind(int): The size of the big blind.
+        action_timeout(float): Seconds a player has to act.
+        hand_pause(float): Seconds between hands.
+    """
+
+    def __init__(self, table_id, rng, num_seats=MAX_SEATS,
+                 small_blind=simulator.SMALL_BLIND,
+                 big_blind=simulator.BIG_BLIND,
+                 action_timeout=ACTION_TIMEOUT, hand_pause=HAND_PAUSE):
+        self.table_id = table_id
+        self.rng = rng
+        self.seats = [None] * num_seats
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.action_timeout = action_timeout
+        self.hand_pause = hand_pause
+
+        self.engine = PokerEngine()
+        self.hand_count = 0
+        self.button = 0
+        self.board = []
+        self.waiting_on = None
+
+        # Table seat of every seat of the hand being played.
+        self.hand_seats = []
+        self.last_result = None
+        self.listeners = []
+        self.seated = asyncio.Event()
+        self.stopping = False
+        self.task = None
+
+        # The hand being played, see `hand_state`.
+        self.players = None
+        self.hand_stacks = []
+        self.hand_replies = []
+        # The hand of a snapshot, replayed by `_deal`, to play on.
+        self.resume = None
+
+    def join(self, name, stack=simulator.STARTING_STACK, strategy=None,
+             token=None):
+        """
+        Sits a player in the first empty seat.
+
+        Args:
+            name(str): The name of the player.
+            stack(int): The chips the player sits down with.
+            strategy(function | None): The strategy of a bot.
+            token(str | None): The secret a player acts with.
+
+        Returns:
+            int: The seat.
+
+        Raises:
+            ValueError: The table is full.
+        """
+        for seat, taken in enumerate(self.seats):
+            if taken is None:
+                self.seats[seat] = Seat(name, stack, strategy, token)
+                if len(self.occupied()) >= 2:
+                    self.seated.set()
+                self._emit((JOIN, seat))
+                return seat
+        raise ValueError("Table {} is full.".format(self.table_id))
+
+    def leave(self, seat):
+        """
+        Empties a seat. A player in a hand folds on their next decision.
+        """
+        self.seats[seat] = None
+        if len(self.occupied()) < 2:
+            self.seated.clear()
+        self._emit((LEAVE, seat))
+
+    def occupied(self):
+        """
+        Returns the seats with a player.
+        """
+        return [seat for seat, taken in enumerate(self.seats)
+                if taken is not None]
+
+    def authorized(self, seat, token):
+        """
+        Returns whether a token is that of the player in a seat.
+        """
+        taken = self.seats[seat] if 0 <= seat < len(self.seats) else None
+        return (taken is not None and not taken.is_bot() and
+                taken.token is not None and taken.token == token)
+
+    def act(self, seat, action, amount=0, token=None):
+        """
+        Queues the action of a player for their next decision.
+
+        Args:
+            seat(int): The seat of the player.
+            action(str): One of `simulator.ACTIONS`.
+            amount(int): The total bet of a bet or raise.
+            token(str | None): The secret of the player.
+
+        Raises:
+            ValueError: The seat is empty, a bot's or the token is wrong.
+        """
+        if not self.authorized(seat, token):
+            raise ValueError("Seat {} cannot act.".format(seat))
+        if action not in simulator.ACTIONS:
+            raise ValueError("Unknown action {!r}.".format(action))
+        self.seats[seat].actions.put_nowait((action, int(amount)))
+
+    def state(self):
+        """
+        Returns the public state of the table.
+
+        Returns:
+            dict: The table, the board and every seat, without hole cards.
+        """
+        return {
+            'table': self.table_id,
+            'hand': self.hand_count,
+            'button': self.button,
+            'board': [codec.ID_STRINGS[card] for card in self.board],
+            'waiting_on': self.waiting_on,
+            'seats': [
+                None if taken is None else {
+                    'name': taken.player.name,
+                    'stack': taken.player.value,
+                    'bet': taken.player.bet,
+                    'bot': taken.is_bot()
+                }
+                for taken in self.seats
+            ]
+        }
+
+    def _emit(self, event):
+        """
+        Passes an event to every listener. Seats in the events of a hand are
+        numbered among the players dealt in, see `hand_seats`.
+        """
+        for listener in self.listeners:
+            listener(self, event)
+
+    async def _decide(self, taken, decision):
+        """
+        Waits for the action of a seat, without blocking other tables.
+        """
+        if taken is None:
+            return simulator.FOLD, 0
+        if taken.is_bot():
+            return taken.strategy(decision)
+
+        # Drop actions sent before this decision was asked for.
+        while not taken.actions.empty():
+            taken.actions.get_nowait()
+        try:
+            return await asyncio.wait_for(
+                taken.actions.get(), self.action_timeout)
+        except asyncio.TimeoutError:
+            if decision.to_call:
+                return simulator.FOLD, 0
+            return simulator.CHECK, 0
+
+    def _deal(self, hand=None):
+        """
+        Deals a hand between the seated players, or replays the hand of a
+        snapshot to the decision it was waiting on, without emitting its
+        events again.
+
+        Args:
+            hand(dict | None): The hand being played in a snapshot, see
+                `hand_state`.
+
+        Returns:
+            tuple(generator, tuple): The events of the hand and the first
+                event not handled yet.
+
+        Raises:
+            ValueError: The hand does not replay to the snapshot.
+        """
+        if hand is None:
+            occupied = self.occupied()
+            players = [self.seats[seat].player for seat in occupied]
+            for seat, player in zip(occupied, players):
+                # Busted players buy in again.
+                if player.value <= 0:
+                    player.value = self.seats[seat].buy_in
+        else:
+            occupied = hand['seats']
+            players = []
+            for seat, (name, stack) in zip(occupied, hand['players']):
+                taken = self.seats[seat]
+                # A player who left is still in the hand.
+                player = Player(name, stack) if taken is None else taken.player
+                player.value = stack
+                players.append(player)
+
+        self.engine.deck.rng = self.rng.spawn(self.hand_count)
+        button = self.hand_count % len(players)
+        self.button = occupied[button]
+        self.hand_seats = occupied
+        self.players = players
+        self.hand_stacks = [player.value for player in players]
+        self.hand_replies = []
+        events = simulator.hand_events(
+            self.engine, players, button, self.small_blind, self.big_blind,
+            self.hand_count)
+        event = next(events)
+        if hand is None:
+            return events, event
+
+        replies = [tuple(reply) for reply in hand['replies']]
+        while event[0] != simulator.RESULT:
+            if event[0] == simulator.STREET:
+                self.board = event[2]
+            elif event[0] == simulator.DECISION:
+                if len(self.hand_replies) == len(replies):
+                    break
+                reply = replies[len(self.hand_replies)]
+                self.hand_replies.append(reply)
+                event = events.send(reply)
+                continue
+            event = next(events)
+
+        state = self.hand_state()
+        if (event[0] != simulator.DECISION or
+                any(state[key] != hand[key] for key in REPLAYED)):
+            events.close()
+            self.players = None
+            raise ValueError("Hand {} of table {} does not replay.".format(
+                self.hand_count, self.table_id))
+        return events, event
+
+    def hand_state(self):
+        """
+        Returns the hand being played as plain data, `None` between hands.
+
+        Note:
+            The players' stacks when the hand was dealt, the seed of the
+            table and the replies to every decision so far are enough to
+            play the hand again to where it is. The deck, hole cards, board,
+            bets and stacks that replay gives are kept to check it.
+
+        Returns:
+            dict | None: The hand.
+        """
+        if self.players is None:
+            return None
+        return {
+            'seats': list(self.hand_seats),
+            'players': [[player.name, stack] for player, stack
+                        in zip(self.players, self.hand_stacks)],
+            'replies': [list(reply) for reply in self.hand_replies],
+            'deck': self.engine.deck.cards.hex(),
+            'hole': [[player.hand.card_1.id, player.hand.card_2.id]
+                     for player in self.players],
+            'board': list(self.board),
+            'bets': [player.bet for player in self.players],
+            'stacks': [player.value for player in self.players],
+        }
+
+    async def play_hand(self):
+        """
+        Plays one hand between the seated players, or the rest of the hand
+        of a snapshot.
+
+        Returns:
+            simulator.HandResult: The outcome of the hand, with seats
+                numbered among the players dealt in.
+        """
+        if self.resume is not None:
+            events, event = self.resume
+            self.resume = None
+        else:
+            events, event = self._deal()
+        occupied = self.hand_seats
+
+        while True:
+            kind = event[0]
+            if kind == simulator.STREET:
+                self.board = event[2]
+            elif kind == simulator.DECISION:
+                decision = event[1]
+                seat = occupied[decision.seat]
+                self.waiting_on = seat
+                self._emit(event)
+                # A player may leave while the hand is played.
+                reply = await self._decide(self.seats[seat], decision)
+                self.waiting_on = None
+                self.hand_replies.append(reply)
+                event = events.send(reply)
+                continue
+            self._emit(event)
+            if kind == simulator.RESULT:
+                events.close()
+                self.hand_count += 1
+                self.last_result = event[1]
+                self.players = None
+                return event[1]
+            event = next(events)
+
+    async def run(self):
+        """
+        Plays hands for as long as two players are seated, until stopped.
+        """
+        while not self.stopping:
+            await self.seated.wait()
+            if self.stopping:
+                break
+            await self.play_hand()
+            if len(self.occupied()) < 2:
+                self.seated.clear()
+            # Let players see the result, and every other table run.
+            await asyncio.sleep(self.hand_pause)
+
+    async def stop(self):
+        """
+        Stops the task of the table once the hand being played ends.
+        """
+        self.stopping = True
+        # Wakes a table waiting for players.
+        self.seated.set()
+        if self.task is not None:
+            await self.task
+            self.task = None
+
+    def export(self):
+        """
+        Returns the table as plain data, see `Lobby.adopt`.
+
+        Returns:
+            dict: The table, its stream, its players and the hand being
+                played.
+        """
+        strategy_names = dict(
+            (strategy, name)
+            for name, strategy in simulator.STRATEGIES.items())
+        return {
+            'table': self.table_id,
+            'rng': [self.rng.seed, self.rng.KIND],
+            'num_seats': len(self.seats),
+            'small_blind': self.small_blind,
+            'big_blind': self.big_blind,
+            'hand': self.hand_count,
+            'seats': [
+                None if taken is None else {
+                    'name': taken.player.name,
+                    'stack': taken.player.value,
+                    'buy_in': taken.buy_in,
+                    'strategy': strategy_names.get(
+                        taken.strategy, 'raise_strong')
+                    if taken.is_bot() else None,
+                    'token': taken.token
+                }
+                for taken in self.seats
+            ],
+            'hand_state': self.hand_state()
+        }
+
+    def start(self):
+        """
+        Starts the task of the table on the running loop.
+        """
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+        return self.task
+
+
+class Lobby(object):
+    """
+    Every table of one process.
+
+    Args:
+        seed(int | None): The entropy of every table stream, fresh when
+            `None`.
+        kind(str | None): The kind of stream, see `streams`.
+        history(history.HistoryWriter | None): A log to append every hand
+            played at the tables to.
+        table_options(dict): Options of every new `Table`.
+    """
+
+    def __init__(self, seed=None, kind=None, history=None, **table_options):
+        self.rng = streams.make_stream(seed, kind)
+        self.history = history
+        self.table_options = table_options
+        self.tables = {}
+        self._ids = itertools.count()
+
+    def _add(self, table):
+        self.tables[table.table_id] = table
+        if self.history is not None:
+            table.listeners.append(self._record)
+        table.start()
+        return table
+
+    def _record(self, table, event):
+        """
+        Appends a hand that ended to the history. The hands of every table
+        share the log, numbered in the order they end, while the seed key of
+        each holds its table and hand number.
+        """
+        if event[0] == simulator.RESULT:
+            result = copy.copy(event[1])
+            result.hand_id = self.history.last_id + 1
+            self.history.write(result)
+
+    def create_table(self, table_id=None, **options):
+        """
+        Creates a table and starts it.
+
+        Args:
+            table_id(int | None): The id of the table, the next free one when
+                `None`.
+            options(dict): Options of the `Table`.
+
+        Returns:
+            Table: The table.
+
+        Raises:
+            ValueError: The id is taken.
+        """
+        if table_id is None:
+            table_id = next(self._ids)
+            while table_id in self.tables:
+                table_id = next(self._ids)
+        elif table_id in self.tables:
+            raise ValueError("Table {} exists.".format(table_id))
+        table_options = dict(self.table_options, **options)
+        table = Table(table_id, self.rng.spawn(table_id), **table_options)
+        return self._add(table)
+
+    def adopt(self, data):
+        """
+        Starts a table exported by `Table.export`, e.g. from another process
+        or a snapshot, playing on the hand it was in.
+
+        Args:
+            data(dict): The exported table.
+
+        Returns:
+            Table: The table.
+
+        Raises:
+            ValueError: The id is taken.
+        """
+        table_id = data['table']
+        if table_id in self.tables:
+            raise ValueError("Table {} exists.".format(table_id))
+        seed, kind = data['rng']
+        options = dict(self.table_options, num_seats=data['num_seats'],
+                       small_blind=data['small_blind'],
+                       big_blind=data['big_blind'])
+        table = Table(table_id, streams.from_seed(
+            (seed[0], tuple(seed[1])), kind), **options)
+        table.hand_count = data['hand']
+        for seat, taken in enumerate(data['seats']):
+            if taken is None:
+                continue
+            strategy = None
+            if taken['strategy'] is not None:
+                strategy = simulator.STRATEGIES[taken['strategy']]
+            table.seats[seat] = Seat(taken['name'], taken['stack'], strategy,
+                                     taken['token'])
+            table.seats[seat].buy_in = taken['buy_in']
+        hand = data.get('hand_state')
+        if hand is not None:
+            try:
+                table.resume = table._deal(hand)
+            except ValueError:
+                # The hand cannot be played on, e.g. with another kind of
+                # stream, so it is called off and the chips go back.
+                table.players = None
+                for seat, (_, stack) in zip(hand['seats'], hand['players']):
+                    if table.seats[seat] is not None:
+                        table.seats[seat].player.value = stack
+        if table.resume is not None or len(table.occupied()) >= 2:
+            table.seated.set()
+        return self._add(table)
+
+    def get(self, table_id):
+        """
+        Returns a table by id.
+
+        Raises:
+            KeyError: No such table.
+        """
+        return self.tables[table_id]
+
+    async def close(self):
+        """
+        Stops every table.
+        """
+        tasks = [table.task for table in self.tables.values() if table.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,299 @@
+"""
+Tracker
+=======
+Follows the hand of one player street by street.
+
+A `HandTracker` is seeded with the hole cards and takes the board one card
+at a time as the community is turned over. Each card updates the packed
+cards, the suit counts and masks and the masks of ranks held once, twice,
+three and four times in a few operations, so the strength, the draws and
+the outs at every street come from masks rather than from the full card
+list.
+
+Outs here are the unseen cards that lift the hand into a higher category.
+"""
+from poker_game import codec
+from poker_game import hands
+from poker_game.poker import Community
+
+NUM_SUITS = codec.NUM_SUITS
+BOARD_SIZE = 5
+
+# Draws.
+FLUSH_DRAW = 'flush draw'
+OPEN_ENDED = 'open-ended'
+GUTSHOT = 'gutshot'
+BACKDOOR_FLUSH = 'backdoor flush'
+BACKDOOR_STRAIGHT = 'backdoor straight'
+
+# Street of every board size.
+BOARD_STREETS = {
+    0: Community.PREFLOP,
+    3: Community.FLOP,
+    4: Community.TURN,
+    5: Community.RIVER
+}
+
+# Packed bits of every card.
+ALL_CARDS = hands.RANK_MASK * hands.SUIT_SPREAD
+
+
+def _build_straight_draws():
+    """
+    Builds the ranks that complete a straight for every 13 bit rank mask.
+
+    Returns:
+        list(int): A rank mask of the ranks that would make a straight, 0
+            when the mask already holds one.
+    """
+    straight_highs = hands.STRAIGHT_HIGHS
+    draws = []
+    for mask in range(1 << hands.NUM_RANKS):
+        completing = 0
+        if not straight_highs[mask]:
+            for rank in range(hands.NUM_RANKS):
+                bit = 1 << rank
+                if not mask & bit and straight_highs[mask | bit]:
+                    completing |= bit
+        draws.append(completing)
+    return draws
+
+
+STRAIGHT_DRAWS = _build_straight_draws()
+
+# Whether one more rank would leave a straight draw, for every rank mask.
+BACKDOOR_STRAIGHTS = [
+    not STRAIGHT_DRAWS[mask] and not hands.STRAIGHT_HIGHS[mask] and any(
+        STRAIGHT_DRAWS[mask | 1 << rank] for rank in range(hands.NUM_RANKS)
+        if not mask >> rank & 1)
+    for mask in range(1 << hands.NUM_RANKS)
+]
+
+
+def pair_category(num_ranks):
+    """
+    Returns the category made by the ranks held more than once.
+
+    Args:
+        num_ranks(list(int)): The number of ranks held exactly zero, one,
+            two, three and four times.
+
+    Returns:
+        int: The category, from `hands.HIGH_CARD` to
+            `hands.FOUR_OF_A_KIND`, ignoring straights and flushes.
+    """
+    if num_ranks[4]:
+        return hands.FOUR_OF_A_KIND
+    if num_ranks[3] and (num_ranks[3] > 1 or num_ranks[2]):
+        return hands.FULL_HOUSE
+    if num_ranks[3]:
+        return hands.THREE_OF_A_KIND
+    if num_ranks[2] > 1:
+        return hands.TWO_PAIR
+    if num_ranks[2]:
+        return hands.ONE_PAIR
+    return hands.HIGH_CARD
+
+
+class HandTracker(object):
+    """
+    The hand of one player, updated as each board card arrives.
+
+    Args:
+        hole_cards(iterable(int)): The card ids of the player.
+        community(iterable(int)): Any board card ids already showing.
+
+    Raises:
+        ValueError: A card is given twice.
+    """
+
+    def __init__(self, hole_cards, community=()):
+        self.hole_cards = tuple(hole_cards)
+        self.board = []
+        self.cards = 0
+        self.suit_counts = [0] * NUM_SUITS
+        self.suit_masks = [0] * NUM_SUITS
+
+        # Rank masks of the ranks held exactly zero to four times.
+        self.by_count = [hands.RANK_MASK, 0, 0, 0, 0]
+        self._strength = None
+
+        for card in self.hole_cards:
+            self._add(card)
+        for card in community:
+            self.add(card)
+
+    def _add(self, card):
+        mask = codec.CARD_MASKS[card]
+        if self.cards & mask:
+            raise ValueError(
+                "{} is already held.".format(codec.ID_STRINGS[card]))
+        self.cards |= mask
+
+        suit = codec.ID_SUITS[card]
+        bit = codec.ID_RANK_BITS[card]
+        self.suit_counts[suit] += 1
+        self.suit_masks[suit] |= bit
+
+        # Move the rank up one count.
+        by_count = self.by_count
+        for count in range(4):
+            if by_count[count] & bit:
+                by_count[count] ^= bit
+                by_count[count + 1] |= bit
+                break
+
+        self._strength = None
+
+    def add(self, card):
+        """
+        Adds one board card.
+
+        Args:
+            card(int): The id of the card.
+        """
+        if len(self.board) == BOARD_SIZE:
+            raise ValueError("The board is already complete.")
+        self._add(card)
+        self.board.append(card)
+
+    def sync(self, community):
+        """
+        Adds the board cards a community shows that were not added yet.
+
+        Args:
+            community(poker.Community): The community of the hand.
+        """
+        if community.state == Community.PREFLOP:
+            showing = []
+        elif community.state == Community.FLOP:
+            showing = community.flop
+        elif community.state == Community.TURN:
+            showing = community.turn
+        else:
+            showing = community.river
+        for card in showing[len(self.board):]:
+            self.add(card.id)
+
+    def street(self):
+        """
+        Returns the street of the board so far, see `poker.Community`.
+        """
+        return BOARD_STREETS[len(self.board)]
+
+    def rank_mask(self):
+        """
+        Returns the rank mask of every rank held.
+        """
+        return hands.RANK_MASK & ~self.by_count[0]
+
+    def strength(self):
+        """
+        Returns the strength of the best hand so far, see `hands.evaluate`.
+        """
+        if self._strength is None:
+            self._strength = hands.evaluate_packed(self.cards)
+        return self._strength
+
+    def category(self):
+        """
+        Returns the category of the best hand so far.
+        """
+        return hands.get_category(self.strength())
+
+    def best_hand(self):
+        """
+        Returns the strength and the cards of the best hand so far, see
+            `hands.best_hand`.
+        """
+        return hands.best_hand(
+            [codec.ID_STRINGS[card] for card in self.hole_cards],
+            [codec.ID_STRINGS[card] for card in self.board])
+
+    def draws(self):
+        """
+        Lists the draws still live with cards to come.
+
+        Note:
+            Backdoor draws need both the turn and the river, so they are
+            only listed on the flop.
+
+        Returns:
+            list(str): Any of `FLUSH_DRAW`, `OPEN_ENDED`, `GUTSHOT`,
+                `BACKDOOR_FLUSH` and `BACKDOOR_STRAIGHT`.
+        """
+        draws = []
+        if len(self.board) >= BOARD_SIZE:
+            return draws
+
+        category = self.category()
+        if category < hands.FLUSH and 4 in self.suit_counts:
+            draws.append(FLUSH_DRAW)
+        if category < hands.STRAIGHT:
+            # Two completing ranks play like an open ender, double gutshots
+            # included.
+            completing = hands.POPCOUNTS[STRAIGHT_DRAWS[self.rank_mask()]]
+            if completing >= 2:
+                draws.append(OPEN_ENDED)
+            elif completing == 1:
+                draws.append(GUTSHOT)
+
+        if len(self.board) == 3:
+            if (category < hands.FLUSH and FLUSH_DRAW not in draws and
+                    3 in self.suit_counts):
+                draws.append(BACKDOOR_FLUSH)
+            if category < hands.STRAIGHT and (
+                    BACKDOOR_STRAIGHTS[self.rank_mask()]):
+                draws.append(BACKDOOR_STRAIGHT)
+        return draws
+
+    def out_mask(self, dead=0):
+        """
+        Finds the unseen cards that lift the hand into a higher category.
+
+        Args:
+            dead(int): Packed cards known to be out of the deck.
+
+        Returns:
+            int: The packed outs.
+        """
+        category = self.category()
+        unseen = ALL_CARDS & ~(self.cards | dead)
+        spread = hands.SUIT_SPREAD
+        outs = 0
+
+        # A card of a rank held k times moves that rank up to k + 1.
+        num_ranks = [hands.POPCOUNTS[mask] for mask in self.by_count]
+        for count in range(4):
+            if not self.by_count[count]:
+                continue
+            num_ranks[count] -= 1
+            num_ranks[count + 1] += 1
+            if pair_category(num_ranks) > category:
+                outs |= self.by_count[count] * spread
+            num_ranks[count] += 1
+            num_ranks[count + 1] -= 1
+
+        if category < hands.STRAIGHT:
+            outs |= STRAIGHT_DRAWS[self.rank_mask()] * spread
+
+        for suit in range(NUM_SUITS):
+            shift = codec.SUIT_SHIFT * suit
+            if category < hands.FLUSH and self.suit_counts[suit] == 4:
+                outs |= hands.RANK_MASK << shift
+            if category < hands.STRAIGHT_FLUSH:
+                outs |= STRAIGHT_DRAWS[self.suit_masks[suit]] << shift
+
+        return outs & unseen
+
+    def outs(self, dead=()):
+        """
+        Lists the unseen cards that lift the hand into a higher category.
+
+        Args:
+            dead(iterable(int)): Ids of cards known to be out of the deck.
+
+        Returns:
+            list(int): The ids of the outs.
+        """
+        return codec.unpack(self.out_mask(codec.pack(dead)))
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+"""
+Test Assets
+===========
+
+Test the production build of the front end and how the server caches it.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import asyncio
+import json
+import shutil
+import stat
+import tempfile
+import unittest
+from poker_game import assets
+from poker_game import server
+from poker_game import statics
+
+
+async def get(app, path, headers=()):
+    """
+    Sends one GET to an ASGI app and returns the status, headers and body.
+    """
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path,
+             'headers': list(headers)}
+    await app(scope, receive, send)
+    return sent[0]['status'], dict(sent[0]['headers']), sent[1]['body']
+
+
+class TestBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_page_scripts(self):
+        """
+        Tests that the bundle joins every component in the page's order.
+        """
+        with open(os.path.join(assets.STATIC_ROOT, assets.PAGE_PATH)) as page:
+            scripts = assets.page_scripts(page.read())
+        self.assertEqual(len(scripts), 6)
+        self.assertEqual(scripts[-1], '/static/js/app.jsx')
+        self.assertLess(scripts.index('/static/js/card.jsx'),
+                        scripts.index('/static/js/hand.jsx'))
+
+    def test_build(self):
+        """
+        Tests a build, with a stand in for esbuild that copies its input.
+        """
+        esbuild = os.path.join(self.folder, 'esbuild')
+        with open(esbuild, 'w') as script:
+            script.write('#!/bin/sh\ncat\n')
+        os.chmod(esbuild, os.stat(esbuild).st_mode | stat.S_IEXEC)
+
+        dist_root = os.path.join(self.folder, 'dist')
+        built = assets.build(dist_root=dist_root, esbuild=esbuild,
+                             sprites=False)
+        bundle = built['/static/js/app.js']
+        self.assertTrue(assets.is_hashed(bundle))
+
+        with open(os.path.join(dist_root, os.path.basename(bundle))) as js:
+            self.assertIn('class App extends', js.read())
+        with open(os.path.join(dist_root, assets.INDEX_NAME)) as page:
+            page = page.read()
+        self.assertIn(bundle, page)
+        self.assertIn(built['/static/css/stylesheet.css'], page)
+        self.assertIn('react.production.min.js', page)
+        self.assertNotIn('babel', page)
+        self.assertNotIn('.jsx', page)
+        with open(os.path.join(dist_root, assets.MANIFEST_NAME)) as manifest:
+            self.assertEqual(json.load(manifest), built)
+
+        # The same sources build to the same names.
+        self.assertEqual(assets.build(
+            dist_root=dist_root, esbuild=esbuild, sprites=False), built)
+
+
+class TestSprites(unittest.TestCase):
+
+    def test_layout(self):
+        """
+        Tests that every card has its own cell, the backs in the last row.
+        """
+        layout = assets.sprite_layout()
+        self.assertEqual(len(layout), 52 + len(assets.BACK_NAMES))
+        self.assertEqual(len(set(cell[1:] for cell in layout)), len(layout))
+        self.assertEqual(layout[0], ('Ad', 0, 0))
+        self.assertEqual(layout[-1][2], assets.SPRITE_ROWS - 1)
+        for name, column, row in layout:
+            self.assertLess(column, assets.SPRITE_COLUMNS)
+            self.assertTrue(os.path.isfile(os.path.join(
+                assets.STATIC_ROOT, assets.CARDS_PATH, name + '.jpg')))
+
+    def test_css(self):
+        """
+        Tests that the stylesheet offers every format with a JPEG fallback.
+        """
+        sheets = dict(
+            (scale, [('/{}.{}'.format(scale, extension), mime)
+                     for extension, mime, _ in assets.SPRITE_FORMATS])
+            for scale in assets.SPRITE_SCALES)
+        css = assets.sprites_css(sheets)
+        self.assertIn('background-image: url(/1.jpeg);', css)
+        self.assertIn('url(/1.avif) type("image/avif") 1x, '
+                      'url(/2.avif) type("image/avif") 2x', css)
+        self.assertIn('background-size: 1300% 500%;', css)
+        # The page falls back to single images without this.
+        self.assertIn('--card-sprites: 1;', css)
+
+    @unittest.skipIf(assets.Image is None, "Pillow is not installed.")
+    def test_build_sprites(self):
+        """
+        Tests packing small cards into sheets at each scale.
+        """
+        folder = tempfile.mkdtemp()
+        try:
+            cards_root = os.path.join(folder, assets.CARDS_PATH)
+            os.makedirs(cards_root)
+            for name, _, _ in assets.sprite_layout():
+                assets.Image.new('CMYK', (6, 9), 'red').save(
+                    os.path.join(cards_root, name + '.jpg'))
+            dist_root = os.path.join(folder, 'dist')
+            os.makedirs(dist_root)
+
+            built = {}
+            assets.build_sprites(folder, dist_root, built)
+            jpeg = built['/static/images/cards/cards@2x.jpeg']
+            with assets.Image.open(os.path.join(
+                    dist_root, os.path.basename(jpeg))) as sheet:
+                size = sheet.size
+            with open(os.path.join(dist_root, assets.SPRITES_CSS)) as css:
+                css = css.read()
+        finally:
+            shutil.rmtree(folder)
+
+        self.assertEqual(size, (2 * assets.CARD_WIDTH * assets.SPRITE_COLUMNS,
+                                2 * assets.CARD_HEIGHT * assets.SPRITE_ROWS))
+        self.assertIn(jpeg, css)
+        self.assertTrue(assets.is_hashed(built['/static/dist/sprites.css']))
+
+    @unittest.skipIf(assets.Image is None, "Pillow is not installed.")
+    def test_build_sprites_only(self):
+        """
+        Tests building the sprites alone, replacing earlier ones and keeping
+        the rest of a build.
+        """
+        folder = tempfile.mkdtemp()
+        try:
+            cards_root = os.path.join(folder, assets.CARDS_PATH)
+            os.makedirs(cards_root)
+            for name, _, _ in assets.sprite_layout():
+                assets.Image.new('RGB', (6, 9), 'red').save(
+                    os.path.join(cards_root, name + '.jpg'))
+            dist_root = os.path.join(folder, 'dist')
+            os.makedirs(dist_root)
+            for name in ['cards@1x.000000000000.jpeg', 'app.000000000000.js']:
+                open(os.path.join(dist_root, name), 'w').close()
+
+            built = assets.build_sprites_only(folder, dist_root)
+            names = os.listdir(dist_root)
+        finally:
+            shutil.rmtree(folder)
+
+        self.assertIn(assets.SPRITES_CSS, names)
+        self.assertIn('app.000000000000.js', names)
+        self.assertNotIn('cards@1x.000000000000.jpeg', names)
+        self.assertIn(os.path.basename(
+            built['/static/images/cards/cards@1x.jpeg']), names)
+
+
+class TestCaching(unittest.TestCase):
+
+    def test_headers(self):
+        """
+        Tests that built files are immutable and others revalidate.
+        """
+        folder = tempfile.mkdtemp()
+        static_root = server.STATIC_ROOT
+        try:
+            os.makedirs(os.path.join(folder, assets.DIST_DIR))
+            built = os.path.join(folder, assets.DIST_DIR,
+                                 assets.hashed_name('app.js', b'1;'))
+            with open(built, 'wb') as built_file:
+                built_file.write(b'1;')
+            with open(os.path.join(folder, 'plain.css'), 'wb') as plain:
+                plain.write(b'a {}')
+            server.STATIC_ROOT = folder
+
+            async def run():
+                app = server.PokerApp()
+                path = '/static/dist/' + os.path.basename(built)
+                first = await get(app, path)
+                again = await get(app, path, [
+                    (b'if-none-match', first[1][b'etag'])])
+                plain = await get(app, '/static/plain.css')
+                return first, again, plain
+
+            first, again, plain = asyncio.run(run())
+        finally:
+            server.STATIC_ROOT = static_root
+            shutil.rmtree(folder)
+
+        self.assertEqual(first[0], 200)
+        self.assertEqual(first[1][b'cache-control'],
+                         statics.IMMUTABLE.encode('latin-1'))
+        self.assertEqual(first[2], b'1;')
+        self.assertEqual(again[0], 304)
+        self.assertEqual(again[2], b'')
+        self.assertEqual(plain[1][b'cache-control'],
+                         statics.REVALIDATE.encode('latin-1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+Test Batch
+==========
+
+Test batch evaluation and the endpoint streaming its results.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import asyncio
+import json
+import random
+import unittest
+from poker_game import batch
+from poker_game import codec
+from poker_game import hands
+from poker_game import server
+
+
+def random_deals(num_deals, seed=0):
+    rng = random.Random(seed)
+    deals = []
+    for idx in range(num_deals):
+        cards = rng.sample(range(codec.NUM_CARDS), 7)
+        board_size = batch.BOARD_SIZES[idx % len(batch.BOARD_SIZES)]
+        deals.append((tuple(cards[:2]), tuple(cards[2:2 + board_size])))
+    return deals
+
+
+async def post(app, path, body, headers=()):
+    """
+    Sends one POST to an ASGI app and returns the status, content type and
+    the body chunks.
+    """
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': path,
+             'headers': list(headers)}
+    await app(scope, receive, send)
+    content_type = dict(sent[0]['headers'])[b'content-type']
+    return (sent[0]['status'], content_type,
+            [message['body'] for message in sent[1:]])
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_parse(self):
+        """
+        Tests reading JSON and binary batches and refusing bad ones.
+        """
+        deals = batch.parse_json([[['As', 'Kd'], []], [[0, 1], [2, 3, 4]]])
+        self.assertEqual(deals, [((39, 12), ()), ((0, 1), (2, 3, 4))])
+
+        body = bytes([39, 12] + [batch.EMPTY] * 5 + [0, 1, 2, 3, 4, 5, 6])
+        self.assertEqual(batch.parse_binary(body),
+                         [((39, 12), ()), ((0, 1), (2, 3, 4, 5, 6))])
+
+        for data in ([[['As', 'As'], []]], [[['As'], []]],
+                     [[['As', 'Kd'], ['2c']]], [[['Xx', 'Kd'], []]],
+                     {'hands': []}, [[['As', 'Kd']]], [[[True, 1], []]]):
+            with self.assertRaises(ValueError):
+                batch.parse_json(data)
+        with self.assertRaises(ValueError):
+            batch.parse_binary(body[:-1])
+        with self.assertRaises(ValueError):
+            batch.parse_binary(bytes([60, 1, 2, 3, 4, 5, 6]))
+
+    def test_evaluate_chunk(self):
+        """
+        Tests that a batch gives the strength and cards of `hands.best_hand`.
+        """
+        deals = random_deals(200)
+        for (hole, board), result in zip(deals, batch.evaluate_chunk(deals)):
+            strength, category, best = result
+            self.assertEqual(strength, hands.evaluate(hole, board))
+            self.assertEqual(category, hands.get_category(strength))
+            _, cards = hands.best_hand(
+                [codec.ID_STRINGS[card] for card in hole],
+                [codec.ID_STRINGS[card] for card in board])
+            self.assertEqual(best, [codec.to_id(card) for card in cards])
+
+    def test_processes(self):
+        """
+        Tests that the worker pool returns the chunks in order.
+        """
+        deals = random_deals(1000)
+
+        async def run(evaluator):
+            results = []
+            async for chunk in evaluator.evaluate(deals):
+                results.extend(chunk)
+            evaluator.close()
+            return results
+
+        inline = asyncio.run(run(batch.BatchEvaluator(1, chunk_size=64)))
+        pooled = asyncio.run(run(batch.BatchEvaluator(2, chunk_size=64)))
+        self.assertEqual(inline, pooled)
+        self.assertEqual(inline, batch.evaluate_chunk(deals))
+
+
+class TestBatchServer(unittest.TestCase):
+
+    def test_evaluate(self):
+        """
+        Tests streaming NDJSON and binary results over ASGI.
+        """
+        deals = random_deals(50)
+        data = [[list(hole), list(board)] for hole, board in deals]
+        binary = b''.join(
+            bytes(hole + board + (batch.EMPTY,) * (5 - len(board)))
+            for hole, board in deals)
+
+        async def run():
+            app = server.PokerApp(
+                evaluator=batch.BatchEvaluator(1, chunk_size=16))
+            return [
+                await post(app, '/evaluate',
+                           json.dumps(data).encode('utf-8')),
+                await post(app, '/evaluate', binary, [
+                    (b'content-type', b'application/octet-stream'),
+                    (b'accept', b'application/octet-stream')]),
+                await post(app, '/evaluate', b'[[["As"], []]]'),
+            ]
+
+        ndjson, binary_response, bad = asyncio.run(run())
+        expected = batch.evaluate_chunk(deals)
+
+        status, content_type, chunks = ndjson
+        self.assertEqual((status, content_type),
+                         (200, b'application/x-ndjson'))
+        # One chunk per 16 deals and an empty one to end.
+        self.assertEqual(len(chunks), 5)
+        lines = b''.join(chunks).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['rank'] for line in lines],
+                         [result[0] for result in expected])
+        self.assertEqual(json.loads(lines[0])['best'], expected[0][2])
+
+        status, content_type, chunks = binary_response
+        self.assertEqual(content_type, b'application/octet-stream')
+        body = b''.join(chunks)
+        self.assertEqual(len(body), batch.RESULT.size * len(deals))
+        self.assertEqual(batch.RESULT.unpack_from(body, 0)[0], expected[0][0])
+
+        self.assertEqual(bad[0], 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
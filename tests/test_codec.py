@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Test Codec
+==========
+
+Test that every form of a card agrees with the others.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import unittest
+from poker_game import codec
+from poker_game import hands
+from poker_game import poker
+
+CARD_IMAGES = os.path.join(
+    os.path.dirname(os.path.abspath(codec.__file__)),
+    'static', 'images', 'cards')
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_round_trip(self):
+        """
+        Tests that ids and strings convert both ways.
+        """
+        for card_id in range(codec.NUM_CARDS):
+            string = codec.to_string(card_id)
+            self.assertEqual(codec.to_id(string), card_id)
+            self.assertEqual(codec.to_id(string[0] + string[1].upper()),
+                             card_id)
+
+        self.assertEqual(codec.to_string(0), 'Ad')
+        self.assertEqual(codec.to_string(39), 'As')
+        self.assertEqual(codec.to_id('Kc'), 25)
+
+    def test_engine_and_evaluator_agree(self):
+        """
+        Tests that the engine cards and the evaluator read an id the same way.
+        """
+        for card_id in range(codec.NUM_CARDS):
+            card = poker.Card(card_id)
+            self.assertEqual(card.code, codec.ID_STRINGS[card_id])
+            self.assertEqual(hands.get_ordinal(card.code),
+                             codec.ID_ORDINALS[card_id])
+            self.assertEqual(hands.get_suit(card.code),
+                             codec.ID_SUITS[card_id])
+            self.assertEqual(poker.Card.SUITS[codec.ID_SUITS[card_id]],
+                             card.suit)
+
+    def test_front_end_images(self):
+        """
+        Tests that every card string has a card image.
+        """
+        for string in codec.ID_STRINGS:
+            path = os.path.join(CARD_IMAGES, string + '.jpg')
+            self.assertTrue(os.path.exists(path), path)
+
+    def test_pack(self):
+        """
+        Tests that packing and unpacking keeps the cards.
+        """
+        card_ids = [0, 12, 13, 26, 39, 51]
+        cards = codec.pack(card_ids)
+        self.assertEqual(bin(cards).count('1'), len(card_ids))
+        self.assertEqual(sorted(codec.unpack(cards)), card_ids)
+        self.assertEqual(codec.unpack(0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Test Equity
+===========
+
+Test that the equity calculator is accurate and reproducible.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import unittest
+from poker_game import equity
+from poker_game import hands
+
+
+def to_ids(*cards):
+    return [hands.to_id(card) for card in cards]
+
+
+class TestEquity(unittest.TestCase):
+
+    def test_monte_carlo_accuracy(self):
+        """
+        Tests a well known preflop matchup.
+        """
+        result = equity.monte_carlo(
+            [to_ids('As', 'Ad'), to_ids('Ks', 'Kd')],
+            iterations=20000,
+            seed=7,
+            processes=1)
+
+        aces, kings = result.players
+        self.assertEqual(result.trials, 20000)
+        self.assertAlmostEqual(aces.equity, 0.82, delta=0.02)
+        self.assertAlmostEqual(aces.equity + kings.equity, 1.0)
+        self.assertLess(aces.interval[0], aces.equity)
+        self.assertGreater(aces.interval[1], aces.equity)
+
+    def test_monte_carlo_reproducible(self):
+        """
+        Tests that a seed gives the same answer with or without a pool.
+        """
+        spot = [to_ids('Ah', 'Kh'), to_ids('7c', '7d'), to_ids('Qs', 'Js')]
+        board = to_ids('2h', '7h', 'Td')
+        alone = equity.monte_carlo(
+            spot, board, iterations=5000, seed=11, processes=1)
+        pooled = equity.monte_carlo(
+            spot, board, iterations=5000, seed=11, processes=2)
+
+        for first, second in zip(alone.players, pooled.players):
+            self.assertEqual(first.equity, second.equity)
+            self.assertEqual(first.tie, second.tie)
+
+    def test_monte_carlo_early_stop(self):
+        """
+        Tests that the run stops once the standard error is small enough.
+        """
+        result = equity.monte_carlo(
+            [to_ids('As', 'Ad'), to_ids('Ks', 'Kd')],
+            iterations=100000,
+            seed=3,
+            processes=1,
+            target_stderr=0.01)
+
+        self.assertLess(result.trials, 100000)
+        for player in result.players:
+            self.assertLessEqual(player.stderr, 0.01)
+
+    def test_complete_board(self):
+        """
+        Tests that a complete board with dead cards is settled exactly.
+        """
+        result = equity.monte_carlo(
+            [to_ids('As', 'Ks'), to_ids('Ad', 'Kd')],
+            to_ids('2c', '7h', '9c', 'Jh', '4s'),
+            dead=to_ids('3c'),
+            iterations=10,
+            processes=1)
+
+        for player in result.players:
+            self.assertEqual(player.tie, 1.0)
+            self.assertEqual(player.equity, 0.5)
+
+    def test_exact_suit_reduction(self):
+        """
+        Tests that collapsing suit isomorphic boards does not change the
+        answer.
+        """
+        spot = [to_ids('As', 'Ad'), to_ids('Ks', 'Kd')]
+        board = to_ids('2s', '7d', '9d')
+        reduced = equity.exact(spot, board)
+        full = equity.exact(spot, board, reduce_suits=False)
+
+        self.assertEqual(reduced.trials, 990)
+        for first, second in zip(reduced.players, full.players):
+            self.assertAlmostEqual(first.equity, second.equity)
+            self.assertAlmostEqual(first.win, second.win)
+            self.assertAlmostEqual(first.tie, second.tie)
+
+    def test_exact_matches_monte_carlo(self):
+        """
+        Tests that the exact answer lies within the Monte Carlo estimate.
+        """
+        spot = [to_ids('Ah', 'Kh'), to_ids('7c', '7d'), to_ids('Qs', 'Js')]
+        board = to_ids('2h', '7h', 'Td')
+        exact = equity.exact(spot, board)
+        estimate = equity.monte_carlo(
+            spot, board, iterations=20000, seed=5, processes=1)
+
+        total = 0.0
+        for exact_player, player in zip(exact.players, estimate.players):
+            self.assertEqual(exact_player.stderr, 0.0)
+            self.assertAlmostEqual(
+                exact_player.equity, player.equity,
+                delta=4 * player.stderr)
+            total += exact_player.equity
+        self.assertAlmostEqual(total, 1.0)
+
+    def test_bad_spots(self):
+        """
+        Tests that invalid spots are refused.
+        """
+        with self.assertRaises(ValueError):
+            equity.monte_carlo([to_ids('As', 'Ad')])
+        with self.assertRaises(ValueError):
+            equity.monte_carlo([to_ids('As', 'Ad'), to_ids('As', 'Kd')])
+        with self.assertRaises(ValueError):
+            equity.monte_carlo(
+                [to_ids('As', 'Ad'), to_ids('Ks', 'Kd')], dead=to_ids('Kd'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""
+Test Feed
+=========
+
+Test the delta messages pushed for a table and the WebSocket serving them.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import asyncio
+import json
+import unittest
+from poker_game import feed
+from poker_game import server
+from poker_game import shards
+from poker_game import simulator
+from poker_game import streams
+from poker_game import tables
+
+
+def bot_table(num_bots=3):
+    """
+    Returns a table of bots that is not started, and its feed.
+    """
+    table = tables.Table(0, streams.make_stream(6, streams.RANDOM))
+    table_feed = feed.TableFeed(table)
+    for bot in range(num_bots):
+        table.join('Bot {}'.format(bot), strategy=simulator.raise_strong)
+    return table, table_feed
+
+
+def drain(subscriber):
+    messages = []
+    while not subscriber.queue.empty():
+        messages.append(subscriber.queue.get_nowait())
+    return messages
+
+
+class TestFeed(unittest.TestCase):
+
+    def test_deltas(self):
+        """
+        Tests that a hand is pushed as numbered deltas adding up to the hand.
+        """
+        async def play():
+            table, table_feed = bot_table()
+            subscriber = table_feed.subscribe(0)
+            result = await table.play_hand()
+            return result, drain(subscriber)
+
+        result, messages = asyncio.run(play())
+        self.assertEqual([message[0] for message in messages],
+                         list(range(1, len(messages) + 1)))
+        types = [message[1] for message in messages]
+        self.assertEqual(types[:5], ['j', 'j', 'j', 'd', 'b'])
+        self.assertEqual(types[-1], 'r')
+
+        # The streets show each card once, in the order of the board.
+        shown = [card for message in messages if message[1] == 's'
+                 for card in message[3]]
+        self.assertEqual(shown, result.board[:len(shown)])
+
+        winnings = messages[-1][2]
+        self.assertEqual(sum(winnings.values()), 0)
+        self.assertEqual(
+            len([message for message in messages if message[1] == 'a']),
+            len(result.actions))
+
+    def test_resume(self):
+        """
+        Tests that a client resumes after its last message, or gets a
+        snapshot when those messages are gone.
+        """
+        async def play():
+            table, table_feed = bot_table()
+            await table.play_hand()
+            resumed = drain(table_feed.subscribe(5))
+            current = drain(table_feed.subscribe(table_feed.seq))
+
+            table_feed.history.clear()
+            await table.play_hand()
+            too_old = drain(table_feed.subscribe(5))
+            return table_feed, resumed, current, too_old
+
+        table_feed, resumed, current, too_old = asyncio.run(play())
+        self.assertEqual(resumed[0][0], 6)
+        self.assertEqual(resumed[-1][1], 'r')
+        self.assertEqual(current, [])
+        self.assertEqual(len(too_old), 1)
+        self.assertEqual(too_old[0][:2], [table_feed.seq, 'S'])
+        self.assertEqual(too_old[0][2]['hand'], 2)
+
+    def test_slow_client(self):
+        """
+        Tests that a client whose queue fills gets one snapshot instead.
+        """
+        async def play():
+            table, table_feed = bot_table()
+            slow = feed.Subscriber(table_feed, queue_size=4)
+            table_feed.subscribers.add(slow)
+            await table.play_hand()
+            lagged = slow.lagged
+            message = await slow.next()
+            return table_feed, lagged, message, slow
+
+        table_feed, lagged, message, slow = asyncio.run(play())
+        self.assertTrue(lagged)
+        self.assertEqual(message[:2], [table_feed.seq, 'S'])
+        self.assertTrue(slow.queue.empty())
+        self.assertFalse(slow.lagged)
+
+    def test_hole_cards(self):
+        """
+        Tests that only a seated client is sent its cards.
+        """
+        async def play():
+            table, table_feed = bot_table(2)
+            seat = table.join('Player', token='secret')
+            player = table_feed.subscribe(seat=seat)
+            watcher = table_feed.subscribe()
+            table.act(seat, simulator.FOLD, token='secret')
+            task = asyncio.ensure_future(table.play_hand())
+            await asyncio.sleep(0.01)
+            table.act(seat, simulator.FOLD, token='secret')
+            result = await task
+            return seat, result, drain(player), drain(watcher)
+
+        seat, result, player, watcher = asyncio.run(play())
+        holes = [message for message in player if message[1] == 'h']
+        self.assertEqual(len(holes), 1)
+        self.assertEqual(tuple(holes[0][2]), result.hole_cards[seat])
+        self.assertFalse([message for message in watcher
+                          if message[1] == 'h'])
+        self.assertIsNone(player[0][2]['hole'])
+
+
+class TestFeedServer(unittest.TestCase):
+
+    def test_websocket(self):
+        """
+        Tests watching and playing a table over an ASGI WebSocket.
+        """
+        async def connect(app, path, query=b'', actions=()):
+            received = asyncio.Queue()
+            sent = []
+            for message in [{'type': 'websocket.connect'}] + [
+                    {'type': 'websocket.receive', 'text': text}
+                    for text in actions]:
+                received.put_nowait(message)
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {'type': 'websocket', 'path': path,
+                     'query_string': query}
+            task = asyncio.ensure_future(app(scope, received.get, send))
+            await asyncio.sleep(0.1)
+            received.put_nowait({'type': 'websocket.disconnect'})
+            await task
+            return sent
+
+        async def run():
+            app = server.PokerApp(shards.ShardManager(
+                1, seed=7, hand_pause=10).start())
+            await app.create_table(bots=1)
+            seat = app.shards.join(0, 'Player', token='secret')
+            query = 'seat={}&token=secret'.format(seat).encode('latin-1')
+            results = [
+                await connect(app, '/tables/0/feed'),
+                await connect(app, '/tables/3/feed'),
+                await connect(app, '/tables/0/feed', b'seat=0&token=x'),
+                await connect(app, '/tables/0/feed', query,
+                              ['{"action": "jump"}']),
+            ]
+            app.shards.close()
+            return results
+
+        watched, missing, forbidden, played = asyncio.run(run())
+        self.assertEqual(watched[0]['type'], 'websocket.accept')
+        snapshot = json.loads(watched[1]['text'])
+        self.assertEqual(snapshot[1], 'S')
+        self.assertEqual(snapshot[2]['table'], 0)
+
+        self.assertEqual(missing, [
+            {'type': 'websocket.close', 'code': server.WS_NOT_FOUND}])
+        self.assertEqual(forbidden, [
+            {'type': 'websocket.close', 'code': server.WS_FORBIDDEN}])
+
+        messages = [json.loads(message['text']) for message in played[1:]]
+        self.assertIsNotNone(messages[0][2]['hole'])
+        self.assertIn('e', [message[1] for message in messages])
+
+
+if __name__ == '__main__':
+    unittest.main()
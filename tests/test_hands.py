@@ -10,9 +10,15 @@ import os
 # Adds the path of poker_game to test file.
 sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
 
+import random
 import unittest
 from poker_game import hands
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 class TestHands(unittest.TestCase):
 
@@ -230,6 +236,152 @@ class TestHands(unittest.TestCase):
         hand = TestHands.to_set(hand)
         self.assertEqual(hand, hand_correct)
 
+    @staticmethod
+    def to_ids(cards):
+        return [hands.to_id(card) for card in cards]
+
+    def evaluate(self, hole_cards, community):
+        return hands.evaluate(
+            TestHands.to_ids(hole_cards),
+            TestHands.to_ids(community))
+
+    def test_evaluate_categories(self):
+        """
+        Tests that evaluate finds the category of the best hand.
+        """
+        cases = [
+            (['3s', '8d'], ['2h', '7s', 'As', 'Jc', 'Qd'], hands.HIGH_CARD),
+            (['2s', '8d'], ['2h', '7s', 'As', 'Jc', 'Qd'], hands.ONE_PAIR),
+            (['2s', '7d'], ['2h', '7s', 'As', '6s', 'Ac'], hands.TWO_PAIR),
+            (['3s', '3d'], ['2h', '3c', 'As'], hands.THREE_OF_A_KIND),
+            (['4s', '2d'], ['5h', '3c', 'As'], hands.STRAIGHT),
+            (['3s', '8s'], ['2s', '7s', 'As', '9s', 'Jd'], hands.FLUSH),
+            (['3s', '3d'], ['3h', '2c', '4d', '4s', '4c'], hands.FULL_HOUSE),
+            (['3s', '3d'], ['3h', '3c', 'As'], hands.FOUR_OF_A_KIND),
+            (['Ts', '9s'], ['7s', '8s', '5s', '6s', 'Js'],
+             hands.STRAIGHT_FLUSH),
+        ]
+        for hole_cards, community, category in cases:
+            strength = self.evaluate(hole_cards, community)
+            self.assertEqual(hands.get_category(strength), category)
+
+    def test_evaluate_ordering(self):
+        """
+        Tests that evaluate orders hands by category and then kickers.
+        """
+        community = ['2h', '7s', 'Kc', '9d', 'Jd']
+
+        # A better kicker wins.
+        ace_kicker = self.evaluate(['Ks', 'As'], community)
+        queen_kicker = self.evaluate(['Kh', 'Qs'], community)
+        self.assertGreater(ace_kicker, queen_kicker)
+
+        # A kicker that does not play ties.
+        three_kicker = self.evaluate(['Kh', '3s'], community)
+        four_kicker = self.evaluate(['Ks', '4c'], community)
+        self.assertEqual(three_kicker, four_kicker)
+
+        # The wheel is the lowest straight.
+        wheel = self.evaluate(['As', '2d'], ['5h', '3c', '4s'])
+        six_high = self.evaluate(['6s', '2d'], ['5h', '3c', '4s'])
+        self.assertGreater(six_high, wheel)
+
+        # The higher three-of-a-kind makes the full-house.
+        full_house = self.evaluate(['3s', '3d'], ['3h', '4d', '4s', '4c'])
+        better = self.evaluate(['5s', '5d'], ['3h', '3c', '3d', '5c'])
+        self.assertGreater(better, full_house)
+
+        # The order of the cards does not matter.
+        self.assertEqual(
+            self.evaluate(['As', 'Ks'], community),
+            self.evaluate(['Kc', '9d'], ['Ks', 'As', '2h', '7s', 'Jd']))
+
+    def test_find_does_not_mutate(self):
+        """
+        Tests that the find functions leave the given cards alone.
+        """
+        hole_cards = ['3s', '3d']
+        community = ['3h', '2c', '2s']
+        hands.find_full_house(hole_cards, community)
+        hands.find_pairs(hole_cards, community)
+        self.assertEqual(hole_cards, ['3s', '3d'])
+        self.assertEqual(community, ['3h', '2c', '2s'])
+
+        # Tuples work just as well.
+        hand = hands.find_full_house(('3s', '3d'), ('3h', '2c', '2s'))
+        hand = TestHands.to_set(hand)
+        self.assertEqual(hand, [set(['3s', '3d', '3h']), set(['2s', '2c'])])
+
+    def test_evaluate_packed(self):
+        """
+        Tests that a board packed once gives the same strengths.
+        """
+        board = hands.pack_cards((), TestHands.to_ids(['2h', '7s', 'Kc']))
+        for hole_cards in (['Ks', 'As'], ['7d', '7c'], ['3h', '4h']):
+            hole = tuple(TestHands.to_ids(hole_cards))
+            self.assertEqual(
+                hands.evaluate_packed(board | hands.pack_cards(hole, ())),
+                self.evaluate(hole_cards, ['2h', '7s', 'Kc']))
+
+    def test_best_hand(self):
+        """
+        Tests that the best hand comes with its five cards.
+        """
+        strength, cards = hands.best_hand(
+            ('As', 'Ad'), ('Ks', 'Kd', 'Kc', '2s', '3s'))
+        self.assertEqual(hands.get_category(strength), hands.FULL_HOUSE)
+        self.assertEqual(cards, ['Ks', 'Kd', 'Kc', 'As', 'Ad'])
+
+        strength, cards = hands.best_hand(
+            ('7h', '8d'), ('9c', '2h', 'Jh', 'Qs', '3s'))
+        self.assertEqual(hands.get_category(strength), hands.HIGH_CARD)
+        self.assertEqual(cards, ['Qs', 'Jh', '9c', '8d', '7h'])
+
+        strength, cards = hands.best_hand(['4s', '2d'], ['5h', '3c', 'As'])
+        self.assertEqual(strength, self.evaluate(['4s', '2d'],
+                                                 ['5h', '3c', 'As']))
+        self.assertEqual(cards, ['5h', '4s', '3c', '2d', 'As'])
+
+        strength, cards = hands.best_hand_ids(
+            [hands.to_id('4s'), hands.to_id('2d')],
+            [hands.to_id('5h'), hands.to_id('3c'), hands.to_id('As')])
+        self.assertEqual(strength, self.evaluate(['4s', '2d'],
+                                                 ['5h', '3c', 'As']))
+        self.assertEqual(cards, [hands.to_id(card) for card in
+                                 ['5h', '4s', '3c', '2d', 'As']])
+
+    @unittest.skipIf(np is None, "NumPy is not installed.")
+    def test_evaluate_batch(self):
+        """
+        Tests that the batch evaluator agrees with evaluate on random deals.
+        """
+        rng = random.Random(0)
+        deals = np.array([rng.sample(range(52), 7) for _ in range(20000)])
+
+        # Also deal from a short deck so every category shows up.
+        short_deck = [suit * 13 + value
+                      for suit in range(4) for value in range(6)]
+        short_deals = np.array(
+            [rng.sample(short_deck, 7) for _ in range(5000)])
+
+        for cards in (deals, short_deals):
+            # Check the river, turn and flop.
+            for num_cards in (7, 6, 5):
+                strengths = hands.evaluate_batch(
+                    cards[:, :2], cards[:, 2:num_cards])
+                expected = [
+                    hands.evaluate(row[:2], row[2:num_cards])
+                    for row in cards.tolist()
+                ]
+                self.assertEqual(strengths.tolist(), expected)
+
+        # Between them the deals hold every category.
+        categories = set()
+        for cards in (deals, short_deals):
+            strengths = hands.evaluate_batch(cards[:, :2], cards[:, 2:])
+            categories.update(strengths >> hands.CATEGORY_SHIFT)
+        self.assertEqual(len(categories), len(hands.CATEGORY_NAMES))
+
 
 if __name__ == '__main__':
     unittest.main()
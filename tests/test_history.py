@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+Test History
+============
+
+Test writing and reading the binary hand history.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import asyncio
+import shutil
+import tempfile
+import unittest
+from poker_game import history
+from poker_game import simulator
+from poker_game import tables
+
+
+def shove(decision):
+    return simulator.RAISE, decision.bet + decision.stack
+
+
+STRATEGY_FNS = [simulator.raise_strong, simulator.check_call, shove]
+
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def play(self, num_hands, max_records):
+        with history.HistoryWriter(self.directory, max_records) as writer:
+            return list(simulator.iter_hands(
+                num_hands, 6, STRATEGY_FNS, seed=2, history=writer))
+
+    def assertSameHand(self, read, played):
+        for name in ['hand_id', 'button', 'hole_cards', 'board', 'winnings',
+                     'showdown', 'actions', 'seed', 'kind']:
+            self.assertEqual(getattr(read, name), getattr(played, name))
+
+    def test_varint(self):
+        """
+        Tests that varints read back what was written.
+        """
+        buffer = bytearray()
+        values = [0, 1, 127, 128, 300, 10000, 1 << 40]
+        for value in values:
+            history.encode_varint(value, buffer)
+        self.assertEqual(len(buffer), 1 + 1 + 1 + 2 + 2 + 2 + 6)
+
+        position = 0
+        for value in values:
+            read, position = history.decode_varint(buffer, position)
+            self.assertEqual(read, value)
+
+    def test_round_trip(self):
+        """
+        Tests that every hand reads back from rotated files, in order and
+        by id.
+        """
+        played = self.play(250, max_records=100)
+
+        files = history.read_index(self.directory)
+        self.assertEqual([entry['count'] for entry in files], [100, 100, 50])
+        self.assertEqual(files[1]['first'], 100)
+
+        with history.HistoryReader(self.directory) as reader:
+            self.assertEqual(len(reader), 250)
+            for read, result in zip(reader, played):
+                self.assertSameHand(read, result)
+            self.assertSameHand(reader.get(173), played[173])
+            with self.assertRaises(KeyError):
+                reader.get(250)
+
+        # A reopened log carries on in new files.
+        with history.HistoryWriter(self.directory, 100) as writer:
+            with self.assertRaises(ValueError):
+                writer.write(played[-1])
+            result = played[0]
+            result.hand_id = 1000
+            writer.write(result)
+        with history.HistoryReader(self.directory) as reader:
+            self.assertEqual(len(reader), 251)
+            self.assertEqual(reader.get(1000).board, result.board)
+
+    def test_after_crash(self):
+        """
+        Tests that a file a crash left out of the index is not written over.
+        """
+        writer = history.HistoryWriter(self.directory)
+        for result in simulator.iter_hands(10, 6, STRATEGY_FNS, seed=2):
+            writer.write(result)
+        # Dies without closing, so the index never names the file.
+        writer.records.flush()
+        writer.actions.flush()
+        self.assertEqual(history.read_index(self.directory), [])
+        path = os.path.join(self.directory, 'hands.000000.hh')
+        size = os.path.getsize(path)
+
+        played = self.play(5, max_records=100)
+        self.assertEqual(os.path.getsize(path), size)
+        files = history.read_index(self.directory)
+        self.assertEqual([entry['number'] for entry in files], [1])
+        with history.HistoryReader(self.directory) as reader:
+            self.assertSameHand(reader.get(4), played[4])
+        writer.records.close()
+        writer.actions.close()
+
+    def test_table_hands(self):
+        """
+        Tests that the hands played at the tables of a lobby are logged.
+        """
+        async def play(writer):
+            lobby = tables.Lobby(seed=4, history=writer, hand_pause=0)
+            results = []
+
+            def listener(table, event):
+                if event[0] == simulator.RESULT:
+                    results.append(event[1])
+
+            for _ in range(2):
+                table = lobby.create_table()
+                table.listeners.append(listener)
+                for bot in range(3):
+                    table.join('Bot {}'.format(bot),
+                               strategy=simulator.check_call)
+            while len(results) < 6:
+                await asyncio.sleep(0.001)
+            await lobby.close()
+            return results
+
+        with history.HistoryWriter(self.directory) as writer:
+            played = asyncio.run(play(writer))
+
+        with history.HistoryReader(self.directory) as reader:
+            logged = list(reader)
+        self.assertEqual([result.hand_id for result in logged],
+                         list(range(len(logged))))
+        by_seed = dict((result.seed, result) for result in logged)
+        for result in played:
+            read = by_seed[result.seed]
+            for name in ['hole_cards', 'board', 'winnings', 'actions']:
+                self.assertEqual(getattr(read, name), getattr(result, name))
+        self.assertEqual(set(seed[1][0] for seed in by_seed), {0, 1})
+
+    @unittest.skipIf(history.np is None, "numpy is not installed")
+    def test_arrays(self):
+        """
+        Tests that the records read in place as structured arrays.
+        """
+        played = self.play(120, max_records=64)
+
+        reader = history.HistoryReader(self.directory)
+        arrays = reader.arrays()
+        self.assertEqual([len(array) for array in arrays], [64, 56])
+        self.assertEqual(history.record_dtype().itemsize,
+                         history.RECORD.size)
+
+        records = history.np.concatenate(arrays)
+        self.assertEqual(records['hand_id'].tolist(), list(range(120)))
+        self.assertEqual(records['winnings'].sum(), 0)
+        self.assertEqual(records['board'][7].tolist(), played[7].board)
+        self.assertEqual(records['hole_cards'][7, 6].tolist(),
+                         [history.NO_CARD] * 2)
+
+        del arrays, records
+        reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
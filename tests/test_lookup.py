@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Test Lookup
+===========
+
+Test that the hand rank tables agree with the evaluator and that bad table
+files are rebuilt.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import random
+import shutil
+import tempfile
+import unittest
+from poker_game import hands
+from poker_game import lookup
+
+
+class TestLookup(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, 'hand_ranks.bin')
+        cls.tables = lookup.load_tables(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tables.close()
+        shutil.rmtree(cls.directory)
+
+    def test_table_sizes(self):
+        """
+        Tests that the rank hash fills the expected number of slots.
+        """
+        self.assertEqual(lookup.table_size(5), 6188)
+        self.assertEqual(lookup.table_size(6), 18564)
+        self.assertEqual(lookup.table_size(7), 50388)
+
+        # The highest multiset lands on the last slot.
+        self.assertEqual(lookup.rank_hash([12] * 7), lookup.table_size(7) - 1)
+
+    def test_matches_evaluate(self):
+        """
+        Tests that lookups agree with the evaluator for every hand size.
+        """
+        rng = random.Random(0)
+        for num_cards in lookup.HAND_SIZES:
+            for _ in range(2000):
+                cards = rng.sample(range(52), num_cards)
+                self.assertEqual(
+                    self.tables.evaluate(cards[:2], cards[2:]),
+                    hands.evaluate(cards[:2], cards[2:]))
+
+    def test_memory_mapped(self):
+        """
+        Tests that a saved table file is memory mapped on load.
+        """
+        self.assertTrue(lookup.check_tables(self.path))
+        tables = lookup.load_tables(self.path)
+        self.assertIsNotNone(tables.source)
+        tables.close()
+
+    def test_rebuilds_corrupt_file(self):
+        """
+        Tests that a corrupt or stale file is detected and rebuilt.
+        """
+        path = os.path.join(self.directory, 'corrupt.bin')
+        shutil.copyfile(self.path, path)
+
+        # Flip a byte in the middle of the tables.
+        with open(path, 'r+b') as table_file:
+            table_file.seek(os.path.getsize(path) // 2)
+            byte = table_file.read(1)
+            table_file.seek(-1, os.SEEK_CUR)
+            table_file.write(bytearray([byte[0] ^ 0xff]))
+        self.assertFalse(lookup.check_tables(path))
+
+        tables = lookup.load_tables(path)
+        tables.close()
+        self.assertTrue(lookup.check_tables(path))
+
+        # Write a file from another version.
+        with open(path, 'r+b') as table_file:
+            table_file.seek(4)
+            table_file.write(b'\xff\xff')
+        self.assertFalse(lookup.check_tables(path))
+
+        # Truncate the file.
+        with open(path, 'wb') as table_file:
+            table_file.write(b'PKHR')
+        self.assertFalse(lookup.check_tables(path))
+
+        tables = lookup.load_tables(path)
+        tables.close()
+        self.assertTrue(lookup.check_tables(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
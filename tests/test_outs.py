@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Test Outs
+=========
+
+Test the outs and draws analyzer.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import random
+import unittest
+from itertools import combinations
+from poker_game import codec
+from poker_game import hands
+from poker_game import outs
+from poker_game import tracker
+
+
+def to_ids(*cards):
+    return [hands.to_id(card) for card in cards]
+
+
+class TestOuts(unittest.TestCase):
+
+    def test_next_strengths(self):
+        """
+        Tests the shared strengths against adding every card.
+        """
+        rng = random.Random(2)
+        for _ in range(100):
+            cards = rng.sample(range(52), rng.choice([5, 6]))
+            packed = codec.pack(cards)
+            unseen = [card for card in range(52) if card not in cards]
+            strengths = outs.next_strengths(packed, unseen)
+            for card in unseen:
+                self.assertEqual(
+                    strengths[card],
+                    hands.evaluate_packed(packed | codec.CARD_MASKS[card]))
+
+    def test_backdoor_draws(self):
+        """
+        Tests the backdoor draws of the flop.
+        """
+        analysis = outs.analyze(to_ids('Kh', '8h'), to_ids('Qh', '3c', '2d'))
+        self.assertEqual(analysis.draws, [tracker.BACKDOOR_FLUSH])
+
+        analysis = outs.analyze(to_ids('Jh', 'Ts'), to_ids('8c', '3h', '2d'))
+        self.assertEqual(analysis.draws, [tracker.BACKDOOR_STRAIGHT])
+
+        analysis = outs.analyze(
+            to_ids('Jh', 'Ts'), to_ids('8c', '3h', '2d', 'Kd'))
+        self.assertEqual(analysis.draws, [])
+
+    def test_beating_range(self):
+        """
+        Tests the cards that beat a range against a plain count.
+        """
+        hole = to_ids('Ah', 'Kh')
+        board = to_ids('Qh', '7h', '6c')
+        dead = to_ids('2s')
+        opponents = [to_ids('6s', '6d'), to_ids('7d', '7c'),
+                     to_ids('Td', '9d') + [2.0]]
+        analysis = outs.analyze(hole, board, opponents, dead)
+
+        known = hole + board + dead
+        expected = []
+        for card in range(52):
+            if card in known:
+                continue
+            cards = board + [card]
+            beats = [
+                hands.evaluate(hole, cards) > hands.evaluate(combo[:2], cards)
+                for combo in opponents if card not in combo[:2]]
+            if all(beats):
+                expected.append(card)
+        self.assertEqual(analysis.beating, expected)
+
+        # A heart that does not pair the board makes the nut flush.
+        self.assertIn(hands.to_id('3h'), analysis.beating)
+        self.assertEqual(analysis.win_shares[hands.to_id('3h')], 1.0)
+        self.assertNotIn(hands.to_id('6h'), analysis.beating)
+
+    def test_blocked_range(self):
+        """
+        Tests that combos holding known cards are left out.
+        """
+        hole = to_ids('As', 'Ks')
+        board = to_ids('Ad', '7c', '2h', '9s')
+        opponents = [combo for combo in combinations(range(52), 2)]
+        analysis = outs.analyze(hole, board, opponents)
+        self.assertEqual(len(analysis.win_shares), 46)
+        for share in analysis.win_shares.values():
+            self.assertTrue(0.0 <= share <= 1.0)
+
+        with self.assertRaises(ValueError):
+            outs.analyze(hole, board[:2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Test Poker
+==========
+
+Test the cards and dealing of the Poker Engine.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import copy
+import pickle
+import unittest
+from poker_game import poker
+from poker_game import streams
+
+
+class TestCard(unittest.TestCase):
+
+    def test_names(self):
+        """
+        Tests the names of a few cards.
+        """
+        self.assertEqual(str(poker.Card(0)), "Ace of Diamonds")
+        self.assertEqual(str(poker.Card(25)), "King of Clubs")
+        self.assertEqual(str(poker.Card(35)), "10 of Hearts")
+        self.assertEqual(str(poker.Card(49)), "Jack of Spades")
+
+        card = poker.Card(40)
+        self.assertEqual(card.value, 1)
+        self.assertEqual(card.suit, poker.Card.SPADES)
+        self.assertEqual(card.color, poker.Card.BLACK)
+
+    def test_shared_instances(self):
+        """
+        Tests that every id has one shared card.
+        """
+        self.assertIs(poker.Card(12), poker.Card(12))
+        self.assertIs(pickle.loads(pickle.dumps(poker.Card(12))),
+                      poker.Card(12))
+        self.assertIs(copy.deepcopy(poker.Card(12)), poker.Card(12))
+        self.assertEqual(len(set(map(id, map(poker.Card, range(52))))), 52)
+
+        with self.assertRaises(ValueError):
+            poker.Card(52)
+
+    def test_immutable(self):
+        """
+        Tests that cards cannot be changed.
+        """
+        card = poker.Card(7)
+        with self.assertRaises(AttributeError):
+            card.value = 3
+        with self.assertRaises(AttributeError):
+            card.nickname = 'lucky'
+        self.assertFalse(hasattr(card, '__dict__'))
+
+
+class TestPokerEngine(unittest.TestCase):
+
+    def test_deal(self):
+        """
+        Tests that a deal hands out distinct cards.
+        """
+        engine = poker.PokerEngine()
+        hands = engine.deal_hands(4)
+        community = engine.deal_community()
+
+        cards = [community.river[idx].id for idx in range(5)]
+        for hand in hands:
+            cards.extend([hand.card_1.id, hand.card_2.id])
+        self.assertEqual(len(set(cards)), 13)
+
+    def test_seeded_deal(self):
+        """
+        Tests that engines with the same seed deal the same cards.
+        """
+        engine_1 = poker.PokerEngine(streams.make_stream(5))
+        engine_2 = poker.PokerEngine(streams.make_stream(5))
+        for _ in range(10):
+            hand_1 = engine_1.deal_hands(3)[2]
+            hand_2 = engine_2.deal_hands(3)[2]
+            self.assertIs(hand_1.card_1, hand_2.card_1)
+            self.assertIs(hand_1.card_2, hand_2.card_2)
+
+
+class TestDeck(unittest.TestCase):
+
+    def test_partial_shuffle(self):
+        """
+        Tests that a partial shuffle keeps every card and draws them evenly.
+        """
+        deck = poker.Deck(streams.make_stream(3))
+        counts = [0] * 52
+        for _ in range(5200):
+            cards = deck.shuffle(2)
+            self.assertEqual(sorted(cards), list(range(52)))
+            counts[cards[0]] += 1
+        self.assertGreater(min(counts), 50)
+        self.assertLess(max(counts), 160)
+
+    def test_deal_many(self):
+        """
+        Tests that every deal of a batch holds distinct cards of the deck.
+        """
+        deck = poker.Deck(streams.make_stream(4), range(10, 30))
+        deals = deck.deal_many(100, num_players=3)
+        self.assertEqual(len(deals), 100 * 11)
+        for start in range(0, len(deals), 11):
+            cards = deals[start:start + 11]
+            self.assertEqual(len(set(cards)), 11)
+            self.assertTrue(all(10 <= card < 30 for card in cards))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Test Preflop
+============
+
+Test the starting hand classes and the preflop equity table.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import json
+import shutil
+import tempfile
+import unittest
+from itertools import combinations
+from poker_game import hands
+from poker_game import preflop
+
+
+def to_ids(*cards):
+    return [hands.to_id(card) for card in cards]
+
+
+class TestPreflop(unittest.TestCase):
+
+    def test_hand_class(self):
+        """
+        Tests that two cards map to their starting hand in any order.
+        """
+        self.assertEqual(preflop.hand_class(*to_ids('As', 'Ks')), 'AKs')
+        self.assertEqual(preflop.hand_class(*to_ids('Kd', 'Ad')), 'AKs')
+        self.assertEqual(preflop.hand_class(*to_ids('Kd', 'Ah')), 'AKo')
+        self.assertEqual(preflop.hand_class(*to_ids('7c', '7h')), '77')
+        self.assertEqual(preflop.hand_class(*to_ids('2c', '3h')), '32o')
+
+    def test_class_combos(self):
+        """
+        Tests that the classes split all 1326 combos between them.
+        """
+        self.assertEqual(len(set(preflop.HAND_CLASSES)), 169)
+
+        seen = set()
+        for index in range(len(preflop.HAND_CLASSES)):
+            for combo in preflop.class_combos(index):
+                self.assertEqual(preflop.hand_index(*combo), index)
+                seen.add(frozenset(combo))
+
+        self.assertEqual(
+            seen, set(frozenset(combo)
+                      for combo in combinations(range(52), 2)))
+
+    def test_shipped_table(self):
+        """
+        Tests lookups in the shipped table.
+        """
+        aces = preflop.preflop_equity(*to_ids('As', 'Ah'))
+        kings = preflop.preflop_equity(*to_ids('Ks', 'Kh'))
+        seven_two = preflop.preflop_equity(*to_ids('7s', '2h'))
+        self.assertAlmostEqual(aces, 0.852, delta=0.005)
+        self.assertGreater(aces, kings)
+        self.assertGreater(kings, seven_two)
+
+        # Equity falls as players join.
+        previous = 1.0
+        for num_players in range(2, 10):
+            current = preflop.preflop_equity(
+                *to_ids('As', 'Ah'), num_players=num_players)
+            self.assertLess(current, previous)
+            previous = current
+
+        with self.assertRaises(ValueError):
+            preflop.preflop_equity(*to_ids('As', 'Ah'), num_players=10)
+
+    def test_build_resumes(self):
+        """
+        Tests that a build picks up the hands missing from the file.
+        """
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'preflop.json')
+            table = preflop.build_table(path, iterations=5, processes=1)
+            self.assertEqual(len(table['equity']), 169)
+
+            # Drop a hand and mark another so we can tell it was kept.
+            del table['equity']['AKs']
+            table['equity']['QQ'] = [0.0] * 8
+            with open(path, 'w') as table_file:
+                json.dump(table, table_file)
+
+            table = preflop.build_table(path, iterations=5, processes=1)
+            self.assertEqual(len(table['equity']['AKs']), 8)
+            self.assertEqual(table['equity']['QQ'], [0.0] * 8)
+
+            # Other settings start again from scratch.
+            table = preflop.build_table(path, iterations=6, processes=1)
+            self.assertNotEqual(table['equity']['QQ'], [0.0] * 8)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Test Ranges
+===========
+
+Test the range parser and range against range equity.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import unittest
+from poker_game import equity
+from poker_game import hands
+from poker_game import preflop
+from poker_game import ranges
+
+
+def to_ids(*cards):
+    return [hands.to_id(card) for card in cards]
+
+
+def class_names(text):
+    names = set()
+    for card_1, card_2, _ in ranges.parse_range(text):
+        names.add(preflop.hand_class(card_1, card_2))
+    return names
+
+
+class TestParseRange(unittest.TestCase):
+
+    def test_parts(self):
+        """
+        Tests each kind of part.
+        """
+        self.assertEqual(class_names('QQ+'), {'QQ', 'KK', 'AA'})
+        self.assertEqual(class_names('ATo+'), {'ATo', 'AJo', 'AQo', 'AKo'})
+        self.assertEqual(class_names('76s-54s'), {'76s', '65s', '54s'})
+        self.assertEqual(class_names('A9s-A7s'), {'A9s', 'A8s', 'A7s'})
+        self.assertEqual(class_names('22-44'), {'22', '33', '44'})
+        self.assertEqual(class_names('KQ'), {'KQs', 'KQo'})
+        self.assertEqual(class_names('T9s+'), {'T9s'})
+
+    def test_combos(self):
+        """
+        Tests the number of combos, weights and dead cards.
+        """
+        combos = ranges.parse_range('QQ+, AKs, ATo+, 76s-54s')
+        self.assertEqual(len(combos), 18 + 4 + 48 + 12)
+        self.assertEqual(len(set((combo[0], combo[1]) for combo in combos)),
+                         len(combos))
+
+        combos = ranges.parse_range('AA:0.5, AhKh, AKs', dead=to_ids('Ac'))
+        self.assertEqual(len(combos), 3 + 3)
+        self.assertEqual(combos[0][2], 0.5)
+
+        for text in ['AKx', 'AAs', 'ZZ', 'AKs-QJo', 'AK-QT', 'AhAh']:
+            with self.assertRaises(ValueError):
+                ranges.parse_range(text)
+
+
+@unittest.skipIf(ranges.np is None, "numpy is not installed")
+class TestRangeEquity(unittest.TestCase):
+
+    def test_single_combos(self):
+        """
+        Tests that one combo against one combo matches exact equity.
+        """
+        hole_1 = to_ids('Ah', 'Kh')
+        hole_2 = to_ids('7c', '7d')
+        board = to_ids('Qh', '7h', '2s')
+        result = ranges.range_equity(
+            [hole_1], [hole_2], board=board, dead=to_ids('3c'))
+        expected = equity.exact([hole_1, hole_2], board, to_ids('3c'))
+        self.assertTrue(result.exact)
+        self.assertAlmostEqual(
+            result.equity, expected.players[0].equity, places=9)
+
+    def test_ranges(self):
+        """
+        Tests a range against itself and a sampled preflop spot.
+        """
+        board = to_ids('Kd', '8s', '3c')
+        result = ranges.range_equity('QQ+, AKs', 'QQ+, AKs', board=board)
+        self.assertAlmostEqual(result.equity, 0.5, places=9)
+
+        result = ranges.range_equity('AA', 'KK', seed=1, num_boards=4000)
+        self.assertFalse(result.exact)
+        self.assertAlmostEqual(result.equity, 0.82, delta=0.02)
+
+        with self.assertRaises(ValueError):
+            ranges.range_equity('AA', 'AA', board=to_ids('As', 'Ah', '2c'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+Test Shards
+===========
+
+Test the hash ring and moving tables between worker processes.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from poker_game import shards
+
+
+class TestHashRing(unittest.TestCase):
+
+    def test_minimal_moves(self):
+        """
+        Tests that adding a node only moves keys onto it.
+        """
+        ring = shards.HashRing([0, 1, 2])
+        before = dict((key, ring.node_for(key)) for key in range(1000))
+        self.assertEqual(set(before.values()), {0, 1, 2})
+
+        ring.add(3)
+        after = dict((key, ring.node_for(key)) for key in range(1000))
+        moved = [key for key in before if before[key] != after[key]]
+        self.assertTrue(moved)
+        self.assertLess(len(moved), 500)
+        self.assertTrue(all(after[key] == 3 for key in moved))
+
+        ring.remove(3)
+        self.assertEqual(
+            dict((key, ring.node_for(key)) for key in range(1000)), before)
+
+        with self.assertRaises(KeyError):
+            shards.HashRing().node_for(1)
+
+
+class TestShardManager(unittest.TestCase):
+
+    def wait_for_hand(self, manager, table_id, hand):
+        deadline = time.time() + 10
+        while manager.state(table_id)['hand'] < hand:
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+
+    def test_migration(self):
+        """
+        Tests that tables keep their players and hands when workers come and
+        go.
+        """
+        with shards.ShardManager(num_workers=2, seed=7, hand_pause=0.0,
+                                 action_timeout=0.05,
+                                 replicas=20) as manager:
+            for _ in range(6):
+                manager.create_table(bots=2)
+            self.assertEqual(set(manager.locations.values()), {0, 1})
+            for table_id in manager.locations:
+                self.wait_for_hand(manager, table_id, 2)
+
+            manager.join(0, 'Alice', token='secret')
+            before = dict((table_id, manager.state(table_id))
+                          for table_id in manager.locations)
+
+            worker_id = manager.add_worker()
+            moved = [table_id for table_id, worker
+                     in manager.locations.items() if worker == worker_id]
+            self.assertTrue(moved)
+            for table_id in moved:
+                self.assertEqual(manager.call(worker_id, 'tables').result(),
+                                 sorted(moved))
+                state = manager.state(table_id)
+                self.assertGreaterEqual(state['hand'],
+                                        before[table_id]['hand'])
+                self.assertEqual(
+                    [seat and seat['name'] for seat in state['seats']],
+                    [seat and seat['name']
+                     for seat in before[table_id]['seats']])
+                self.wait_for_hand(manager, table_id, state['hand'] + 1)
+
+            manager.remove_worker(0)
+            self.assertNotIn(0, manager.locations.values())
+            self.assertIn('Alice', [seat and seat['name']
+                                    for seat in manager.state(0)['seats']])
+
+            with self.assertRaises(KeyError):
+                manager.state(100)
+            with self.assertRaises(ValueError):
+                manager.act(0, 0, 'check', token='secret')
+            manager.remove_worker(1)
+            with self.assertRaises(ValueError):
+                manager.remove_worker(worker_id)
+
+    def test_act_while_moving(self):
+        """
+        Tests that a table waiting on a player to move takes their action,
+        and that others are answered meanwhile.
+        """
+        ring = shards.HashRing([0, 1], replicas=20)
+        table_id = next(table_id for table_id in range(100)
+                        if ring.node_for(table_id) == 1)
+        with shards.ShardManager(num_workers=1, seed=7, hand_pause=0.0,
+                                 action_timeout=30,
+                                 replicas=20) as manager:
+            for _ in range(table_id + 1):
+                manager.create_table(bots=1)
+            seat = manager.join(table_id, 'Alice', token='secret')
+            deadline = time.time() + 10
+            while manager.state(table_id)['waiting_on'] != seat:
+                self.assertLess(time.time(), deadline)
+                time.sleep(0.01)
+
+            adding = threading.Thread(target=manager.add_worker)
+            adding.start()
+            time.sleep(0.2)
+            # The move waits for the hand, which waits for Alice.
+            self.assertTrue(adding.is_alive())
+            self.assertEqual(manager.state(table_id)['waiting_on'], seat)
+            manager.act(table_id, seat, 'fold', token='secret')
+            adding.join(10)
+            self.assertFalse(adding.is_alive())
+            self.assertEqual(manager.locations[table_id], 1)
+            self.assertIn('Alice', [seat and seat['name'] for seat
+                                    in manager.state(table_id)['seats']])
+
+    def test_restart(self):
+        """
+        Tests that workers started again play on the tables of their
+        snapshots.
+        """
+        folder = tempfile.mkdtemp()
+        try:
+            with shards.ShardManager(num_workers=2, seed=7, hand_pause=0.0,
+                                     snapshot_dir=folder) as manager:
+                for _ in range(4):
+                    manager.create_table(bots=3)
+                self.wait_for_hand(manager, 3, 1)
+                locations = dict(manager.locations)
+
+            with shards.ShardManager(num_workers=2, seed=7, hand_pause=0.0,
+                                     snapshot_dir=folder) as manager:
+                self.assertEqual(manager.locations, locations)
+                state = manager.state(3)
+                self.assertEqual(len([seat for seat in state['seats']
+                                      if seat is not None]), 3)
+                self.wait_for_hand(manager, 3, state['hand'] + 1)
+                self.assertEqual(manager.create_table()['table'], 4)
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Test Simulator
+==============
+
+Test the betting, pots and totals of the headless simulator.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import unittest
+from poker_game import hands
+from poker_game import simulator
+from poker_game import streams
+from poker_game.poker import PokerEngine, Player
+
+
+def shove(decision):
+    """
+    Goes all-in every time.
+    """
+    return simulator.RAISE, decision.bet + decision.stack
+
+
+class TestSimulator(unittest.TestCase):
+
+    def test_chips_conserved(self):
+        """
+        Tests that no hand makes or loses chips.
+        """
+        strategy_fns = [simulator.raise_strong, simulator.check_call, shove]
+        for result in simulator.iter_hands(200, 6, strategy_fns, seed=1):
+            self.assertEqual(sum(result.winnings), 0)
+            self.assertEqual(len(result.board), 5)
+
+    def test_check_fold_loses_blinds(self):
+        """
+        Tests that a player who never bets only loses blinds.
+        """
+        stats = simulator.simulate(
+            40, 2, [simulator.check_fold, shove], seed=3, processes=1)
+        folder, shover = stats.strategies
+        self.assertEqual(folder.hands, 40)
+        self.assertEqual(folder.won, 0)
+
+        # Half the hands from the small blind, half from the big blind.
+        blinds = 20 * simulator.SMALL_BLIND + 20 * simulator.BIG_BLIND
+        self.assertEqual(folder.net, -blinds)
+        self.assertEqual(shover.net, blinds)
+
+    def test_same_seed(self):
+        """
+        Tests that a seed gives the same totals with and without a pool.
+        """
+        strategy_fns = [simulator.raise_strong, simulator.check_call]
+        single = simulator.simulate(
+            2500, 4, strategy_fns, seed=7, processes=1)
+        pooled = simulator.simulate(
+            2500, 4, strategy_fns, seed=7, processes=2)
+        self.assertEqual(
+            [stats.net for stats in single.strategies],
+            [stats.net for stats in pooled.strategies])
+        self.assertEqual(single.hands, 2500)
+
+    def test_replay(self):
+        """
+        Tests that a hand plays out the same from its recorded seed.
+        """
+        strategy_fns = [simulator.raise_strong, shove, simulator.check_call]
+        for result in simulator.iter_hands(20, 5, strategy_fns, seed=9,
+                                           start=100):
+            replayed = simulator.replay_hand(result, strategy_fns)
+            self.assertEqual(replayed.seed, (9, (result.hand_id,)))
+            self.assertEqual(replayed.hole_cards, result.hole_cards)
+            self.assertEqual(replayed.board, result.board)
+            self.assertEqual(replayed.actions, result.actions)
+            self.assertEqual(replayed.winnings, result.winnings)
+
+    def test_side_pot(self):
+        """
+        Tests that a short all-in only wins what it could match.
+        """
+        engine = PokerEngine(streams.make_stream(11))
+        players = [Player('Short', 500), Player('Deep', 5000),
+                   Player('Deeper', 5000)]
+        result = simulator.play_hand(
+            engine, players, [shove, shove, shove], button=0)
+
+        board = result.board
+        strengths = [hands.evaluate(hole, board)
+                     for hole in result.hole_cards]
+        self.assertTrue(result.showdown)
+        self.assertEqual(sum(result.winnings), 0)
+
+        # The short stack can win at most its stack from each other player.
+        self.assertLessEqual(result.winnings[0], 1000)
+        if strengths[0] > max(strengths[1:]):
+            self.assertEqual(result.winnings[0], 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+Test Snapshots
+==============
+
+Test writing tables to a snapshot mid-hand and playing on from it.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import asyncio
+import shutil
+import tempfile
+import unittest
+from poker_game import server
+from poker_game import shards
+from poker_game import simulator
+from poker_game import snapshots
+from poker_game import tables
+
+
+async def wait_for_player(table, seat):
+    """
+    Waits until a hand asks a seat to act after others have.
+    """
+    while table.waiting_on != seat or not table.hand_replies:
+        await asyncio.sleep(0.001)
+
+
+def result_listener(results):
+    def listener(table, event):
+        if event[0] == simulator.RESULT:
+            results.append(event[1])
+    return listener
+
+
+class TestSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'lobby.snapshot')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_restore_mid_hand(self):
+        """
+        Tests that a restored table plays on the hand it was in, to the same
+        result.
+        """
+        async def play():
+            lobby = tables.Lobby(seed=5, hand_pause=0)
+            table = lobby.create_table()
+            for bot in range(2):
+                table.join('Bot {}'.format(bot),
+                           strategy=simulator.check_call)
+            seat = table.join('Alice', token='secret')
+            await wait_for_player(table, seat)
+
+            snapshotter = snapshots.Snapshotter(lobby, self.path)
+            await snapshotter.snapshot()
+            restored_lobby = tables.Lobby(seed=6, hand_pause=0)
+            restored, = snapshots.restore(restored_lobby, self.path)
+            await wait_for_player(restored, seat)
+            hand = table.hand_state()
+            restored_hand = restored.hand_state()
+
+            results = []
+            for played in (table, restored):
+                played.listeners.append(result_listener(results))
+                played.act(seat, simulator.FOLD, token='secret')
+            while len(results) < 2:
+                await asyncio.sleep(0.001)
+            await lobby.close()
+            await restored_lobby.close()
+            return hand, restored_hand, results
+
+        hand, restored_hand, results = asyncio.run(play())
+        self.assertIsNotNone(hand)
+        self.assertEqual(restored_hand, hand)
+        self.assertEqual(results[0].hole_cards, results[1].hole_cards)
+        self.assertEqual(results[0].winnings, results[1].winnings)
+
+    def test_called_off(self):
+        """
+        Tests that a hand that does not replay is called off, and that a
+        damaged file is refused.
+        """
+        async def play():
+            lobby = tables.Lobby(seed=5, hand_pause=0)
+            table = lobby.create_table()
+            table.join('Bot', strategy=simulator.check_call)
+            seat = table.join('Alice', stack=500, token='secret')
+            await wait_for_player(table, seat)
+            data = table.export()
+            await lobby.close()
+
+            data['hand_state']['deck'] = bytes(52).hex()
+            restored = tables.Lobby(
+                hand_pause=0, action_timeout=0.01).adopt(data)
+            stacks = [taken.player.value for taken in restored.seats
+                      if taken is not None]
+            await restored.stop()
+            return restored, stacks
+
+        restored, stacks = asyncio.run(play())
+        self.assertIsNone(restored.resume)
+        self.assertEqual(restored.hand_count, 0)
+        self.assertEqual(stacks, [simulator.STARTING_STACK, 500])
+
+        snapshot = snapshots.dumps(tables.Lobby())
+        with self.assertRaises(ValueError):
+            snapshots.loads(snapshot[:-1])
+        with self.assertRaises(ValueError):
+            snapshots.loads(b'JUNK' + snapshot[4:])
+
+    def test_server_restart(self):
+        """
+        Tests that the server keeps its tables across a restart.
+        """
+        async def lifespan(app):
+            messages = [{'type': 'lifespan.startup'}]
+            started = asyncio.Event()
+            stopping = asyncio.Event()
+
+            async def receive():
+                if messages:
+                    return messages.pop(0)
+                await stopping.wait()
+                return {'type': 'lifespan.shutdown'}
+
+            async def send(message):
+                if message['type'] == 'lifespan.startup.complete':
+                    started.set()
+
+            task = asyncio.ensure_future(app(
+                {'type': 'lifespan'}, receive, send))
+            await started.wait()
+            return stopping, task
+
+        async def run():
+            app = server.PokerApp()
+            stopping, task = await lifespan(app)
+            table = await app.create_table(bots=2)
+            while not (await app.call_table(table['table'], 'state'))['hand']:
+                await asyncio.sleep(0.001)
+            stopping.set()
+            await task
+            path = shards.snapshot_path(self.folder, 0)
+            with open(path, 'rb') as snapshot_file:
+                data = snapshots.loads(snapshot_file.read())
+
+            app = server.PokerApp()
+            stopping, task = await lifespan(app)
+            restored = await app.call_table(table['table'], 'state')
+            stopping.set()
+            await task
+            return table, data, restored
+
+        snapshot_dir = server.SNAPSHOT_DIR
+        server.SNAPSHOT_DIR = self.folder
+        try:
+            table, data, restored = asyncio.run(run())
+        finally:
+            server.SNAPSHOT_DIR = snapshot_dir
+        saved, = data['tables']
+        self.assertGreaterEqual(saved['hand'], 1)
+        self.assertEqual(len([seat for seat in saved['seats'] if seat]), 2)
+        self.assertGreaterEqual(restored['hand'], saved['hand'])
+        self.assertEqual([seat and seat['name'] for seat in restored['seats']],
+                         [seat and seat['name'] for seat in table['seats']])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+Test Spots
+==========
+
+Test canonical spots, the equity cache and the endpoint answering from it.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import asyncio
+import json
+import unittest
+from poker_game import codec
+from poker_game import server
+from poker_game import spots
+
+
+def ids(*cards):
+    return [codec.to_id(card) for card in cards]
+
+
+class TestCanonicalSpot(unittest.TestCase):
+
+    def test_suit_and_order(self):
+        """
+        Tests that spots differing by suits or order share a canonical form.
+        """
+        spot_1, players_1 = spots.canonical_spot(
+            [ids('As', 'Ks'), ids('Qh', 'Qd')], ids('2s', '7c', '9h'))
+        spot_2, players_2 = spots.canonical_spot(
+            [ids('Qs', 'Qc'), ids('Kh', 'Ah')], ids('9s', '2h', '7d'))
+        self.assertEqual(spot_1, spot_2)
+        self.assertNotEqual(players_1, players_2)
+
+        # A different suit pattern is a different spot.
+        spot_3, _ = spots.canonical_spot(
+            [ids('As', 'Kd'), ids('Qh', 'Qd')], ids('2s', '7c', '9h'))
+        self.assertNotEqual(spot_1, spot_3)
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evictions(self):
+        """
+        Tests that the least recently used and the expired entries go.
+        """
+        now = [0.0]
+        cache = spots.LRUCache(max_size=2, ttl=10.0, clock=lambda: now[0])
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+        now[0] = 10.0
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats(), {
+            'size': 1, 'max_size': 2, 'hits': 2, 'misses': 2,
+            'evictions': 1, 'expirations': 1})
+
+
+class TestEquityService(unittest.TestCase):
+
+    def test_shared_queries(self):
+        """
+        Tests that identical queries in flight share one computation and
+        that hands come back in the order given.
+        """
+        service = spots.EquityService(processes=1)
+        hole_cards = [ids('As', 'Ks'), ids('Qh', 'Qd')]
+        swapped = [ids('Qs', 'Qc'), ids('Ah', 'Kh')]
+
+        async def run():
+            first = await asyncio.gather(
+                service.equity(hole_cards, iterations=2000, seed=1),
+                service.equity(swapped, iterations=2000, seed=1))
+            again = await service.equity(hole_cards, iterations=2000, seed=1)
+            return first, again
+
+        (first, second), again = asyncio.run(run())
+        self.assertEqual(service.stats()['misses'], 2)
+        self.assertEqual(service.stats()['hits'], 1)
+        self.assertEqual(service.shared, 1)
+        self.assertEqual(service.stats()['in_flight'], 0)
+
+        self.assertFalse(first[1])
+        self.assertTrue(second[1])
+        self.assertTrue(again[1])
+        self.assertEqual(first[0]['players'],
+                         list(reversed(second[0]['players'])))
+        self.assertEqual(first[0], again[0])
+
+        with self.assertRaises(ValueError):
+            asyncio.run(service.equity(hole_cards, iterations=0))
+
+    def test_cancelled_first_query(self):
+        """
+        Tests that cancelling the query that started a computation leaves it
+        to the others and to the cache.
+        """
+        service = spots.EquityService(processes=1)
+        hole_cards = [ids('As', 'Ks'), ids('Qh', 'Qd')]
+
+        async def run():
+            first = asyncio.ensure_future(
+                service.equity(hole_cards, iterations=20000, seed=2))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(
+                service.equity(hole_cards, iterations=20000, seed=2))
+            await asyncio.sleep(0)
+            first.cancel()
+            result = await second
+            again = await service.equity(hole_cards, iterations=20000, seed=2)
+            return first, result, again
+
+        first, result, again = asyncio.run(run())
+        self.assertTrue(first.cancelled())
+        self.assertTrue(result[1])
+        self.assertEqual(result[0], again[0])
+        self.assertEqual(service.stats()['hits'], 1)
+        self.assertEqual(service.stats()['in_flight'], 0)
+
+    def test_exact(self):
+        """
+        Tests that exact results are cached apart from sampled ones.
+        """
+        service = spots.EquityService(processes=1)
+        hole_cards = [ids('As', 'Ks'), ids('Qh', 'Qd')]
+        board = ids('2s', '7c', '9h', 'Td')
+
+        async def run():
+            return [
+                await service.equity(hole_cards, board, exact=True),
+                await service.equity(hole_cards, board, iterations=100),
+            ]
+
+        exact, sampled = asyncio.run(run())
+        self.assertTrue(exact[0]['exact'])
+        self.assertEqual(exact[0]['trials'], 44)
+        self.assertFalse(sampled[1])
+
+        # Preflop there are far too many boards to walk.
+        with self.assertRaises(ValueError):
+            asyncio.run(service.equity(hole_cards, exact=True))
+
+
+class TestEquityServer(unittest.TestCase):
+
+    def test_equity(self):
+        """
+        Tests equity queries and cache counters over ASGI.
+        """
+        async def call(app, method, body=None):
+            messages = [{
+                'type': 'http.request',
+                'body': b'' if body is None else
+                json.dumps(body).encode('utf-8')
+            }]
+            sent = []
+
+            async def receive():
+                return messages.pop(0)
+
+            async def send(message):
+                sent.append(message)
+
+            await app({'type': 'http', 'method': method, 'path': '/equity'},
+                      receive, send)
+            return sent[0]['status'], json.loads(sent[1]['body'])
+
+        query = {'hands': [['As', 'Ks'], ['Qh', 'Qd']],
+                 'board': ['2s', '7c', '9h', 'Td'], 'exact': True}
+
+        async def run():
+            app = server.PokerApp(equity=spots.EquityService(processes=1))
+            return [
+                await call(app, 'POST', query),
+                await call(app, 'POST', query),
+                await call(app, 'POST', {'hands': [['As', 'Xx']]}),
+                await call(app, 'POST', dict(query, board=[])),
+                await call(app, 'GET'),
+            ]
+
+        first, second, bad, preflop, stats = asyncio.run(run())
+        self.assertEqual(first[0], 200)
+        self.assertFalse(first[1]['cached'])
+        self.assertTrue(second[1]['cached'])
+        self.assertEqual(first[1]['players'][0]['hand'], ['As', 'Ks'])
+        self.assertAlmostEqual(
+            sum(player['equity'] for player in first[1]['players']), 1.0)
+        self.assertEqual(bad[0], 400)
+        self.assertEqual(preflop[0], 400)
+        self.assertEqual(stats[1]['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
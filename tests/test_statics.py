@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+Test Statics
+============
+
+Test serving static files from memory and preparing them for nginx.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import asyncio
+import gzip
+import re
+import shutil
+import tempfile
+import unittest
+from poker_game import assets
+from poker_game import server
+from poker_game import statics
+
+
+async def get(app, path, headers=(), method='GET'):
+    """
+    Sends one request to an ASGI app and returns the status, headers and
+    body.
+    """
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'headers': list(headers)}
+    await app(scope, receive, send)
+    return sent[0]['status'], dict(sent[0]['headers']), sent[1]['body']
+
+
+class TestStatics(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.folder, 'js'))
+        self.script = b'const cards = [];\n' * 100
+        with open(os.path.join(self.folder, 'js', 'app.js'), 'wb') as script:
+            script.write(self.script)
+        with open(os.path.join(self.folder, 'tiny.css'), 'wb') as css:
+            css.write(b'a {}')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_accepted_encodings(self):
+        """
+        Tests reading Accept-Encoding, refusals included.
+        """
+        self.assertEqual(
+            statics.accepted_encodings('gzip, deflate;q=0.5, br;q=0'),
+            set(['gzip', 'deflate']))
+        self.assertEqual(statics.accepted_encodings(''), set())
+        self.assertTrue(statics.etag_matches('"a", "b"', '"b"'))
+        self.assertTrue(statics.etag_matches('*', '"b"'))
+        self.assertFalse(statics.etag_matches('"a"', '"b"'))
+
+    def test_index(self):
+        """
+        Tests loading files with their compressed forms.
+        """
+        index = statics.StaticIndex(self.folder)
+        index.load()
+        self.assertEqual(sorted(index.files), ['js/app.js', 'tiny.css'])
+
+        script = index.get('js/app.js')
+        self.assertTrue(script.varies())
+        encoding, body, etag = script.choose('gzip')
+        self.assertEqual(encoding, statics.GZIP)
+        self.assertEqual(gzip.decompress(body), self.script)
+        self.assertNotEqual(etag, script.choose('')[2])
+
+        # Too small to compress.
+        self.assertFalse(index.get('tiny.css').varies())
+        self.assertIsNone(index.get('../tiny.css'))
+        self.assertIsNone(index.get('missing.js'))
+
+        # A file written later is found on its first request.
+        with open(os.path.join(self.folder, 'new.css'), 'wb') as css:
+            css.write(b'b {}')
+        self.assertEqual(index.get('new.css').choose('')[1], b'b {}')
+
+    def test_server(self):
+        """
+        Tests serving from memory with ETags over ASGI.
+        """
+        async def run():
+            app = server.PokerApp(static=statics.StaticIndex(self.folder))
+            first = await get(app, '/static/js/app.js',
+                              [(b'accept-encoding', b'gzip, br')])
+            again = await get(app, '/static/js/app.js', [
+                (b'accept-encoding', b'gzip, br'),
+                (b'if-none-match', first[1][b'etag'])])
+            plain = await get(app, '/static/js/app.js')
+            head = await get(app, '/static/js/app.js', method='HEAD')
+            missing = await get(app, '/static/../../etc/passwd')
+            return first, again, plain, head, missing
+
+        first, again, plain, head, missing = asyncio.run(run())
+        self.assertEqual(first[0], 200)
+        self.assertIn(first[1][b'content-encoding'], (b'gzip', b'br'))
+        self.assertEqual(first[1][b'vary'], b'Accept-Encoding')
+        self.assertEqual(again[0], 304)
+        self.assertEqual(plain[2], self.script)
+        self.assertNotIn(b'content-encoding', plain[1])
+        self.assertEqual(head[2], b'')
+        self.assertEqual(head[1][b'content-length'],
+                         str(len(self.script)).encode('latin-1'))
+        self.assertEqual(missing[0], 404)
+
+    def test_nginx(self):
+        """
+        Tests the compressed copies and the locations written for nginx.
+        """
+        written = statics.compress_files(self.folder)
+        self.assertIn(os.path.join(self.folder, 'js', 'app.js.gz'), written)
+
+        # The copies are not served as files of their own.
+        index = statics.StaticIndex(self.folder)
+        index.load()
+        self.assertEqual(sorted(index.files), ['js/app.js', 'tiny.css'])
+
+        config = statics.nginx_config(self.folder)
+        self.assertIn('location /static/ {', config)
+        self.assertIn('alias {}/;'.format(os.path.realpath(self.folder)),
+                      config)
+        self.assertIn('gzip_static on;', config)
+        self.assertIn(statics.IMMUTABLE, config)
+
+        # Only hashed built files are immutable, as in `StaticIndex`.
+        pattern = re.search(r'location ~ "(.+)"', config).group(1)
+        for name in ['dist/app.0123456789ab.js', 'dist/sprites.css',
+                     'dist/index.html', 'dist/manifest.json',
+                     'js/app.0123456789ab.js']:
+            self.assertEqual(
+                re.match(pattern, '/static/' + name) is not None,
+                name.startswith('dist/') and assets.is_hashed(name), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
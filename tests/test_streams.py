@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Test Streams
+============
+
+Test the seeding and spawning of random streams.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import unittest
+from poker_game import streams
+
+KINDS = [streams.RANDOM]
+if streams.np is not None:
+    KINDS.append(streams.NUMPY)
+
+
+class TestStreams(unittest.TestCase):
+
+    def test_reproducible(self):
+        """
+        Tests that a stream rebuilt from its seed draws the same values.
+        """
+        for kind in KINDS:
+            child = streams.make_stream(42, kind).spawn(3).spawn(7)
+            self.assertEqual(child.seed, (42, (3, 7)))
+            self.assertEqual(child.KIND, kind)
+
+            draws = child.draw(10) + [child.random()] + child.draw(5000)
+            rebuilt = streams.from_seed(child.seed, kind)
+            self.assertEqual(rebuilt.draw(5011), draws)
+            self.assertTrue(all(0.0 <= draw < 1.0 for draw in draws))
+
+    def test_children_differ(self):
+        """
+        Tests that children of one stream draw different values.
+        """
+        for kind in KINDS:
+            root = streams.make_stream(42, kind)
+            first = [root.spawn(key).draw(4) for key in range(20)]
+            self.assertEqual(len(set(map(tuple, first))), 20)
+            self.assertNotEqual(root.draw(4), first[0])
+
+    @unittest.skipIf(streams.np is None, "numpy is not installed")
+    def test_default_kind(self):
+        """
+        Tests that NumPy streams are the default when NumPy is installed.
+        """
+        self.assertEqual(streams.make_stream(1).KIND, streams.NUMPY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Test Tables
+===========
+
+Test tables played on the event loop and the ASGI server around them.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import asyncio
+import json
+import unittest
+from poker_game import server
+from poker_game import shards
+from poker_game import simulator
+from poker_game import tables
+
+
+async def call(app, method, path, body=None):
+    """
+    Sends one request to an ASGI app and returns the status and body.
+    """
+    messages = [{
+        'type': 'http.request',
+        'body': b'' if body is None else json.dumps(body).encode('utf-8'),
+        'more_body': False
+    }]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path}
+    await app(scope, receive, send)
+    return sent[0]['status'], sent[1]['body']
+
+
+class TestTables(unittest.TestCase):
+
+    def test_bot_tables(self):
+        """
+        Tests that many bot tables play side by side without losing chips.
+        """
+        async def play():
+            lobby = tables.Lobby(seed=3, hand_pause=0)
+            results = []
+            for _ in range(20):
+                table = lobby.create_table(num_seats=6)
+                for seat in range(6):
+                    table.join('Bot {}'.format(seat),
+                               strategy=simulator.raise_strong)
+                table.listeners.append(
+                    lambda table, event: event[0] == simulator.RESULT and
+                    results.append(event[1]))
+            await asyncio.sleep(0.2)
+            await lobby.close()
+            return lobby, results
+
+        lobby, results = asyncio.run(play())
+        self.assertGreater(len(results), 20)
+        for table in lobby.tables.values():
+            self.assertGreater(table.hand_count, 0)
+        for result in results:
+            self.assertEqual(sum(result.winnings), 0)
+
+        # Every table deals from its own stream.
+        seeds = set(result.seed for result in results)
+        self.assertEqual(len(seeds), len(results))
+
+    def test_player_actions(self):
+        """
+        Tests that a player is waited on, acts, and times out.
+        """
+        async def play():
+            lobby = tables.Lobby(seed=4, hand_pause=0, action_timeout=0.05)
+            table = lobby.create_table(num_seats=2)
+            seat = table.join('Player', token='secret')
+            table.join('Bot', strategy=simulator.check_call)
+
+            # Wait for the first decision of the player.
+            for _ in range(100):
+                await asyncio.sleep(0.001)
+                if table.waiting_on == seat:
+                    break
+            self.assertEqual(table.waiting_on, seat)
+
+            with self.assertRaises(ValueError):
+                table.act(seat, simulator.CALL, token='wrong')
+            table.act(seat, simulator.FOLD, token='secret')
+            await asyncio.sleep(0.01)
+            first = table.last_result
+
+            # Nobody acts now, so the player times out.
+            await asyncio.sleep(0.3)
+            await lobby.close()
+            return first, table
+
+        first, table = asyncio.run(play())
+        self.assertEqual(first.actions[0][2], simulator.FOLD)
+        self.assertGreater(table.hand_count, 1)
+
+
+class TestServer(unittest.TestCase):
+
+    def test_routes(self):
+        """
+        Tests creating, joining and acting at a table over ASGI.
+        """
+        async def run():
+            app = server.PokerApp(shards.ShardManager(
+                1, seed=5, hand_pause=0).start())
+            responses = [
+                await call(app, 'POST', '/tables', {'bots': 1}),
+                await call(app, 'POST', '/tables/0/join', {'name': 'Ann'}),
+                await call(app, 'GET', '/tables/0'),
+                await call(app, 'GET', '/tables/7'),
+                await call(app, 'POST', '/tables/0/act', {'seat': 0}),
+                await call(app, 'GET', '/static/../server.py'),
+                await call(app, 'GET', '/'),
+            ]
+            join = json.loads(responses[1][1].decode('utf-8'))
+            responses.append(await call(app, 'POST', '/tables/0/act', {
+                'seat': join['seat'], 'token': join['token'],
+                'action': simulator.CALL}))
+            for bots in ('x', -1):
+                responses.append(await call(app, 'POST', '/tables',
+                                            {'bots': bots}))
+            app.shards.close()
+            return responses
+
+        responses = asyncio.run(run())
+        statuses = [status for status, _ in responses]
+        self.assertEqual(statuses, [201, 200, 200, 404, 400, 404, 200, 202,
+                                    400, 400])
+
+        state = json.loads(responses[2][1].decode('utf-8'))
+        self.assertEqual(state['seats'][1]['name'], 'Ann')
+        self.assertTrue(state['seats'][0]['bot'])
+        self.assertIn(b'app-container', responses[6][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Test Tracker
+============
+
+Test the street by street hand tracker.
+"""
+import sys
+import os
+# Adds the path of poker_game to test file.
+sys.path.append(os.path.join(os.path.dirname(__name__), '..'))
+
+import random
+import unittest
+from poker_game import codec
+from poker_game import hands
+from poker_game import streams
+from poker_game import tracker
+from poker_game.poker import PokerEngine
+
+
+def to_ids(*cards):
+    return [hands.to_id(card) for card in cards]
+
+
+class TestHandTracker(unittest.TestCase):
+
+    def test_follows_community(self):
+        """
+        Tests that the tracker agrees with evaluate on every street.
+        """
+        engine = PokerEngine(streams.make_stream(8))
+        for _ in range(50):
+            hand = engine.deal_hands(2)[0]
+            community = engine.deal_community()
+            hole = (hand.card_1.id, hand.card_2.id)
+            hand_tracker = tracker.HandTracker(hole)
+
+            for street in range(4):
+                if street:
+                    community.next()
+                hand_tracker.sync(community)
+                self.assertEqual(hand_tracker.street(), street)
+                self.assertEqual(
+                    hand_tracker.strength(),
+                    hands.evaluate(hole, hand_tracker.board))
+
+            self.assertEqual(hand_tracker.board,
+                             [card.id for card in community.river])
+
+    def test_draws(self):
+        """
+        Tests the draws of a few flops.
+        """
+        draws = tracker.HandTracker(
+            to_ids('9h', '8h'), to_ids('7h', '6c', '2h')).draws()
+        self.assertEqual(draws, [tracker.FLUSH_DRAW, tracker.OPEN_ENDED])
+
+        draws = tracker.HandTracker(
+            to_ids('Ah', 'Kd'), to_ids('Qc', 'Ts', '2h')).draws()
+        self.assertEqual(draws, [tracker.GUTSHOT])
+
+        draws = tracker.HandTracker(
+            to_ids('Ah', 'Kd'), to_ids('Qc', 'Ts', '2h', '3h', '4s')).draws()
+        self.assertEqual(draws, [])
+
+        with self.assertRaises(ValueError):
+            tracker.HandTracker(to_ids('Ah', 'Kd'), to_ids('Ah'))
+
+    def test_outs(self):
+        """
+        Tests the outs against adding every unseen card.
+        """
+        rng = random.Random(6)
+        for _ in range(300):
+            num_cards = rng.choice([5, 6])
+            cards = rng.sample(range(52), num_cards + 1)
+            dead = cards[num_cards:]
+            hand_tracker = tracker.HandTracker(cards[:2], cards[2:num_cards])
+
+            category = hand_tracker.category()
+            expected = []
+            for card in range(52):
+                if card in cards:
+                    continue
+                packed = hand_tracker.cards | codec.CARD_MASKS[card]
+                if hands.get_category(hands.evaluate_packed(packed)) > (
+                        category):
+                    expected.append(card)
+
+            self.assertEqual(sorted(hand_tracker.outs(dead)), expected)
+
+        # Nine hearts, six more straight cards and fourteen more that pair.
+        hand_tracker = tracker.HandTracker(
+            to_ids('9h', '8h'), to_ids('7h', '6c', '2h'))
+        self.assertEqual(len(hand_tracker.outs()), 9 + 6 + 14)
+
+
+if __name__ == '__main__':
+    unittest.main()